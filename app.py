@@ -3,18 +3,44 @@ import logging
 
 import modal
 
-from src.etl.etl import etl_ynab_data
-from src.sheets.refresh_sheets import refresh_sheets
 from src.utils.logging_config import setup_logging
-from src.warehouse.create_warehouse import create_data_warehouse
 
 setup_logging()
 
 app = modal.App('ynab-report')
 
+SQLMESH_CACHE_DIR = '/root/sqlmesh-cache'
+sqlmesh_cache = modal.Volume.from_name(
+    'ynab-report-sqlmesh-cache', create_if_missing=True
+)
+
+# The warehouse holds SQLMesh's state and the project hash, so it has to outlive
+# the container for incremental runs and plan skipping to work. The build copy
+# sits next to it on the same volume, so publishing it stays a rename
+WAREHOUSE_DIR = '/root/warehouse'
+warehouse_volume = modal.Volume.from_name(
+    'ynab-report-warehouse', create_if_missing=True
+)
+
+DUCKDB_EXTENSION_DIRECTORY = '/root/duckdb-extensions'
+
 modal_image = (
     modal.Image.debian_slim(python_version='3.10')
     .pip_install_from_pyproject("pyproject.toml")
+    .env(
+        {
+            # Parsed models are cached on a volume so scheduled runs skip re-parsing
+            'SQLMESH_CACHE_DIR': SQLMESH_CACHE_DIR,
+            'DATABASE_PATH': f'{WAREHOUSE_DIR}/ynab_report.duckdb',
+            'DUCKDB_EXTENSION_DIRECTORY': DUCKDB_EXTENSION_DIRECTORY,
+        }
+    )
+    # Installed while the image builds, so containers load httpfs offline
+    .run_commands(
+        'python -c "import duckdb, os; duckdb.connect(config={'
+        "'extension_directory': os.environ['DUCKDB_EXTENSION_DIRECTORY']"
+        "}).install_extension('httpfs')\""
+    )
     .add_local_dir(
         'src/warehouse/sqlmesh_project/',
         remote_path='/root/src/warehouse/sqlmesh_project/',
@@ -27,6 +53,7 @@ modal_image = (
     image=modal_image,
     schedule=modal.Cron('5 8 * * *'),
     secrets=[modal.Secret.from_name('ynab-report-secrets')],
+    volumes={SQLMESH_CACHE_DIR: sqlmesh_cache, WAREHOUSE_DIR: warehouse_volume},
     retries=modal.Retries(
         max_retries=3,
         backoff_coefficient=1.0,
@@ -37,17 +64,45 @@ def ynab_report_app(
     sync_s3: bool = True,
     update_dashboards: bool = True,
     is_local_run: bool = False,
+    full_refresh: bool = False,
+    stream_budget: bool = False,
+    force_sheets_refresh: bool = False,
 ):
-    if sync_s3:
-        logging.info('Running S3 sync.')
-        etl_ynab_data()
-        logging.info('S3 sync completed.')
+    # Each stage is imported when it runs, so `modal run` and runs that skip a
+    # stage don't pay for sqlmesh, gspread and the rest at startup
+    from src.utils.metrics import save_run_metrics, span, start_run
+
+    start_run()
+    try:
+        if sync_s3:
+            from src.etl.etl import etl_ynab_data
+
+            logging.info('Running S3 sync.')
+            with span('stage.sync_s3', full_refresh=full_refresh):
+                etl_ynab_data(full_refresh=full_refresh, stream_budget=stream_budget)
+            logging.info('S3 sync completed.')
+
+        if update_dashboards:
+            from src.sheets.refresh_sheets import refresh_sheets
+            from src.warehouse.create_warehouse import create_data_warehouse
 
-    if update_dashboards:
-        logging.info('Updating dashboards.')
-        create_data_warehouse(is_local_run=is_local_run)
-        refresh_sheets()
-        logging.info('Dashboard update process completed.')
+            logging.info('Updating dashboards.')
+            with span('stage.warehouse', full_refresh=full_refresh):
+                create_data_warehouse(
+                    is_local_run=is_local_run, full_refresh=full_refresh
+                )
+            if not is_local_run:
+                # Keep the new warehouse even if a later stage fails
+                warehouse_volume.commit()
+            with span('stage.sheets', force=force_sheets_refresh):
+                refresh_sheets(force=force_sheets_refresh)
+            logging.info('Dashboard update process completed.')
+    finally:
+        # Saved even when a stage fails, so failed runs show up too
+        try:
+            save_run_metrics()
+        except Exception as e:
+            logging.error(f'Failed to save run metrics: {e}')
 
 
 if __name__ == '__main__':
@@ -64,16 +119,40 @@ if __name__ == '__main__':
         action='store_true',
         help='Run the dashboard update process.',
     )
+    parser.add_argument(
+        '--full-refresh',
+        action='store_true',
+        help=(
+            'Ignore the saved server knowledge and re-extract the whole budget, '
+            'then restate the incremental warehouse models.'
+        ),
+    )
+    parser.add_argument(
+        '--stream-budget',
+        action='store_true',
+        help='Parse the budget response as it downloads instead of all at once.',
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Rewrite every dashboard sheet, even ones unchanged since the last run.',
+    )
 
     args = parser.parse_args()
 
     sync_s3 = args.sync_s3
     update_dashboards = args.update_dashboards
+    full_refresh = args.full_refresh
+    stream_budget = args.stream_budget
+    force_sheets_refresh = args.force
 
     logging.info('Running ynab_report_app locally')
     ynab_report_app.local(
         sync_s3=sync_s3,
         update_dashboards=update_dashboards,
         is_local_run=True,
+        full_refresh=full_refresh,
+        stream_budget=stream_budget,
+        force_sheets_refresh=force_sheets_refresh,
     )
     logging.info('ynab_report_app completed')
@@ -0,0 +1,137 @@
+"""Import time of the pipeline's entry points, from `python -X importtime`.
+
+Each module is imported in a fresh interpreter, so nothing is reused from an
+earlier import. Modules the interpreter imports at startup are left out. Every
+module reports its total import time and the packages that took the longest.
+
+    python -m benchmarks.import_times app src.etl.etl
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+from src import project_root
+
+DEFAULT_MODULES = (
+    'app',
+    'src.etl.etl',
+    'src.warehouse.create_warehouse',
+    'src.sheets.refresh_sheets',
+    'src.utils.metrics',
+)
+
+# One line per import: "import time: <self us> | <cumulative us> | <module>",
+# with the module indented two spaces per level of nesting
+IMPORTTIME_PREFIX = 'import time:'
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(module, depth, self us, cumulative us) for each import in the output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith(IMPORTTIME_PREFIX):
+            continue
+        self_us, cumulative_us, name = line[len(IMPORTTIME_PREFIX) :].split('|')
+        if not self_us.strip().isdigit():
+            # The header line
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return imports
+
+
+def _run_importtime(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True,
+        text=True,
+        cwd=project_root,
+    )
+
+
+def startup_modules() -> Set[str]:
+    """Modules the interpreter imports before running any code."""
+    return {name for name, *_ in parse_importtime(_run_importtime('pass').stderr)}
+
+
+def summarize_imports(
+    imports: List[Tuple[str, int, int, int]], skip: Set[str], top: int = 5
+) -> Dict[str, Any]:
+    imports = [item for item in imports if item[0] not in skip]
+    self_by_package = Counter()
+    for name, _, self_us, _ in imports:
+        self_by_package[name.split('.')[0]] += self_us
+
+    return {
+        'seconds': round(
+            sum(cumulative for _, depth, _, cumulative in imports if depth == 0) / 1e6,
+            3,
+        ),
+        'modules': len(imports),
+        'packages': {
+            package: round(self_us / 1e6, 3)
+            for package, self_us in self_by_package.most_common(top)
+        },
+    }
+
+
+def measure_import_time(module: str, skip: Set[str], top: int = 5) -> Dict[str, Any]:
+    result = _run_importtime(f'import {module}')
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1]
+        return {'module': module, 'error': error}
+
+    return {
+        'module': module,
+        **summarize_imports(parse_importtime(result.stderr), skip, top),
+    }
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    width = max(len(result['module']) for result in results) + 2
+    lines = [f'{"module":<{width}}{"seconds":>9}{"modules":>9}  slowest packages']
+    for result in results:
+        if 'error' in result:
+            lines.append(f'{result["module"]:<{width}}  failed: {result["error"]}')
+            continue
+        packages = ', '.join(
+            f'{package} {seconds:.2f}'
+            for package, seconds in result['packages'].items()
+        )
+        lines.append(
+            f'{result["module"]:<{width}}{result["seconds"]:>9.2f}'
+            f'{result["modules"]:>9}  {packages}'
+        )
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Report how long the pipeline modules take to import.'
+    )
+    parser.add_argument(
+        'modules',
+        nargs='*',
+        default=list(DEFAULT_MODULES),
+        help='Modules to import, each in a fresh interpreter.',
+    )
+    parser.add_argument(
+        '--top', type=int, default=5, help='Packages to list per module.'
+    )
+    parser.add_argument(
+        '--output', type=Path, help='Also write the results to this JSON file.'
+    )
+
+    args = parser.parse_args()
+
+    skip = startup_modules()
+    results = [measure_import_time(module, skip, args.top) for module in args.modules]
+
+    print(format_results(results))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
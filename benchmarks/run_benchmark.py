@@ -0,0 +1,231 @@
+"""End-to-end benchmark of the ETL, warehouse and sheets stages.
+
+A synthetic budget is streamed through the same extract and load functions a
+real run uses, into a local directory standing in for the S3 bucket. The
+warehouse is then built from it and the dashboards are rendered against an
+in-memory spreadsheet. Every stage reports its wall time, peak RSS and the
+Sheets API calls it made. `benchmarks.import_times` reports what the modules
+cost to import.
+
+    python -m benchmarks.run_benchmark --years 10 --categories 2000 \\
+        --transactions 1000000
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import shutil
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+from benchmarks.synthetic_budget import SyntheticBudget
+from src.utils.logging_config import setup_logging
+
+BUCKET_NAME = 'benchmark'
+
+
+def _reset_peak_rss() -> None:
+    # Linux resets the high-water mark reported as VmHWM on this write
+    try:
+        Path('/proc/self/clear_refs').write_text('5')
+    except OSError:
+        pass
+
+
+def _peak_rss_mb() -> float:
+    try:
+        for line in Path('/proc/self/status').read_text().splitlines():
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak for the whole process, in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageTimer:
+    """Records wall time, peak RSS and Sheets API calls for each stage."""
+
+    def __init__(self, spreadsheet):
+        self._spreadsheet = spreadsheet
+        self.results: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        logging.info(f'Starting benchmark stage {name}')
+        _reset_peak_rss()
+        calls_before = len(self._spreadsheet.calls)
+        started_at = time.perf_counter()
+
+        yield
+
+        self.results.append(
+            {
+                'stage': name,
+                'seconds': round(time.perf_counter() - started_at, 3),
+                'peak_rss_mb': round(_peak_rss_mb(), 1),
+                'api_calls': dict(
+                    Counter(self._spreadsheet.call_names()[calls_before:])
+                ),
+            }
+        )
+
+
+def configure_environment(work_dir: Path) -> None:
+    """Point every stage at files under `work_dir` instead of S3 and the real
+    warehouse. Must run before the pipeline modules are imported."""
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    os.environ['S3_LOCAL_ROOT'] = str(work_dir / 's3')
+    os.environ['BUCKET_NAME'] = BUCKET_NAME
+    os.environ['DATABASE_PATH'] = str(work_dir / 'ynab_report.duckdb')
+    os.environ['SQLMESH_CACHE_DIR'] = str(work_dir / 'sqlmesh-cache')
+
+
+def run_benchmark(budget: SyntheticBudget, work_dir: Path) -> List[Dict[str, Any]]:
+    configure_environment(work_dir)
+
+    # Imported here since they read the environment at import time
+    import duckdb
+
+    from src.etl.category_orders import CATEGORY_ORDERS_KEY
+    from src.etl.etl import ETL_MAX_WORKERS, etl_functions
+    from src.etl.streaming import stream_budget_to_parquet
+    from src.sheets.refresh_sheets import refresh_sheets
+    from src.utils.s3_utils import load_df_to_s3_table
+    from src.utils.task_pool import TaskPool, worker_cursor
+    from src.warehouse.create_warehouse import create_data_warehouse
+    from src.warehouse.dashboards_snapshot import export_dashboards_snapshot
+    from tests.fakes import FakeSpreadsheet
+
+    spreadsheet = FakeSpreadsheet()
+    timer = StageTimer(spreadsheet)
+    budget_path = work_dir / 'budget.json'
+    parquet_dir = work_dir / 'budget'
+    parquet_dir.mkdir(exist_ok=True)
+
+    with timer.stage('generate'):
+        with open(budget_path, 'w') as stream:
+            counts = budget.write_response(stream)
+    logging.info(f'Generated budget with {counts}')
+
+    with timer.stage('extract'):
+        with open(budget_path, 'rb') as stream:
+            budget_tables, _ = stream_budget_to_parquet(stream, parquet_dir)
+
+    duckdb_con = duckdb.connect()
+    with timer.stage('load'):
+        with TaskPool(ETL_MAX_WORKERS) as pool:
+            pool.submit(
+                'paystubs',
+                lambda: load_df_to_s3_table(
+                    worker_cursor(duckdb_con),
+                    budget.paystubs(),
+                    'raw-paystubs',
+                    BUCKET_NAME,
+                ),
+            )
+            pool.submit(
+                'category-orders',
+                lambda: load_df_to_s3_table(
+                    worker_cursor(duckdb_con),
+                    budget.category_orders(),
+                    CATEGORY_ORDERS_KEY,
+                    BUCKET_NAME,
+                ),
+            )
+            for endpoint, function in etl_functions.items():
+                pool.submit(
+                    endpoint,
+                    lambda function=function: function(
+                        budget_tables, worker_cursor(duckdb_con)
+                    ),
+                )
+            pool.wait()
+    duckdb_con.close()
+
+    with timer.stage('warehouse'):
+        create_data_warehouse(is_local_run=False)
+
+    # The daily sync rewrites the full extracts, so the rerun builds, but an
+    # unchanged project skips the plan: this is the daily run's cost
+    with duckdb.connect() as duckdb_con:
+        load_df_to_s3_table(duckdb_con, budget.paystubs(), 'raw-paystubs', BUCKET_NAME)
+    with timer.stage('warehouse-rerun'):
+        create_data_warehouse(is_local_run=False)
+
+    with timer.stage('snapshot'):
+        export_dashboards_snapshot(work_dir / 'dashboards.duckdb')
+
+    with timer.stage('sheets'):
+        refresh_sheets(spreadsheet=spreadsheet)
+
+    # Nothing changed, so every sheet is skipped by its fingerprint and the
+    # only API call is the sheet metadata read
+    with timer.stage('sheets-rerun'):
+        refresh_sheets(spreadsheet=spreadsheet)
+
+    return timer.results
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    lines = [f'{"stage":<16}{"seconds":>10}{"peak rss mb":>14}{"api calls":>11}']
+    for result in results:
+        lines.append(
+            f'{result["stage"]:<16}{result["seconds"]:>10.2f}'
+            f'{result["peak_rss_mb"]:>14.1f}{sum(result["api_calls"].values()):>11}'
+        )
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark the pipeline end to end on a synthetic budget.'
+    )
+    parser.add_argument('--years', type=int, default=5, help='Years of history.')
+    parser.add_argument('--categories', type=int, default=500)
+    parser.add_argument('--transactions', type=int, default=200_000)
+    parser.add_argument(
+        '--split-share',
+        type=float,
+        default=0.1,
+        help='Share of transactions split into subtransactions.',
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--work-dir',
+        type=Path,
+        help='Keep the generated files here instead of a temporary directory.',
+    )
+    parser.add_argument(
+        '--output', type=Path, help='Also write the results to this JSON file.'
+    )
+
+    args = parser.parse_args()
+
+    setup_logging()
+
+    budget = SyntheticBudget(
+        years=args.years,
+        categories=args.categories,
+        transactions=args.transactions,
+        split_share=args.split_share,
+        seed=args.seed,
+    )
+
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix='ynab-benchmark-'))
+    try:
+        results = run_benchmark(budget, work_dir)
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir)
+
+    print(format_results(results))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
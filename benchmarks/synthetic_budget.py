@@ -0,0 +1,305 @@
+"""Synthetic YNAB budgets for benchmarking the pipeline at scale.
+
+The budget is written as a full-budget API response, one item at a time, so
+budgets with millions of transactions can be generated without holding them
+in memory. Every category, month and transaction is derived from the seed, so
+the same arguments always produce the same budget.
+"""
+
+import json
+import random
+from datetime import date, timedelta
+from typing import IO, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+# Named like the real budget's groups, so they map onto the dashboard groups
+CATEGORY_GROUP_NAMES = [
+    'Needs - Home',
+    'Needs - Transportation',
+    'Needs - Health',
+    'Wants - Fun',
+    'Wants - Travel',
+    'Savings - Goals',
+    'Emergency Fund - Cash',
+    'Investments - Brokerage',
+    'Net Zero Expenses - Reimbursed',
+]
+INCOME_GROUP_NAME = 'Internal Master Category'
+INCOME_CATEGORY_ID = 'category-income'
+
+ACCOUNT_COUNT = 8
+# Months budgeted ahead of the current one
+FUTURE_MONTHS = 2
+# One in this many categories is an HSA category
+HSA_CATEGORY_EVERY = 50
+# One in this many transactions is a paycheck into the income category
+INCOME_TRANSACTION_EVERY = 40
+PAYSTUB_INTERVAL_DAYS = 14
+# Paystub components the synthetic paychecks don't have
+PAYSTUB_ZERO_COLUMNS = [
+    'earnings_bonus',
+    'earnings_meal_allowance',
+    'earnings_pto_payout',
+    'earnings_severance',
+    'earnings_misc',
+    'earnings_expense_reimbursement',
+    'earnings_nyc_citi_bike',
+    'pre_tax_hsa',
+    'pre_tax_fsa',
+    'pre_tax_medical',
+    'taxes_medicare',
+    'taxes_state',
+    'taxes_city',
+    'taxes_nypfl',
+    'taxes_disability',
+    'taxes_social_security',
+    'post_tax_meal_allowance_offset',
+    'post_tax_critical_illness',
+    'post_tax_ad_d',
+    'post_tax_long_term_disability',
+    'post_tax_citi_bike',
+]
+
+
+def _month_starts(start: date, end: date) -> Iterator[date]:
+    month = start.replace(day=1)
+    while month <= end:
+        yield month
+        month = (month + timedelta(days=32)).replace(day=1)
+
+
+def _category_group_id(category_index: int) -> str:
+    return f'group-{category_index % len(CATEGORY_GROUP_NAMES)}'
+
+
+def _category_group_name(category_index: int) -> str:
+    return CATEGORY_GROUP_NAMES[category_index % len(CATEGORY_GROUP_NAMES)]
+
+
+def _category_name(category_index: int) -> str:
+    if category_index % HSA_CATEGORY_EVERY == 0:
+        return f'HSA Fund {category_index}'
+    return f'Category {category_index}'
+
+
+def _write_list(stream: IO[str], key: str, items: Iterator[Dict]) -> int:
+    stream.write(f'"{key}": [')
+    count = 0
+    for item in items:
+        if count:
+            stream.write(', ')
+        stream.write(json.dumps(item))
+        count += 1
+    stream.write(']')
+    return count
+
+
+class SyntheticBudget:
+    """A budget with `categories` categories and `transactions` transactions
+    spread over the `years` up to `end`.
+
+    A `split_share` of the transactions are split between two categories, with
+    one subtransaction per category.
+    """
+
+    def __init__(
+        self,
+        years: int,
+        categories: int,
+        transactions: int,
+        split_share: float = 0.1,
+        seed: int = 0,
+        end: Optional[date] = None,
+    ):
+        self.years = years
+        self.categories = categories
+        self.transactions = transactions
+        self.split_share = split_share
+        self.seed = seed
+        self.end = end or date.today()
+        self.start = self.end.replace(year=self.end.year - years, day=1)
+
+    def category_groups(self) -> Iterator[Dict]:
+        for index, name in enumerate(CATEGORY_GROUP_NAMES):
+            yield {'id': f'group-{index}', 'name': name, 'hidden': False}
+        yield {'id': 'group-income', 'name': INCOME_GROUP_NAME, 'hidden': False}
+
+    def months(self) -> Iterator[Dict]:
+        rng = random.Random(f'{self.seed}-months')
+        last_month = self.end.replace(day=1) + timedelta(days=31 * FUTURE_MONTHS)
+        for month in _month_starts(self.start, last_month):
+            categories: List[Dict] = [
+                {
+                    'id': INCOME_CATEGORY_ID,
+                    'category_group_id': 'group-income',
+                    'category_group_name': INCOME_GROUP_NAME,
+                    'name': 'Inflow: Ready to Assign',
+                    'hidden': False,
+                    'budgeted': 0,
+                    'activity': 0,
+                    'balance': 0,
+                }
+            ]
+            for index in range(self.categories):
+                budgeted = rng.randrange(0, 500_000, 10)
+                activity = -rng.randrange(0, 500_000, 10)
+                categories.append(
+                    {
+                        'id': f'category-{index}',
+                        'category_group_id': _category_group_id(index),
+                        'category_group_name': _category_group_name(index),
+                        'name': _category_name(index),
+                        'hidden': False,
+                        'budgeted': budgeted,
+                        'activity': activity,
+                        'balance': budgeted + activity,
+                    }
+                )
+            yield {'month': month.isoformat(), 'categories': categories}
+
+    def _transactions_and_subtransactions(self) -> Iterator[Dict]:
+        """Transactions, each followed by its subtransactions if it's split.
+
+        The lists are written one after the other, so this is generated once
+        for each rather than buffering the subtransactions.
+        """
+        rng = random.Random(f'{self.seed}-transactions')
+        days = (self.end - self.start).days
+        for index in range(self.transactions):
+            transaction_id = f'transaction-{index}'
+            transaction_date = self.start + timedelta(days=rng.randint(0, days))
+            is_income = index % INCOME_TRANSACTION_EVERY == 0
+            amount = (
+                rng.randrange(1_000_000, 5_000_000, 10)
+                if is_income
+                else -rng.randrange(100, 300_000, 10)
+            )
+            is_split = not is_income and rng.random() < self.split_share
+            category_id = (
+                INCOME_CATEGORY_ID
+                if is_income
+                else None if is_split else f'category-{rng.randrange(self.categories)}'
+            )
+
+            yield {
+                'id': transaction_id,
+                'date': transaction_date.isoformat(),
+                'amount': amount,
+                'memo': None,
+                'cleared': 'cleared',
+                'approved': True,
+                'account_id': f'account-{rng.randrange(ACCOUNT_COUNT)}',
+                'payee_id': f'payee-{rng.randrange(1000)}',
+                'category_id': category_id,
+                'import_payee_name': f'Payee {rng.randrange(1000)}',
+                'deleted': False,
+            }
+
+            if is_split:
+                first_amount = amount // 2
+                for part, part_amount in enumerate(
+                    (first_amount, amount - first_amount)
+                ):
+                    yield {
+                        'id': f'{transaction_id}-{part}',
+                        'transaction_id': transaction_id,
+                        'amount': part_amount,
+                        'category_id': f'category-{rng.randrange(self.categories)}',
+                        'deleted': False,
+                    }
+
+    def transactions_list(self) -> Iterator[Dict]:
+        return (
+            item
+            for item in self._transactions_and_subtransactions()
+            if 'transaction_id' not in item
+        )
+
+    def subtransactions_list(self) -> Iterator[Dict]:
+        return (
+            item
+            for item in self._transactions_and_subtransactions()
+            if 'transaction_id' in item
+        )
+
+    def accounts(self) -> Iterator[Dict]:
+        for index in range(ACCOUNT_COUNT):
+            yield {
+                'id': f'account-{index}',
+                'name': f'Account {index}',
+                'type': 'checking',
+                'on_budget': True,
+                'closed': False,
+                'balance': 0,
+                'deleted': False,
+            }
+
+    def write_response(self, stream: IO[str]) -> Dict[str, int]:
+        """Write the budget as a full-budget response, returning each list's length."""
+        lists = {
+            'category_groups': self.category_groups(),
+            'months': self.months(),
+            'transactions': self.transactions_list(),
+            'subtransactions': self.subtransactions_list(),
+            'accounts': self.accounts(),
+        }
+
+        stream.write('{"data": {"budget": {')
+        counts = {}
+        for index, (key, items) in enumerate(lists.items()):
+            if index:
+                stream.write(', ')
+            counts[key] = _write_list(stream, key, items)
+        stream.write('}, "server_knowledge": 1}}')
+
+        return counts
+
+    def paystubs(self) -> pd.DataFrame:
+        """Rows of the Paystubs sheet, as strings like the sheet returns them."""
+        pay_dates = pd.date_range(
+            self.start, self.end, freq=f'{PAYSTUB_INTERVAL_DAYS}D'
+        ).strftime('%m/%d/%Y')
+        df = pd.DataFrame(
+            {
+                'file_name': [
+                    f'paystub-{index}.pdf' for index in range(len(pay_dates))
+                ],
+                'employer': 'Employer',
+                'pay_period_start_date': pay_dates,
+                'pay_period_end_date': pay_dates,
+                'pay_date': pay_dates,
+                # Components add up to their totals, so the paystub audits pass
+                'net_pay': '2500',
+                'earnings_total': '4000',
+                'pre_tax_deductions': '400',
+                'taxes': '1000',
+                'post_tax_deductions': '100',
+                'earnings_salary': '4000',
+                'pre_tax_401k': '400',
+                'taxes_federal': '1000',
+                'post_tax_roth': '100',
+            }
+        )
+        for column in PAYSTUB_ZERO_COLUMNS:
+            df[column] = '0'
+        return df
+
+    def category_orders(self) -> pd.DataFrame:
+        """Rows of the Category Orders sheet, one per category."""
+        return pd.DataFrame(
+            {
+                'id': range(1, self.categories + 1),
+                'category_group': [
+                    _category_group_name(index).split(' - ')[0]
+                    for index in range(self.categories)
+                ],
+                'subcategory_group': [
+                    _category_group_name(index).split(' - ')[1]
+                    for index in range(self.categories)
+                ],
+                'category_name': [
+                    _category_name(index) for index in range(self.categories)
+                ],
+            }
+        )
@@ -0,0 +1,26 @@
+select
+    budget_month
+    , category_id
+    , category_name
+    , category_group_name
+    , subcategory_group_name
+    , category_group_name_mapping
+    , transaction_count
+    , income
+    , needs_spend
+    , wants_spend
+    , savings_spend
+    , emergency_fund_spend
+    , emergency_fund_in_hsa
+    , budgeted
+    , activity
+    , balance
+    , emergency_fund_assigned
+    , savings_assigned
+    , investments_assigned
+    , emergency_fund_balance
+    , savings_balance
+    , investments_balance
+    , net_zero_balance
+from ynab_report.combined.monthly_category_facts
+order by budget_month desc, category_id
@@ -22,3 +22,4 @@ select
     , spent
     , difference
 from ynab_report.dashboards.monthly_level
+order by budget_month desc
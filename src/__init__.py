@@ -1,3 +1,8 @@
 from pathlib import Path
 
+from dotenv import load_dotenv
+
 project_root = Path(__file__).parent.parent
+
+# Loaded once for every entry point: app.py, the sqlmesh CLI and the benchmarks
+load_dotenv(project_root / '.env')
@@ -0,0 +1,106 @@
+"""Cached copy of the Category Orders worksheet, stored next to the other datasets.
+
+The worksheet rarely changes, so it's only downloaded again when the dashboard
+spreadsheet's Drive modifiedTime differs from the one saved with the cached copy.
+The dashboard refresh writes to the same spreadsheet, so it marks its own edits
+as seen to keep the cache valid.
+"""
+
+import json
+import logging
+import os
+from typing import Optional
+
+import duckdb
+from gspread import Spreadsheet, service_account_from_dict
+from pandas import DataFrame
+
+from src.utils.db_connection import IN_MEMORY, DuckDBConnection
+from src.utils.s3_utils import load_df_to_s3_table, read_s3_state, write_s3_state
+
+SPREADSHEET_NAME = 'Spending Dashboard'
+WORKSHEET_NAME = 'Category Orders'
+
+CATEGORY_ORDERS_KEY = 'category-orders'
+CATEGORY_ORDERS_STATE_KEY = 'category-orders-state'
+
+
+def read_cached_modified_time(duckdb_con: duckdb.DuckDBPyConnection) -> Optional[str]:
+    state = read_s3_state(
+        duckdb_con, CATEGORY_ORDERS_STATE_KEY, os.getenv('BUCKET_NAME')
+    )
+    return state.get('modified_time')
+
+
+def save_cached_modified_time(
+    duckdb_con: duckdb.DuckDBPyConnection, modified_time: str
+) -> None:
+    write_s3_state(
+        duckdb_con,
+        {'modified_time': modified_time},
+        CATEGORY_ORDERS_STATE_KEY,
+        os.getenv('BUCKET_NAME'),
+    )
+
+
+def cache_category_orders(
+    duckdb_con: duckdb.DuckDBPyConnection,
+    spreadsheet: Spreadsheet,
+    force: bool = False,
+) -> bool:
+    """Download the worksheet if the spreadsheet changed, returning whether it did."""
+    # Read before downloading so an edit made mid-download triggers another fetch
+    modified_time = spreadsheet.get_lastUpdateTime()
+    if not force and modified_time == read_cached_modified_time(duckdb_con):
+        logging.info(f'{WORKSHEET_NAME} unchanged since {modified_time}, using cache')
+        return False
+
+    raw = spreadsheet.worksheet(WORKSHEET_NAME).get_all_values()
+    df = DataFrame(data=raw[1:], columns=raw[0]).astype(str)
+    df.insert(0, 'id', range(1, len(df) + 1))
+
+    rows_loaded = load_df_to_s3_table(
+        duckdb_con=duckdb_con,
+        df=df,
+        s3_key=CATEGORY_ORDERS_KEY,
+        bucket_name=os.getenv('BUCKET_NAME'),
+    )
+    save_cached_modified_time(duckdb_con, modified_time)
+
+    logging.info(f'Loaded {rows_loaded} rows to S3 bucket for {CATEGORY_ORDERS_KEY}')
+    return True
+
+
+def load_category_orders_from_sheets(
+    duckdb_con: duckdb.DuckDBPyConnection, force: bool = False
+) -> None:
+    credentials_dict = json.loads(os.getenv('GSPREAD_CREDENTIALS').replace('\n', '\\n'))
+    gc = service_account_from_dict(credentials_dict)
+    cache_category_orders(duckdb_con, gc.open(SPREADSHEET_NAME), force)
+
+
+def is_cache_current(spreadsheet: Spreadsheet) -> bool:
+    duckdb_con = DuckDBConnection(need_write_access=True, database=IN_MEMORY)
+    try:
+        cached = read_cached_modified_time(duckdb_con.get_connection())
+    finally:
+        duckdb_con.close()
+
+    return cached == spreadsheet.get_lastUpdateTime()
+
+
+def mark_own_edits_seen(spreadsheet: Spreadsheet) -> None:
+    """Save the spreadsheet's modifiedTime after writing to it ourselves.
+
+    Only call this if `is_cache_current` was true right before the writes,
+    otherwise an edit to Category Orders made before them would never be
+    fetched. An edit made during the writes themselves is still marked seen,
+    since the modifiedTime can't tell it apart from our own.
+    """
+    duckdb_con = DuckDBConnection(need_write_access=True, database=IN_MEMORY)
+    try:
+        save_cached_modified_time(
+            duckdb_con.get_connection(), spreadsheet.get_lastUpdateTime()
+        )
+    finally:
+        duckdb_con.close()
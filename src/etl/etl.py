@@ -1,23 +1,49 @@
 import json
 import logging
 import os
-from datetime import datetime
-from typing import Dict
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
 
 import duckdb
 import pandas as pd
 import requests
-from dotenv import load_dotenv
 from gspread import service_account_from_dict
 
-from src.utils.db_connection import DuckDBConnection
-from src.utils.s3_utils import load_df_to_s3_table
-
-load_dotenv()
-
-
-def extract_budget_data() -> Dict:
-    logging.info('Extracting budget data')
+from src.etl.category_orders import load_category_orders_from_sheets
+from src.etl.streaming import stream_budget_to_parquet
+from src.etl.tables import BudgetTable, build_budget_tables
+from src.utils.db_connection import IN_MEMORY, DuckDBConnection
+from src.utils.metrics import span
+from src.utils.s3_utils import (
+    Frame,
+    load_df_to_s3_partitions,
+    load_df_to_s3_table,
+    merge_df_to_s3_table,
+    read_s3_state,
+    write_s3_state,
+)
+from src.utils.task_pool import TaskPool, worker_cursor
+
+SYNC_STATE_KEY = 'sync-state'
+# Bump when the S3 layout changes so the next run does a full extract
+SYNC_STATE_VERSION = '3'
+
+# Enough for the paystub and category order loads plus every endpoint upload
+# to run at once
+ETL_MAX_WORKERS = 7
+
+
+def request_budget(
+    last_knowledge_of_server: Optional[int] = None,
+    stream: bool = False,
+) -> requests.Response:
+    if last_knowledge_of_server is None:
+        logging.info('Extracting budget data')
+    else:
+        logging.info(
+            f'Extracting budget changes since server knowledge {last_knowledge_of_server}'
+        )
 
     budget_id = os.getenv('BUDGET_ID')
     url = f'https://api.ynab.com/v1/budgets/{budget_id}'
@@ -27,82 +53,147 @@ def extract_budget_data() -> Dict:
         'Authorization': f'Bearer {bearer_token}',
     }
 
-    response = requests.get(url, headers=headers)
-    budget_data = response.json()['data']['budget']
+    params = {}
+    if last_knowledge_of_server is not None:
+        params['last_knowledge_of_server'] = last_knowledge_of_server
+
+    response = requests.get(url, headers=headers, params=params, stream=stream)
+    response.raise_for_status()
+
+    return response
 
-    logging.info('Extracted budget data')
 
-    return budget_data
+def extract_budget_data(
+    last_knowledge_of_server: Optional[int] = None,
+) -> Tuple[Dict[str, BudgetTable], int]:
+    """Fetch the budget, only including changes since `last_knowledge_of_server` if set."""
+    with span('etl.fetch_budget') as counts:
+        response = request_budget(last_knowledge_of_server)
+        data = response.json()['data']
+        counts['bytes'] = len(response.content)
+
+    logging.info(
+        f'Extracted budget data at server knowledge {data["server_knowledge"]}'
+    )
+
+    return build_budget_tables(data['budget']), data['server_knowledge']
+
+
+def stream_budget_data(
+    output_dir: Path,
+    last_knowledge_of_server: Optional[int] = None,
+) -> Tuple[Dict[str, BudgetTable], int]:
+    """Like extract_budget_data, but parses the response into parquet under `output_dir`
+    as it downloads instead of holding the whole payload in memory."""
+    with (
+        span('etl.stream_budget') as counts,
+        request_budget(last_knowledge_of_server, stream=True) as response,
+    ):
+        response.raw.decode_content = True
+        budget_tables, server_knowledge = stream_budget_to_parquet(
+            response.raw, output_dir
+        )
+        counts['bytes'] = response.raw.tell()
+
+    logging.info(f'Streamed budget data at server knowledge {server_knowledge}')
+
+    return budget_tables, server_knowledge
+
+
+def load_endpoint_to_s3(
+    duckdb_con: duckdb.DuckDBPyConnection,
+    df: Frame,
+    s3_key: str,
+    is_delta: bool,
+    key_columns: Sequence[str] = ('id',),
+    partitioned: bool = False,
+) -> int:
+    if partitioned:
+        return load_df_to_s3_partitions(
+            duckdb_con=duckdb_con,
+            df=df,
+            s3_key=s3_key,
+            bucket_name=os.getenv('BUCKET_NAME'),
+            is_delta=is_delta,
+            key_columns=key_columns,
+        )
+
+    if is_delta:
+        return merge_df_to_s3_table(
+            duckdb_con=duckdb_con,
+            df=df,
+            s3_key=s3_key,
+            bucket_name=os.getenv('BUCKET_NAME'),
+            key_columns=key_columns,
+        )
+
+    return load_df_to_s3_table(
+        duckdb_con=duckdb_con,
+        df=df,
+        s3_key=s3_key,
+        bucket_name=os.getenv('BUCKET_NAME'),
+        drop_deleted=True,
+    )
 
 
 def extract_category_groups(
-    budget_data: Dict, duckdb_con: duckdb.DuckDBPyConnection
+    budget_tables: Dict[str, BudgetTable],
+    duckdb_con: duckdb.DuckDBPyConnection,
+    is_delta: bool = False,
 ) -> None:
-    category_groups = pd.DataFrame(budget_data['category_groups'])
-
-    rows_loaded = load_df_to_s3_table(
+    rows_loaded = load_endpoint_to_s3(
         duckdb_con=duckdb_con,
-        df=category_groups.reset_index(drop=True),
+        df=budget_tables['category_groups'],
         s3_key='category-groups',
-        bucket_name=os.getenv('BUCKET_NAME'),
+        is_delta=is_delta,
     )
 
     logging.info(f'Loaded {rows_loaded} rows')
 
 
 def extract_categories(
-    budget_data: Dict, duckdb_con: duckdb.DuckDBPyConnection
+    budget_tables: Dict[str, BudgetTable],
+    duckdb_con: duckdb.DuckDBPyConnection,
+    is_delta: bool = False,
 ) -> None:
-    dfs = []
-
-    for month in budget_data['months']:
-        month_date = month['month']
-        monthly_categories = pd.DataFrame(month['categories'])
-
-        month_date = datetime.strptime(month_date, '%Y-%m-%d')
-        monthly_categories['year'] = month_date.year
-        monthly_categories['month'] = month_date.month
-
-        if not monthly_categories.empty:
-            dfs.append(monthly_categories)
-
-    df = pd.concat(dfs)
-
-    rows_loaded = load_df_to_s3_table(
+    rows_loaded = load_endpoint_to_s3(
         duckdb_con=duckdb_con,
-        df=df.reset_index(drop=True),
+        df=budget_tables['months'],
         s3_key='monthly-categories',
-        bucket_name=os.getenv('BUCKET_NAME'),
+        is_delta=is_delta,
+        key_columns=('id', 'year', 'month'),
+        partitioned=True,
     )
 
     logging.info(f'Loaded {rows_loaded} rows')
 
 
 def extract_transactions(
-    budget_data: Dict, duckdb_con: duckdb.DuckDBPyConnection
+    budget_tables: Dict[str, BudgetTable],
+    duckdb_con: duckdb.DuckDBPyConnection,
+    is_delta: bool = False,
 ) -> None:
-    transactions = pd.DataFrame(budget_data['transactions'])
-
-    rows_loaded = load_df_to_s3_table(
+    rows_loaded = load_endpoint_to_s3(
         duckdb_con=duckdb_con,
-        df=transactions.reset_index(drop=True),
+        df=budget_tables['transactions'],
         s3_key='transactions',
-        bucket_name=os.getenv('BUCKET_NAME'),
+        is_delta=is_delta,
+        partitioned=True,
     )
 
     logging.info(f'Loaded {rows_loaded} rows')
 
 
 def extract_subtransactions(
-    budget_data: Dict, duckdb_con: duckdb.DuckDBPyConnection
+    budget_tables: Dict[str, BudgetTable],
+    duckdb_con: duckdb.DuckDBPyConnection,
+    is_delta: bool = False,
 ) -> None:
-    subtransactions = pd.DataFrame(budget_data['subtransactions'])
-
-    rows_loaded = load_df_to_s3_table(
+    rows_loaded = load_endpoint_to_s3(
         duckdb_con=duckdb_con,
-        df=subtransactions,
+        df=budget_tables['subtransactions'],
         s3_key='subtransactions',
-        bucket_name=os.getenv('BUCKET_NAME'),
+        is_delta=is_delta,
     )
 
     logging.info(f'Loaded {rows_loaded} rows')
@@ -128,14 +219,16 @@ def load_paystubs_from_sheets(duckdb_con: duckdb.DuckDBPyConnection) -> None:
     logging.info(f'Loaded {rows_loaded} rows to S3 bucket for raw-paystubs')
 
 
-def extract_accounts(budget_data: Dict, duckdb_con: duckdb.DuckDBPyConnection) -> None:
-    accounts = pd.DataFrame(budget_data['accounts'])
-
-    rows_loaded = load_df_to_s3_table(
+def extract_accounts(
+    budget_tables: Dict[str, BudgetTable],
+    duckdb_con: duckdb.DuckDBPyConnection,
+    is_delta: bool = False,
+) -> None:
+    rows_loaded = load_endpoint_to_s3(
         duckdb_con=duckdb_con,
-        df=accounts,
+        df=budget_tables['accounts'],
         s3_key='accounts',
-        bucket_name=os.getenv('BUCKET_NAME'),
+        is_delta=is_delta,
     )
 
     logging.info(f'Loaded {rows_loaded} rows to S3 bucket for accounts')
@@ -150,15 +243,64 @@ etl_functions = {
 }
 
 
-def etl_ynab_data():
-    budget_data = extract_budget_data()
+def etl_ynab_data(full_refresh: bool = False, stream_budget: bool = False):
+    duckdb_con = DuckDBConnection(
+        need_write_access=True, database=IN_MEMORY
+    ).get_connection()
+    bucket_name = os.getenv('BUCKET_NAME')
 
-    duckdb_con = DuckDBConnection(need_write_access=True).get_connection()
-
-    load_paystubs_from_sheets(duckdb_con)
+    sync_state = (
+        {} if full_refresh else read_s3_state(duckdb_con, SYNC_STATE_KEY, bucket_name)
+    )
+    if sync_state.get('version') != SYNC_STATE_VERSION:
+        sync_state = {}
 
-    logging.info('Extracting data from endpoints')
-    for endpoint, function in etl_functions.items():
-        logging.info(f'Extracting {endpoint} data')
-        function(budget_data, duckdb_con)
-        logging.info(f'Extracted {endpoint} data')
+    last_knowledge_of_server = (
+        int(sync_state['server_knowledge'])
+        if 'server_knowledge' in sync_state
+        else None
+    )
+    is_delta = last_knowledge_of_server is not None
+
+    with tempfile.TemporaryDirectory() as stream_dir, TaskPool(ETL_MAX_WORKERS) as pool:
+        # The sheets don't depend on the budget, so fetch them all at once
+        pool.submit(
+            'paystubs', lambda: load_paystubs_from_sheets(worker_cursor(duckdb_con))
+        )
+        pool.submit(
+            'category-orders',
+            lambda: load_category_orders_from_sheets(
+                worker_cursor(duckdb_con), force=full_refresh
+            ),
+        )
+        if stream_budget:
+            pool.submit(
+                'budget', stream_budget_data, Path(stream_dir), last_knowledge_of_server
+            )
+        else:
+            pool.submit('budget', extract_budget_data, last_knowledge_of_server)
+
+        budget_tables, server_knowledge = pool.result('budget')
+
+        logging.info('Extracting data from endpoints')
+        for endpoint, function in etl_functions.items():
+            pool.submit(
+                endpoint,
+                lambda function=function: function(
+                    budget_tables, worker_cursor(duckdb_con), is_delta
+                ),
+            )
+
+        timings = pool.wait()
+
+    slowest = max(timings, key=timings.get)
+    logging.info(f'Slowest ETL task was {slowest} at {timings[slowest]:.2f}s')
+
+    # Only advance the cursor once every dataset has been written
+    write_s3_state(
+        duckdb_con,
+        {'server_knowledge': server_knowledge, 'version': SYNC_STATE_VERSION},
+        SYNC_STATE_KEY,
+        bucket_name,
+    )
+    logging.info(f'Saved server knowledge {server_knowledge}')
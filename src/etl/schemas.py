@@ -0,0 +1,104 @@
+"""Arrow schemas for the YNAB budget entities loaded to S3.
+
+Fields YNAB returns that aren't listed here are dropped, and listed fields
+missing from a payload are loaded as nulls, so the parquet files keep a stable
+schema from run to run.
+"""
+
+import pyarrow as pa
+
+CATEGORY_GROUP_SCHEMA = pa.schema(
+    [
+        ('id', pa.string()),
+        ('name', pa.string()),
+        ('hidden', pa.bool_()),
+        ('deleted', pa.bool_()),
+    ]
+)
+
+MONTHLY_CATEGORY_SCHEMA = pa.schema(
+    [
+        ('id', pa.string()),
+        ('category_group_id', pa.string()),
+        ('category_group_name', pa.string()),
+        ('name', pa.string()),
+        ('hidden', pa.bool_()),
+        ('original_category_group_id', pa.string()),
+        ('note', pa.string()),
+        ('budgeted', pa.int64()),
+        ('activity', pa.int64()),
+        ('balance', pa.int64()),
+        ('goal_type', pa.string()),
+        ('goal_needs_whole_amount', pa.bool_()),
+        ('goal_day', pa.int32()),
+        ('goal_cadence', pa.int32()),
+        ('goal_cadence_frequency', pa.int32()),
+        ('goal_creation_month', pa.string()),
+        ('goal_target', pa.int64()),
+        ('goal_target_month', pa.string()),
+        ('goal_percentage_complete', pa.int32()),
+        ('goal_months_to_budget', pa.int32()),
+        ('goal_under_funded', pa.int64()),
+        ('goal_overall_funded', pa.int64()),
+        ('goal_overall_left', pa.int64()),
+        ('deleted', pa.bool_()),
+    ]
+)
+
+TRANSACTION_SCHEMA = pa.schema(
+    [
+        ('id', pa.string()),
+        ('date', pa.string()),
+        ('amount', pa.int64()),
+        ('memo', pa.string()),
+        ('cleared', pa.string()),
+        ('approved', pa.bool_()),
+        ('flag_color', pa.string()),
+        ('flag_name', pa.string()),
+        ('account_id', pa.string()),
+        ('payee_id', pa.string()),
+        ('category_id', pa.string()),
+        ('transfer_account_id', pa.string()),
+        ('transfer_transaction_id', pa.string()),
+        ('matched_transaction_id', pa.string()),
+        ('import_id', pa.string()),
+        ('import_payee_name', pa.string()),
+        ('import_payee_name_original', pa.string()),
+        ('debt_transaction_type', pa.string()),
+        ('deleted', pa.bool_()),
+    ]
+)
+
+SUBTRANSACTION_SCHEMA = pa.schema(
+    [
+        ('id', pa.string()),
+        ('transaction_id', pa.string()),
+        ('amount', pa.int64()),
+        ('memo', pa.string()),
+        ('payee_id', pa.string()),
+        ('category_id', pa.string()),
+        ('transfer_account_id', pa.string()),
+        ('transfer_transaction_id', pa.string()),
+        ('deleted', pa.bool_()),
+    ]
+)
+
+ACCOUNT_SCHEMA = pa.schema(
+    [
+        ('id', pa.string()),
+        ('name', pa.string()),
+        ('type', pa.string()),
+        ('on_budget', pa.bool_()),
+        ('closed', pa.bool_()),
+        ('note', pa.string()),
+        ('balance', pa.int64()),
+        ('cleared_balance', pa.int64()),
+        ('uncleared_balance', pa.int64()),
+        ('transfer_payee_id', pa.string()),
+        ('direct_import_linked', pa.bool_()),
+        ('direct_import_in_error', pa.bool_()),
+        ('last_reconciled_at', pa.string()),
+        ('debt_original_balance', pa.int64()),
+        ('deleted', pa.bool_()),
+    ]
+)
@@ -0,0 +1,95 @@
+"""Incremental parsing of the full-budget response into local parquet files.
+
+The budget payload is read from the HTTP body as it arrives. Items of each
+list in BUDGET_TABLE_BUILDERS are converted to Arrow in batches and appended
+to a parquet file, so only one batch per list is held in memory at a time.
+"""
+
+import logging
+from pathlib import Path
+from typing import IO, Dict, List, Optional, Tuple
+
+import ijson
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.etl.tables import BUDGET_TABLE_BUILDERS
+
+BATCH_SIZE = 10_000
+
+BUDGET_PREFIX = 'data.budget'
+SERVER_KNOWLEDGE_PREFIX = 'data.server_knowledge'
+
+
+class _BatchWriter:
+    """Buffer budget items and append them to a parquet file in batches."""
+
+    def __init__(self, key: str, path: Path, batch_size: int):
+        self._key = key
+        self._path = path
+        self._batch_size = batch_size
+        self._builder = BUDGET_TABLE_BUILDERS[key]
+        self._items: List[Dict] = []
+        self._pending_rows = 0
+        self._writer: Optional[pq.ParquetWriter] = None
+        self.rows_written = 0
+
+    def add(self, item: Dict) -> None:
+        self._items.append(item)
+        # Each month expands into one row per category
+        self._pending_rows += len(item['categories']) if self._key == 'months' else 1
+        if self._pending_rows >= self._batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        table = self._builder(self._items)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._path, table.schema)
+        self._writer.write_table(table)
+        self.rows_written += table.num_rows
+        self._items = []
+        self._pending_rows = 0
+
+    def close(self) -> ds.Dataset:
+        # Always flush once so lists missing from the payload still get a file
+        if self._items or self._writer is None:
+            self.flush()
+        self._writer.close()
+        return ds.dataset(self._path, format='parquet')
+
+
+def stream_budget_to_parquet(
+    stream: IO[bytes],
+    output_dir: Path,
+    batch_size: int = BATCH_SIZE,
+) -> Tuple[Dict[str, ds.Dataset], int]:
+    """Parse a budget response body into one parquet-backed dataset per list."""
+    writers = {
+        key: _BatchWriter(key, output_dir / f'{key}.parquet', batch_size)
+        for key in BUDGET_TABLE_BUILDERS
+    }
+    item_prefixes = {f'{BUDGET_PREFIX}.{key}.item': key for key in writers}
+    server_knowledge = None
+
+    builder = None
+    builder_prefix = None
+
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == builder_prefix and event == 'end_map':
+                writers[item_prefixes[builder_prefix]].add(builder.value)
+                builder = None
+        elif event == 'start_map' and prefix in item_prefixes:
+            builder = ijson.ObjectBuilder()
+            builder_prefix = prefix
+            builder.event(event, value)
+        elif prefix == SERVER_KNOWLEDGE_PREFIX:
+            server_knowledge = int(value)
+
+    datasets = {key: writer.close() for key, writer in writers.items()}
+
+    for key, writer in writers.items():
+        logging.info(f'Streamed {writer.rows_written} rows for {key}')
+
+    return datasets, server_knowledge
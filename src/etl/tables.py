@@ -0,0 +1,65 @@
+"""Conversion of YNAB budget entities into Arrow tables."""
+
+from typing import Callable, Dict, List, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from src.etl.schemas import (
+    ACCOUNT_SCHEMA,
+    CATEGORY_GROUP_SCHEMA,
+    MONTHLY_CATEGORY_SCHEMA,
+    SUBTRANSACTION_SCHEMA,
+    TRANSACTION_SCHEMA,
+)
+
+# In-memory tables for a regular extract, parquet-backed datasets when streamed
+BudgetTable = Union[pa.Table, ds.Dataset]
+
+
+def build_monthly_categories_table(months: List[Dict]) -> pa.Table:
+    """Flatten every month's categories into one table with year and month columns."""
+    categories = [category for month in months for category in month['categories']]
+    table = pa.Table.from_pylist(categories, schema=MONTHLY_CATEGORY_SCHEMA)
+
+    # Parse each month once, then repeat it for that month's categories
+    month_dates = pc.cast(pa.array([month['month'] for month in months]), pa.date32())
+    category_counts = [len(month['categories']) for month in months]
+    row_dates = month_dates.take(
+        pa.array(np.repeat(np.arange(len(months)), category_counts))
+    )
+
+    return table.append_column('year', pc.year(row_dates)).append_column(
+        'month', pc.month(row_dates)
+    )
+
+
+def build_transactions_table(transactions: List[Dict]) -> pa.Table:
+    table = pa.Table.from_pylist(transactions, schema=TRANSACTION_SCHEMA)
+    transaction_dates = pc.cast(table['date'], pa.date32())
+
+    return table.append_column('year', pc.year(transaction_dates)).append_column(
+        'month', pc.month(transaction_dates)
+    )
+
+
+def _from_pylist(schema: pa.Schema) -> Callable[[List[Dict]], pa.Table]:
+    return lambda items: pa.Table.from_pylist(items, schema=schema)
+
+
+# Keyed by the list's name in the budget payload
+BUDGET_TABLE_BUILDERS: Dict[str, Callable[[List[Dict]], pa.Table]] = {
+    'category_groups': _from_pylist(CATEGORY_GROUP_SCHEMA),
+    'months': build_monthly_categories_table,
+    'transactions': build_transactions_table,
+    'subtransactions': _from_pylist(SUBTRANSACTION_SCHEMA),
+    'accounts': _from_pylist(ACCOUNT_SCHEMA),
+}
+
+
+def build_budget_tables(budget_data: Dict) -> Dict[str, pa.Table]:
+    return {
+        key: builder(budget_data[key]) for key, builder in BUDGET_TABLE_BUILDERS.items()
+    }
@@ -2,20 +2,381 @@
 Batch operations module for Google Sheets.
 
 Queues and executes Google Sheets operations in batches to reduce API calls.
+
+In incremental mode, existing worksheets are kept instead of being recreated.
+A hash of each sheet's formatting requests is stored in the sheet's developer
+metadata; when it matches, the formatting is skipped and only the cells whose
+values differ from what's on the sheet are written.
+
+Before sending, batch requests are compacted: repeatCell requests with the
+same format on adjoining ranges are merged, border requests that together
+outline one range are folded into a single updateBorders, and each sheet's
+adjoining notes are written with one updateCells.
+
+Each sheet's whole payload is also fingerprinted at flush. Given the
+fingerprints from the previous refresh, sheets whose payload hasn't changed
+are skipped. The sheet metadata is still read once, to check that the skipped
+sheets exist, so an unchanged refresh costs a single read and no writes.
 """
 
+import hashlib
+import json
 import logging
+import math
 import random
+import re
 import time
-from typing import Any, Callable, Dict, List, Union
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
 from gspread import Spreadsheet, Worksheet
 from gspread.exceptions import APIError
-from gspread.utils import a1_range_to_grid_range, column_letter_to_index
+from gspread.utils import (
+    a1_range_to_grid_range,
+    a1_to_rowcol,
+    absolute_range_name,
+    column_letter_to_index,
+    rowcol_to_a1,
+)
+
+from src.sheets.rate_limiter import TokenBucket
+from src.utils.metrics import span
+from src.utils.task_pool import TaskPool
+
+FORMAT_HASH_METADATA_KEY = 'ynab_report_format_hash'
+
+# Day zero of the serial numbers Sheets stores dates as
+SHEETS_EPOCH = date(1899, 12, 30)
+PLAIN_NUMBER = re.compile(r'-?\d+(\.\d+)?')
+ISO_DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+Cell = Tuple[int, int]
+
+
+def _request_sheet_id(request: Dict[str, Any]) -> Optional[int]:
+    """Return the sheetId a batch request applies to."""
+    body = next(iter(request.values()))
+    for key in ('range', 'dimensions'):
+        if key in body:
+            return body[key].get('sheetId')
+    return None
+
+
+BORDER_SIDES = ('top', 'bottom', 'left', 'right')
+
+Bounds = Tuple[float, float, float, float]
+
+
+def _bounds(grid_range: Dict[str, Any]) -> Bounds:
+    """(start row, end row, start col, end col), with open ends as infinity."""
+    return (
+        grid_range.get('startRowIndex', 0),
+        grid_range.get('endRowIndex', math.inf),
+        grid_range.get('startColumnIndex', 0),
+        grid_range.get('endColumnIndex', math.inf),
+    )
+
+
+def _grid_range(sheet_id: Optional[int], bounds: Bounds) -> Dict[str, Any]:
+    keys = ('startRowIndex', 'endRowIndex', 'startColumnIndex', 'endColumnIndex')
+    grid_range = {key: value for key, value in zip(keys, bounds) if value != math.inf}
+    grid_range['sheetId'] = sheet_id
+    return grid_range
+
+
+def _intersects(first: Bounds, second: Bounds, margin: int = 0) -> bool:
+    return (
+        first[0] < second[1] + margin
+        and second[0] < first[1] + margin
+        and first[2] < second[3] + margin
+        and second[2] < first[3] + margin
+    )
+
+
+def _request_bounds(request: Dict[str, Any]) -> Optional[Bounds]:
+    body = next(iter(request.values()))
+    if 'range' in body:
+        return _bounds(body['range'])
+    if 'dimensions' in body or 'location' in body:
+        # Whole rows or columns, or sheet metadata; treat as touching everything
+        return (0, math.inf, 0, math.inf)
+    return None
+
+
+def _merge_repeat_cells(
+    earlier: Dict[str, Any], later: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Merge two repeatCell requests if they apply one format to one rectangle."""
+    first, second = earlier['repeatCell'], later['repeatCell']
+    if first['cell'] != second['cell'] or first['fields'] != second['fields']:
+        return None
+
+    a, b = _bounds(first['range']), _bounds(second['range'])
+    same_cols = a[2:] == b[2:] and a[0] <= b[1] and b[0] <= a[1]
+    same_rows = a[:2] == b[:2] and a[2] <= b[3] and b[2] <= a[3]
+    if not (same_cols or same_rows):
+        return None
+
+    merged = (min(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3]))
+    return {
+        'repeatCell': {
+            **first,
+            'range': _grid_range(first['range'].get('sheetId'), merged),
+        }
+    }
+
+
+def _merge_borders(
+    earlier: Dict[str, Any], later: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Fold two updateBorders requests into one with the same result, if possible.
+
+    Requests on the same range are combined side by side. Ranges that meet
+    edge to edge are joined when the sides running along the join match and
+    neither draws a border on the join itself.
+    """
+    first, second = earlier['updateBorders'], later['updateBorders']
+    a, b = _bounds(first['range']), _bounds(second['range'])
+    sheet_id = first['range'].get('sheetId')
+
+    if a == b:
+        merged = {side: first[side] for side in BORDER_SIDES if side in first}
+        merged.update({side: second[side] for side in BORDER_SIDES if side in second})
+        return {'updateBorders': {'range': first['range'], **merged}}
+
+    def side(body: Dict[str, Any], name: str) -> Optional[Dict[str, Any]]:
+        return body.get(name)
+
+    if a[2:] == b[2:] and (a[1] == b[0] or b[1] == a[0]):
+        upper, lower = (first, second) if a[1] == b[0] else (second, first)
+        along, outer, join = ('left', 'right'), ('top', 'bottom'), ('bottom', 'top')
+    elif a[:2] == b[:2] and (a[3] == b[2] or b[3] == a[2]):
+        upper, lower = (first, second) if a[3] == b[2] else (second, first)
+        along, outer, join = ('top', 'bottom'), ('left', 'right'), ('right', 'left')
+    else:
+        return None
+
+    if any(side(first, name) != side(second, name) for name in along):
+        return None
+    if side(upper, join[0]) is not None or side(lower, join[1]) is not None:
+        return None
+
+    merged = {name: first[name] for name in along if name in first}
+    if outer[0] in upper:
+        merged[outer[0]] = upper[outer[0]]
+    if outer[1] in lower:
+        merged[outer[1]] = lower[outer[1]]
+
+    merged_bounds = (min(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3]))
+    return {'updateBorders': {'range': _grid_range(sheet_id, merged_bounds), **merged}}
+
+
+def _is_single_note(request: Dict[str, Any]) -> bool:
+    body = request.get('updateCells')
+    if body is None or body.get('fields') != 'note' or 'range' not in body:
+        return False
+    start_row, end_row, start_col, end_col = _bounds(body['range'])
+    return end_row - start_row == 1 and end_col - start_col == 1
+
+
+def _note_blocks(cell_notes: Dict[Tuple[float, float], str]) -> List[Bounds]:
+    """Cover the noted cells with rectangles holding no cell without a note.
 
-from src.utils.logging_config import setup_logging
+    With fields='note', a cell in the range without a note would have its
+    existing note cleared, so gaps between notes split them into separate
+    blocks. Runs of noted cells in consecutive rows with the same columns
+    share a block.
+    """
+    blocks: List[Bounds] = []
+    # Blocks ending on the previous row, by their columns
+    open_blocks: Dict[Tuple[float, float], int] = {}
+    for row in sorted({row for row, _ in cell_notes}):
+        cols = sorted(col for noted_row, col in cell_notes if noted_row == row)
+        runs: List[Tuple[float, float]] = []
+        for col in cols:
+            if runs and runs[-1][1] == col:
+                runs[-1] = (runs[-1][0], col + 1)
+            else:
+                runs.append((col, col + 1))
 
-setup_logging()
+        next_open: Dict[Tuple[float, float], int] = {}
+        for run in runs:
+            index = open_blocks.get(run)
+            if index is not None and blocks[index][1] == row:
+                blocks[index] = (blocks[index][0], row + 1, *run)
+            else:
+                index = len(blocks)
+                blocks.append((row, row + 1, *run))
+            next_open[run] = index
+        open_blocks = next_open
+
+    return blocks
+
+
+def compact_requests(requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge batch requests that can be sent as one without changing the result.
+
+    A request is only merged into an earlier one when none of the requests in
+    between touch the cells it covers (or, for borders, the cells next to
+    them), so applying it earlier can't change their outcome.
+    """
+    compacted: List[Dict[str, Any]] = []
+    notes: Dict[Optional[int], Dict[Tuple[float, float], str]] = {}
+    note_positions: Dict[Optional[int], int] = {}
+
+    for request in requests:
+        if _is_single_note(request):
+            grid_range = request['updateCells']['range']
+            sheet_id = grid_range.get('sheetId')
+            start_row, _, start_col, _ = _bounds(grid_range)
+            note = request['updateCells']['rows'][0]['values'][0].get('note', '')
+            if sheet_id not in notes:
+                notes[sheet_id] = {}
+                note_positions[sheet_id] = len(compacted)
+                compacted.append(request)
+            notes[sheet_id][(start_row, start_col)] = note
+            continue
+
+        kind = next(iter(request))
+        merge = {
+            'repeatCell': _merge_repeat_cells,
+            'updateBorders': _merge_borders,
+        }.get(kind)
+        bounds = _request_bounds(request)
+        if merge is None or bounds is None:
+            compacted.append(request)
+            continue
+
+        sheet_id = _request_sheet_id(request)
+        margin = 1 if kind == 'updateBorders' else 0
+        for i in range(len(compacted) - 1, -1, -1):
+            earlier = compacted[i]
+            if kind in earlier and _request_sheet_id(earlier) == sheet_id:
+                merged = merge(earlier, request)
+                if merged is not None:
+                    compacted[i] = merged
+                    break
+            earlier_bounds = _request_bounds(earlier)
+            if _request_sheet_id(earlier) in (sheet_id, None) and (
+                earlier_bounds is None or _intersects(bounds, earlier_bounds, margin)
+            ):
+                compacted.append(request)
+                break
+        else:
+            compacted.append(request)
+
+    # Each sheet's notes replace its first note request, in one or more blocks
+    note_requests: Dict[int, List[Dict[str, Any]]] = {}
+    for sheet_id, cell_notes in notes.items():
+        if len(cell_notes) == 1:
+            continue
+        note_requests[note_positions[sheet_id]] = [
+            {
+                'updateCells': {
+                    'range': _grid_range(sheet_id, bounds),
+                    'rows': [
+                        {
+                            'values': [
+                                {'note': cell_notes[(row, col)]}
+                                for col in range(bounds[2], bounds[3])
+                            ]
+                        }
+                        for row in range(bounds[0], bounds[1])
+                    ],
+                    'fields': 'note',
+                }
+            }
+            for bounds in _note_blocks(cell_notes)
+        ]
+
+    return [
+        merged
+        for position, request in enumerate(compacted)
+        for merged in note_requests.get(position, [request])
+    ]
+
+
+def _has_auto_resize(chain: List[List[Dict[str, Any]]]) -> bool:
+    return any(
+        'autoResizeDimensions' in request for chunk in chain for request in chunk
+    )
+
+
+def _retry_after(error: APIError) -> Optional[float]:
+    """Seconds to wait from a response's Retry-After header, if it has one."""
+    value = error.response.headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _split_range(range_name: str) -> Tuple[str, str]:
+    """Split 'Title!B2' (optionally quoted) into its title and cell range."""
+    if '!' not in range_name:
+        return '', range_name
+    title, cells = range_name.rsplit('!', 1)
+    if title.startswith("'") and title.endswith("'"):
+        title = title[1:-1].replace("''", "'")
+    return title, cells
+
+
+def _entered_value(value: Any) -> Any:
+    """The value Sheets stores for `value` written with USER_ENTERED.
+
+    Text that reads as a number is stored as that number, and an ISO date as
+    its serial number. Current values are read back unformatted, with dates
+    as serial numbers, so both sides are compared in the same form.
+    """
+    if not isinstance(value, str):
+        return value
+    if PLAIN_NUMBER.fullmatch(value):
+        return float(value)
+    if ISO_DATE.fullmatch(value):
+        return (date.fromisoformat(value) - SHEETS_EPOCH).days
+    return value
+
+
+def _cells_equal(desired: Any, current: Any) -> bool:
+    """Compare a value to write with the value read back from the sheet."""
+    if isinstance(desired, str) and desired == current:
+        # Text kept as text, e.g. in a cell formatted as plain text
+        return True
+    desired = _entered_value(desired)
+    if desired is None or desired == '':
+        return current is None or current == ''
+    if isinstance(desired, bool) or isinstance(current, bool):
+        return desired == current
+    if isinstance(desired, (int, float)) and isinstance(current, (int, float)):
+        return math.isclose(desired, current, rel_tol=1e-9, abs_tol=1e-9)
+    return str(desired) == str(current)
+
+
+def _changed_blocks(
+    desired: Dict[Cell, Any], current: Dict[Cell, Any]
+) -> List[Tuple[int, int, int, int]]:
+    """Group differing cells into (first row, last row, first col, last col) blocks.
+
+    Each row's changes are covered by one span, and consecutive rows with the
+    same span share a block. Unchanged cells inside a span are rewritten as-is.
+    """
+    spans: Dict[int, Tuple[int, int]] = {}
+    for cell in desired.keys() | current.keys():
+        if not _cells_equal(desired.get(cell), current.get(cell)):
+            row, col = cell
+            first, last = spans.get(row, (col, col))
+            spans[row] = (min(first, col), max(last, col))
+
+    blocks: List[Tuple[int, int, int, int]] = []
+    for row in sorted(spans):
+        first_col, last_col = spans[row]
+        if blocks and blocks[-1][1] == row - 1 and blocks[-1][2:] == spans[row]:
+            blocks[-1] = (blocks[-1][0], row, first_col, last_col)
+        else:
+            blocks.append((row, row, first_col, last_col))
+    return blocks
 
 
 class SheetBatcher:
@@ -29,14 +390,33 @@ class SheetBatcher:
         spreadsheet: Spreadsheet,
         max_retries: int = 5,
         base_delay: float = 2.0,
+        incremental: bool = False,
+        fingerprints: Optional[Dict[str, str]] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_workers: int = 4,
+        before_write: Optional[Callable[[], None]] = None,
     ):
-        """Initialize batcher with a spreadsheet and retry configuration."""
+        """Initialize batcher with a spreadsheet and retry configuration.
+
+        `before_write` is called at flush right before the first write, and
+        not at all when there's nothing to write.
+        """
         self._spreadsheet = spreadsheet
         self._max_retries = max_retries
         self._base_delay = base_delay
+        self._incremental = incremental
+        self._rate_limiter = rate_limiter or TokenBucket()
+        self._max_workers = max_workers
+        self._before_write = before_write
         self._value_updates: List[Dict[str, Any]] = []
         self._batch_requests: List[Dict[str, Any]] = []
         self._worksheet_cache: Dict[str, int] = {}
+        self._sheet_metadata: Optional[Dict[str, Dict[str, Any]]] = None
+        self._structural_requests: List[Dict[str, Any]] = []
+        self._reused_sheets: Dict[int, Dict[str, Any]] = {}
+        self._new_sheets: Dict[int, Tuple[int, int]] = {}
+        self._previous_fingerprints = fingerprints or {}
+        self._fingerprints: Dict[str, str] = {}
 
     def __enter__(self) -> 'SheetBatcher':
         return self
@@ -49,6 +429,15 @@ class SheetBatcher:
     def spreadsheet(self) -> Spreadsheet:
         return self._spreadsheet
 
+    @property
+    def incremental(self) -> bool:
+        return self._incremental
+
+    @property
+    def fingerprints(self) -> Dict[str, str]:
+        """Payload fingerprint of each sheet in the last flush, keyed by title."""
+        return dict(self._fingerprints)
+
     def get_worksheet_id(self, worksheet: Union[Worksheet, str, int]) -> int:
         """Get the worksheet ID (sheetId) for a worksheet."""
         if isinstance(worksheet, int):
@@ -56,20 +445,140 @@ class SheetBatcher:
         if isinstance(worksheet, Worksheet):
             return worksheet.id
         if worksheet not in self._worksheet_cache:
-            self._worksheet_cache[worksheet] = self._spreadsheet.worksheet(worksheet).id
+            sheet = (
+                self._load_sheet_metadata().get(worksheet)
+                if isinstance(worksheet, str)
+                else None
+            )
+            self._worksheet_cache[worksheet] = (
+                sheet['properties']['sheetId']
+                if sheet is not None
+                else self._spreadsheet.worksheet(worksheet).id
+            )
         return self._worksheet_cache[worksheet]
 
-    def register_worksheet(self, worksheet: Worksheet) -> None:
-        """Register a worksheet in the cache to avoid extra API lookups."""
+    def register_worksheet(
+        self,
+        worksheet: Worksheet,
+        rows: Optional[int] = None,
+        cols: Optional[int] = None,
+    ) -> None:
+        """Register a worksheet in the cache to avoid extra API lookups.
+
+        Pass the size of a newly created worksheet so its format hash is saved
+        at flush, letting a later incremental refresh keep the sheet.
+        """
         self._worksheet_cache[worksheet.title] = worksheet.id
+        if rows is not None and cols is not None:
+            self._new_sheets[worksheet.id] = (rows, cols)
+
+    def _load_sheet_metadata(self) -> Dict[str, Dict[str, Any]]:
+        """Existing sheets by title, fetched once for the whole refresh."""
+        if self._sheet_metadata is None:
+            self._sheet_metadata = {
+                sheet['properties']['title']: sheet
+                for sheet in self._spreadsheet.fetch_sheet_metadata()['sheets']
+            }
+        return self._sheet_metadata
+
+    def _new_sheet_id(self) -> int:
+        used_ids = {
+            sheet['properties']['sheetId']
+            for sheet in self._load_sheet_metadata().values()
+        } | set(self._worksheet_cache.values())
+        return max(used_ids, default=0) + 1
+
+    def queue_worksheet(self, title: str, rows: int, cols: int) -> Worksheet:
+        """Queue creating worksheet `title`, replacing any existing one.
+
+        In incremental mode an existing worksheet is kept instead. The sheetId
+        is assigned here, so the returned worksheet can be used for queueing
+        right away; the sheet itself is created at the start of the flush.
+        """
+        worksheet = self.reuse_worksheet(title, rows, cols)
+        if worksheet is not None:
+            return worksheet
+
+        existing = self._load_sheet_metadata().get(title)
+        properties: Dict[str, Any] = {
+            'title': title,
+            'gridProperties': {'rowCount': rows, 'columnCount': cols},
+        }
+        if existing is not None:
+            # Keep the replaced sheet's id and position
+            properties['sheetId'] = existing['properties']['sheetId']
+            properties['index'] = existing['properties'].get('index', 0)
+            self._structural_requests.append(
+                {'deleteSheet': {'sheetId': properties['sheetId']}}
+            )
+        else:
+            properties['sheetId'] = self._new_sheet_id()
+        self._structural_requests.append({'addSheet': {'properties': properties}})
+
+        worksheet = Worksheet(
+            self._spreadsheet,
+            properties,
+            self._spreadsheet.id,
+            self._spreadsheet.client,
+        )
+        self.register_worksheet(worksheet, rows, cols)
+        return worksheet
+
+    def reuse_worksheet(self, title: str, rows: int, cols: int) -> Optional[Worksheet]:
+        """Return the existing worksheet named `title` to update in place.
+
+        Returns None outside incremental mode or when there's no such sheet.
+        The sheet is recreated at flush if its size or formatting would change.
+        """
+        if not self._incremental:
+            return None
+
+        sheet = self._load_sheet_metadata().get(title)
+        if sheet is None:
+            return None
+
+        properties = sheet['properties']
+        grid = properties.get('gridProperties', {})
+        stored_hash = next(
+            (
+                metadata.get('metadataValue')
+                for metadata in sheet.get('developerMetadata', [])
+                if metadata.get('metadataKey') == FORMAT_HASH_METADATA_KEY
+            ),
+            None,
+        )
+        self._reused_sheets[properties['sheetId']] = {
+            'title': title,
+            'index': properties.get('index', 0),
+            'rows': rows,
+            'cols': cols,
+            'current_size': (grid.get('rowCount'), grid.get('columnCount')),
+            'stored_hash': stored_hash,
+        }
+
+        worksheet = Worksheet(
+            self._spreadsheet,
+            properties,
+            self._spreadsheet.id,
+            self._spreadsheet.client,
+        )
+        self.register_worksheet(worksheet)
+        return worksheet
 
     def queue_values(
         self,
         range_name: str,
         values: Union[List[List[Any]], Callable[[], List[List[Any]]]],
+        volatile: bool = False,
     ) -> None:
-        """Queue a value update."""
-        self._value_updates.append({'range': range_name, 'values': values})
+        """Queue a value update.
+
+        Volatile values, like a timestamp, are left out of the sheet's
+        fingerprint and aren't written if the rest of the sheet is unchanged.
+        """
+        self._value_updates.append(
+            {'range': range_name, 'values': values, 'volatile': volatile}
+        )
 
     def queue_format(
         self,
@@ -182,65 +691,376 @@ class SheetBatcher:
     def flush(self) -> None:
         """Execute all queued operations."""
         logging.info(
-            f'Flushing batch: {len(self._value_updates)} value updates, '
+            f'Flushing batch: {len(self._structural_requests)} sheet requests, '
+            f'{len(self._value_updates)} value updates, '
             f'{len(self._batch_requests)} batch requests'
         )
 
-        if self._value_updates:
-            self._flush_value_updates()
-        if self._batch_requests:
-            self._flush_batch_requests()
+        request_count = len(self._batch_requests)
+        self._batch_requests = compact_requests(self._batch_requests)
+        if len(self._batch_requests) < request_count:
+            logging.info(
+                f'Compacted {request_count} batch requests '
+                f'into {len(self._batch_requests)}'
+            )
+
+        data = self._skip_unchanged_sheets(self._resolve_value_updates())
+
+        if self._reused_sheets:
+            data = self._diff_reused_sheets(data)
+        if self._new_sheets:
+            self._queue_format_hashes()
+
+        has_writes = self._structural_requests or data or self._batch_requests
+        if has_writes and self._before_write is not None:
+            self._before_write()
+        if self._structural_requests:
+            self._flush_structural_requests()
+        if data or self._batch_requests:
+            self._flush_concurrently(data)
 
-    def _flush_value_updates(self) -> None:
-        """Send queued value updates to the Sheets API in batches."""
+    def _resolve_value_updates(self) -> List[Dict[str, Any]]:
+        """Evaluate callable values and clear the value queue."""
         data = []
         for update in self._value_updates:
             values = update['values']
             if callable(values):
                 values = values()
-            data.append({'range': update['range'], 'values': values})
-
-        for i in range(0, len(data), self.MAX_VALUE_RANGES_PER_BATCH):
-            chunk = data[i : i + self.MAX_VALUE_RANGES_PER_BATCH]
-            self._execute_with_retry(
-                lambda b={'valueInputOption': 'USER_ENTERED', 'data': chunk}: (
-                    self._spreadsheet.values_batch_update(b)
-                ),
-                f'values_batch_update ({len(chunk)} ranges)',
+            data.append(
+                {
+                    'range': update['range'],
+                    'values': values,
+                    'volatile': update['volatile'],
+                }
             )
         self._value_updates.clear()
+        return data
+
+    def _skip_unchanged_sheets(
+        self, data: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Fingerprint each sheet's payload and drop sheets matching last time.
+
+        Only sheets known to still exist are skipped. Returns the value updates
+        to send, without their volatile flags.
+        """
+        titles_by_id = {
+            sheet_id: title for title, sheet_id in self._worksheet_cache.items()
+        }
+        payloads: Dict[str, Dict[str, list]] = {}
+        for update in data:
+            if not update['volatile']:
+                title, _ = _split_range(update['range'])
+                payload = payloads.setdefault(title, {'values': [], 'requests': []})
+                payload['values'].append([update['range'], update['values']])
+        for request in self._batch_requests:
+            title = titles_by_id.get(_request_sheet_id(request))
+            if title is not None:
+                payload = payloads.setdefault(title, {'values': [], 'requests': []})
+                payload['requests'].append(request)
+
+        self._fingerprints = {
+            title: hashlib.sha256(
+                json.dumps(payload, sort_keys=True, default=str).encode()
+            ).hexdigest()
+            for title, payload in payloads.items()
+        }
+
+        skipped = {
+            sheet['title']
+            for sheet in self._reused_sheets.values()
+            if self._fingerprints.get(sheet['title'])
+            == self._previous_fingerprints.get(sheet['title'])
+        }
+        for title in sorted(skipped):
+            logging.info(f'{title} is unchanged since the last refresh, skipping')
+
+        skipped_ids = {self._worksheet_cache[title] for title in skipped}
+        self._reused_sheets = {
+            sheet_id: sheet
+            for sheet_id, sheet in self._reused_sheets.items()
+            if sheet_id not in skipped_ids
+        }
+        self._batch_requests = [
+            request
+            for request in self._batch_requests
+            if _request_sheet_id(request) not in skipped_ids
+        ]
+        return [
+            {'range': update['range'], 'values': update['values']}
+            for update in data
+            if _split_range(update['range'])[0] not in skipped
+        ]
+
+    def _format_hash(self, sheet_id: int, rows: int, cols: int) -> str:
+        requests = [
+            request
+            for request in self._batch_requests
+            if _request_sheet_id(request) == sheet_id
+            and 'autoResizeDimensions' not in request
+        ]
+        payload = json.dumps(
+            {'rows': rows, 'cols': cols, 'requests': requests}, sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _format_hash_request(self, sheet_id: int, format_hash: str) -> Dict[str, Any]:
+        return {
+            'createDeveloperMetadata': {
+                'developerMetadata': {
+                    'metadataKey': FORMAT_HASH_METADATA_KEY,
+                    'metadataValue': format_hash,
+                    'location': {'sheetId': sheet_id},
+                    'visibility': 'DOCUMENT',
+                }
+            }
+        }
+
+    def _queue_format_hashes(self) -> None:
+        """Save the format hash of each newly created sheet."""
+        hash_requests = [
+            self._format_hash_request(sheet_id, self._format_hash(sheet_id, *size))
+            for sheet_id, size in self._new_sheets.items()
+        ]
+        self._batch_requests.extend(hash_requests)
+        self._new_sheets.clear()
+
+    def _diff_reused_sheets(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Recreate reused sheets whose layout changed and diff the rest.
+
+        Returns the value updates still to send: everything for recreated and
+        new sheets, and only the differing cells for sheets kept as they are.
+        """
+        kept: Dict[str, int] = {}
+
+        for sheet_id, sheet in self._reused_sheets.items():
+            format_hash = self._format_hash(sheet_id, sheet['rows'], sheet['cols'])
+            if format_hash == sheet['stored_hash'] and sheet['current_size'] == (
+                sheet['rows'],
+                sheet['cols'],
+            ):
+                kept[sheet['title']] = sheet_id
+                continue
+
+            logging.info(f'Layout of {sheet["title"]} changed, recreating it')
+            self._structural_requests += [
+                {'deleteSheet': {'sheetId': sheet_id}},
+                {
+                    'addSheet': {
+                        'properties': {
+                            'sheetId': sheet_id,
+                            'title': sheet['title'],
+                            'index': sheet['index'],
+                            'gridProperties': {
+                                'rowCount': sheet['rows'],
+                                'columnCount': sheet['cols'],
+                            },
+                        }
+                    }
+                },
+                self._format_hash_request(sheet_id, format_hash),
+            ]
+        self._reused_sheets.clear()
+
+        if not kept:
+            return data
+
+        kept_ids = set(kept.values())
+        remaining = []
+        desired: Dict[str, Dict[Cell, Any]] = {title: {} for title in kept}
+        for update in data:
+            title, cells = _split_range(update['range'])
+            if title not in kept:
+                remaining.append(update)
+                continue
+            start_row, start_col = a1_to_rowcol(cells.split(':')[0])
+            for row_offset, row in enumerate(update['values']):
+                for col_offset, value in enumerate(row):
+                    cell = (start_row + row_offset, start_col + col_offset)
+                    desired[title][cell] = value
+
+        current = self._read_current_values(list(kept))
+
+        changed_ids: Set[int] = set()
+        for title, sheet_id in kept.items():
+            blocks = _changed_blocks(desired[title], current[title])
+            if blocks:
+                changed_ids.add(sheet_id)
+            for first_row, last_row, first_col, last_col in blocks:
+                values = [
+                    [
+                        desired[title].get((row, col), '')
+                        for col in range(first_col, last_col + 1)
+                    ]
+                    for row in range(first_row, last_row + 1)
+                ]
+                cells = (
+                    f'{rowcol_to_a1(first_row, first_col)}:'
+                    f'{rowcol_to_a1(last_row, last_col)}'
+                )
+                remaining.append(
+                    {'range': absolute_range_name(title, cells), 'values': values}
+                )
+
+        # Formatting on kept sheets is already in place. Auto-resize depends on
+        # the values, so it's only kept for sheets where values changed.
+        self._batch_requests = [
+            request
+            for request in self._batch_requests
+            if _request_sheet_id(request) not in kept_ids
+            or (
+                'autoResizeDimensions' in request
+                and _request_sheet_id(request) in changed_ids
+            )
+        ]
+
+        logging.info(
+            f'Kept {len(kept)} worksheets, {len(changed_ids)} with changed values'
+        )
+        return remaining
+
+    def _read_current_values(self, titles: List[str]) -> Dict[str, Dict[Cell, Any]]:
+        """Read every cell of the given sheets in one values_batch_get."""
+        response = self._execute_with_retry(
+            lambda: self._spreadsheet.values_batch_get(
+                [absolute_range_name(title) for title in titles],
+                params={
+                    'valueRenderOption': 'FORMULA',
+                    'dateTimeRenderOption': 'SERIAL_NUMBER',
+                },
+            ),
+            f'values_batch_get ({len(titles)} ranges)',
+        )
+
+        current: Dict[str, Dict[Cell, Any]] = {}
+        for title, value_range in zip(titles, response.get('valueRanges', [])):
+            # Whole-sheet ranges always start at A1
+            current[title] = {
+                (row, col): value
+                for row, row_values in enumerate(value_range.get('values', []), 1)
+                for col, value in enumerate(row_values, 1)
+                if value != ''
+            }
+        return current
+
+    def _flush_structural_requests(self) -> None:
+        """Add, delete and recreate sheets in one call, before anything else."""
+        requests = self._structural_requests
+        self._structural_requests = []
+        self._execute_with_retry(
+            lambda: self._spreadsheet.batch_update({'requests': requests}),
+            f'batch_update ({len(requests)} sheet requests)',
+        )
+        self._sheet_metadata = None
+
+    def _send_values(self, chunk: List[Dict[str, Any]]) -> None:
+        self._execute_with_retry(
+            lambda: self._spreadsheet.values_batch_update(
+                {'valueInputOption': 'USER_ENTERED', 'data': chunk}
+            ),
+            f'values_batch_update ({len(chunk)} ranges)',
+        )
 
-    def _flush_batch_requests(self) -> None:
-        """Send queued batch requests (formats, borders, etc.) to the Sheets API."""
-        for i in range(0, len(self._batch_requests), self.MAX_REQUESTS_PER_BATCH):
-            chunk = self._batch_requests[i : i + self.MAX_REQUESTS_PER_BATCH]
+    def _send_requests(self, chain: List[List[Dict[str, Any]]]) -> None:
+        for chunk in chain:
             self._execute_with_retry(
-                lambda b={'requests': chunk}: self._spreadsheet.batch_update(b),
+                lambda chunk=chunk: self._spreadsheet.batch_update({'requests': chunk}),
                 f'batch_update ({len(chunk)} requests)',
             )
-        self._batch_requests.clear()
+
+    def _request_chains(self) -> List[List[List[Dict[str, Any]]]]:
+        """Split queued batch requests into chains that can run concurrently.
+
+        Requests for one sheet stay in order within a single chain, since later
+        formats can override earlier ones. Sheets small enough to share a chunk
+        are packed together to keep the number of calls down.
+        """
+        by_sheet: Dict[Optional[int], List[Dict[str, Any]]] = {}
+        for request in self._batch_requests:
+            by_sheet.setdefault(_request_sheet_id(request), []).append(request)
+        self._batch_requests = []
+
+        chains: List[List[List[Dict[str, Any]]]] = []
+        packed: List[Dict[str, Any]] = []
+        for requests in by_sheet.values():
+            if len(requests) > self.MAX_REQUESTS_PER_BATCH:
+                chains.append(
+                    [
+                        requests[i : i + self.MAX_REQUESTS_PER_BATCH]
+                        for i in range(0, len(requests), self.MAX_REQUESTS_PER_BATCH)
+                    ]
+                )
+                continue
+            if len(packed) + len(requests) > self.MAX_REQUESTS_PER_BATCH:
+                chains.append([packed])
+                packed = []
+            packed = packed + requests
+        if packed:
+            chains.append([packed])
+        return chains
+
+    def _flush_concurrently(self, data: List[Dict[str, Any]]) -> None:
+        """Send value chunks and request chains in parallel.
+
+        Chains with an auto-resize wait until every value chunk is written, so
+        columns are sized to the new values.
+        """
+        value_chunks = [
+            data[i : i + self.MAX_VALUE_RANGES_PER_BATCH]
+            for i in range(0, len(data), self.MAX_VALUE_RANGES_PER_BATCH)
+        ]
+        chains = self._request_chains()
+        resize_chains = [chain for chain in chains if _has_auto_resize(chain)]
+        other_chains = [chain for chain in chains if not _has_auto_resize(chain)]
+
+        with TaskPool(self._max_workers) as pool:
+            for i, chunk in enumerate(value_chunks):
+                pool.submit(f'values chunk {i}', self._send_values, chunk)
+            for i, chain in enumerate(other_chains):
+                pool.submit(f'requests chain {i}', self._send_requests, chain)
+
+            for i in range(len(value_chunks)):
+                pool.result(f'values chunk {i}')
+            for i, chain in enumerate(resize_chains):
+                pool.submit(f'resize chain {i}', self._send_requests, chain)
+
+            pool.wait()
 
     def _execute_with_retry(self, operation: Callable, description: str) -> Any:
-        """Execute operation with exponential backoff retry on transient errors."""
-        for attempt in range(self._max_retries):
-            try:
-                return operation()
-            except APIError as e:
-                status = e.response.status_code
-                if (
-                    status in (429, 500, 502, 503, 504)
-                    and attempt < self._max_retries - 1
-                ):
-                    delay = self._base_delay * (2**attempt) + random.uniform(0, 1)
-                    logging.warning(
-                        f'API error {status} on {description} '
-                        f'(attempt {attempt + 1}/{self._max_retries}). '
-                        f'Retrying in {delay:.1f}s...'
-                    )
-                    time.sleep(delay)
-                else:
-                    logging.error(f'API error on {description}: {e}')
-                    raise
+        """Execute operation with exponential backoff retry on transient errors.
+
+        Every attempt takes a token from the rate limiter. A 429 pauses the
+        limiter for the Retry-After time, so other callers back off too.
+        """
+        with span('sheets.api', request=description) as counts:
+            for attempt in range(self._max_retries):
+                self._rate_limiter.acquire()
+                counts['api_calls'] = attempt + 1
+                counts['retries'] = attempt
+                try:
+                    return operation()
+                except APIError as e:
+                    status = e.response.status_code
+                    if (
+                        status in (429, 500, 502, 503, 504)
+                        and attempt < self._max_retries - 1
+                    ):
+                        delay = _retry_after(e) if status == 429 else None
+                        if delay is None:
+                            jitter = random.uniform(0, 1)
+                            delay = self._base_delay * (2**attempt) + jitter
+                        logging.warning(
+                            f'API error {status} on {description} '
+                            f'(attempt {attempt + 1}/{self._max_retries}). '
+                            f'Retrying in {delay:.1f}s...'
+                        )
+                        if status == 429:
+                            self._rate_limiter.pause(delay)
+                        else:
+                            time.sleep(delay)
+                    else:
+                        logging.error(f'API error on {description}: {e}')
+                        raise
 
     def _convert_format_dict(self, format_dict: Dict[str, Any]) -> Dict[str, Any]:
         """Convert gspread-style format dict to Sheets API format."""
@@ -0,0 +1,38 @@
+"""Sheet payload fingerprints from the last refresh, stored next to the datasets."""
+
+import logging
+import os
+from typing import Dict
+
+from src.utils.db_connection import IN_MEMORY, DuckDBConnection
+from src.utils.s3_utils import read_s3_state, write_s3_state
+
+FINGERPRINTS_KEY = 'sheet-fingerprints'
+
+
+def load_fingerprints() -> Dict[str, str]:
+    duckdb_con = DuckDBConnection(need_write_access=True, database=IN_MEMORY)
+    try:
+        fingerprints = read_s3_state(
+            duckdb_con.get_connection(), FINGERPRINTS_KEY, os.getenv('BUCKET_NAME')
+        )
+    finally:
+        duckdb_con.close()
+
+    logging.info(f'Loaded fingerprints for {len(fingerprints)} sheets')
+    return fingerprints
+
+
+def save_fingerprints(fingerprints: Dict[str, str]) -> None:
+    duckdb_con = DuckDBConnection(need_write_access=True, database=IN_MEMORY)
+    try:
+        write_s3_state(
+            duckdb_con.get_connection(),
+            fingerprints,
+            FINGERPRINTS_KEY,
+            os.getenv('BUCKET_NAME'),
+        )
+    finally:
+        duckdb_con.close()
+
+    logging.info(f'Saved fingerprints for {len(fingerprints)} sheets')
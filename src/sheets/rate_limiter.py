@@ -0,0 +1,60 @@
+"""
+Rate limiting for Google Sheets API calls.
+
+The Sheets API allows 60 requests per minute per user. A token bucket spaces
+calls out under that quota, and a 429's Retry-After pauses every caller
+sharing the bucket rather than just the one that was rejected.
+"""
+
+import threading
+import time
+from typing import Callable
+
+SHEETS_REQUESTS_PER_MINUTE = 60
+
+
+class TokenBucket:
+    """Thread-safe token bucket that blocks callers until a token is free."""
+
+    def __init__(
+        self,
+        rate_per_minute: float = SHEETS_REQUESTS_PER_MINUTE - 5,
+        capacity: int = 5,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """A full bucket plus a minute of refills stays within the quota."""
+        self._rate = rate_per_minute / 60
+        self._capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(capacity)
+        self._updated_at = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take a token, waiting for a refill or an active pause if needed."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(
+                    self._capacity,
+                    self._tokens + (now - self._updated_at) * self._rate,
+                )
+                self._updated_at = now
+
+                wait = self._paused_until - now
+                if wait <= 0:
+                    # Allow for float error in the refill after a computed wait
+                    if self._tokens >= 1 - 1e-9:
+                        self._tokens = max(self._tokens - 1, 0.0)
+                        return
+                    wait = (1 - self._tokens) / self._rate
+
+            self._sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for `seconds`, e.g. after a 429 with Retry-After."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
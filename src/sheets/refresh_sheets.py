@@ -2,14 +2,14 @@ import json
 import logging
 import os
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from dotenv import load_dotenv
 from gspread import Spreadsheet, Worksheet, service_account_from_dict
-from gspread.exceptions import WorksheetNotFound
 from pandas import DataFrame, to_datetime
 
+from src.etl.category_orders import is_cache_current, mark_own_edits_seen
 from src.sheets.batcher import SheetBatcher
+from src.sheets.fingerprints import load_fingerprints, save_fingerprints
 from src.sheets.sheet_formats import (
     OVERVIEW_COLUMN_TITLES,
     OVERVIEW_COLUMN_WIDTH_MAPPING,
@@ -19,42 +19,66 @@ from src.sheets.sheet_formats import (
     YEARLY_CATEGORIES_FORMAT,
     YEARLY_CATEGORIES_NOTES,
 )
-from src.sheets.utils import get_df_from_table
-from src.utils.logging_config import setup_logging
-
-setup_logging()
-load_dotenv()
-
-
-def delete_worksheet_if_exists(sh: Spreadsheet, title: str) -> None:
-    """Delete a worksheet if it exists, ignoring errors."""
-    try:
-        ws = sh.worksheet(title)
-        sh.del_worksheet(ws)
-        logging.info(f'Deleted existing worksheet: {title}')
-    except WorksheetNotFound:
-        pass
-    except Exception as e:
-        logging.warning(f'Error deleting worksheet {title}: {e}')
+from src.sheets.utils import df_to_sheet_values, get_df_from_table, get_dfs_by_year
+from src.utils.db_connection import shared_connection
+
+# Monthly overview labels are written as ISO dates, which USER_ENTERED stores as
+# date serials like the values read back, and shown as MM/yyyy by OVERVIEW_FORMAT
+MONTH_LABEL_FORMAT = '%Y-%m-%d'
+
+# Dashboard table, columns read, column titles and top-left cell per yearly sheet
+YEARLY_CATEGORIES_TABLES = [
+    (
+        'dashboards.yearly_needs',
+        ['subcategory_group', 'category_name', 'spend'],
+        ['Subcategory Group', 'Needs', 'Spend'],
+        'E2',
+    ),
+    (
+        'dashboards.yearly_wants',
+        ['subcategory_group', 'category_name', 'spend'],
+        ['Subcategory Group', 'Wants', 'Spend'],
+        'I2',
+    ),
+    (
+        'dashboards.yearly_other',
+        ['category_name', 'assigned', 'spend'],
+        ['Other', 'Assigned', 'Spend'],
+        'M2',
+    ),
+    (
+        'dashboards.yearly_category_group',
+        ['category_group_name_mapping', 'assigned', 'spend'],
+        ['Category Group', 'Assigned', 'Spend'],
+        'M12',
+    ),
+    (
+        'dashboards.yearly_subcategory_group',
+        ['subcategory_group', 'assigned', 'spend'],
+        ['Subcategory Group', 'Assigned', 'Spend'],
+        'M20',
+    ),
+    (
+        'dashboards.yearly_paychecks',
+        ['paycheck_column', 'paycheck_value'],
+        ['Paycheck Value', 'Amount'],
+        'B2',
+    ),
+]
 
 
 def create_worksheet(
-    sh: Spreadsheet,
+    batcher: SheetBatcher,
     title: str,
     rows: int,
     cols: int,
-    batcher: SheetBatcher,
 ) -> Worksheet:
-    """Create a new worksheet, deleting any existing one with the same name."""
-    logging.info(f'Creating worksheet: {title}')
-    delete_worksheet_if_exists(sh, title)
+    """Queue a new worksheet, replacing any existing one with the same name.
 
-    # Synchronous - need the object immediately for subsequent queue operations
-    worksheet = sh.add_worksheet(title=title, rows=rows, cols=cols)
-    batcher.register_worksheet(worksheet)
-
-    logging.info(f'Created worksheet: {title}')
-    return worksheet
+    In incremental mode an existing worksheet is kept and updated in place.
+    """
+    logging.info(f'Queueing worksheet: {title}')
+    return batcher.queue_worksheet(title, rows, cols)
 
 
 def queue_last_updated_cell(
@@ -64,7 +88,11 @@ def queue_last_updated_cell(
 ) -> None:
     """Queue a 'Last Updated' cell update."""
     timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')
-    batcher.queue_values(f'{worksheet.title}!{cell}', [[f'Last Updated: {timestamp}']])
+    batcher.queue_values(
+        f'{worksheet.title}!{cell}',
+        [[f'Last Updated: {timestamp}']],
+        volatile=True,
+    )
 
 
 def queue_df_to_sheet(
@@ -74,9 +102,10 @@ def queue_df_to_sheet(
     location: str,
     format_dict: Dict[str, Any] = None,
 ) -> None:
-    """Queue a DataFrame to be written to a sheet."""
-    values = [df.columns.values.tolist()] + df.values.tolist()
-    batcher.queue_values(f'{worksheet.title}!{location}', values)
+    """Queue a DataFrame to be written to a sheet, serialized at flush."""
+    batcher.queue_values(
+        f'{worksheet.title}!{location}', lambda: df_to_sheet_values(df)
+    )
 
     logging.info(
         f'Queued {df.shape[0]} rows and {df.shape[1]} columns for {worksheet.title}!{location}'
@@ -190,7 +219,6 @@ def queue_overview_borders(
 
 
 def refresh_overview_dashboard(
-    sh: Spreadsheet,
     batcher: SheetBatcher,
     grain: str,
 ) -> None:
@@ -200,16 +228,20 @@ def refresh_overview_dashboard(
 
     column_label = grain.capitalize().replace('ly', '')
 
-    df = get_df_from_table(f'dashboards.{grain}_level')
+    # Incremental builds don't keep the table's rows in order
+    period_column = 'budget_month' if grain == 'monthly' else 'budget_year'
+    df = get_df_from_table(
+        f'dashboards.{grain}_level', order_by=f'{period_column} desc'
+    )
     df.columns = [column_label] + OVERVIEW_COLUMN_TITLES
 
     if grain == 'monthly':
-        df[column_label] = to_datetime(df[column_label]).dt.strftime('%-m/%Y')
+        df[column_label] = to_datetime(df[column_label]).dt.strftime(MONTH_LABEL_FORMAT)
 
     sheet_height = len(df) + 3
     sheet_width = len(df.columns) + 2
 
-    worksheet = create_worksheet(sh, title, sheet_height, sheet_width, batcher)
+    worksheet = create_worksheet(batcher, title, sheet_height, sheet_width)
 
     queue_df_to_sheet(batcher, df, worksheet, 'B2', OVERVIEW_FORMAT)
     batcher.queue_format('B2:Y2', OVERVIEW_FORMAT['B2:Y2'], worksheet)
@@ -225,12 +257,13 @@ def refresh_overview_dashboard(
 
 
 def refresh_yearly_categories_dashboards(
-    sh: Spreadsheet,
     batcher: SheetBatcher,
 ) -> None:
     """Refresh all yearly categories dashboards."""
     years = sorted(
-        get_df_from_table('dashboards.yearly_level')['budget_year'].values,
+        get_df_from_table('dashboards.yearly_level', columns=['budget_year'])[
+            'budget_year'
+        ].values,
         reverse=True,
     )
 
@@ -238,47 +271,22 @@ def refresh_yearly_categories_dashboards(
         f'Updating yearly categories dashboards for years: {", ".join(map(str, years))}'
     )
 
+    # One query per table for every year, rather than one per table per year
+    tables_by_year = [
+        (get_dfs_by_year(table, columns), columns, titles, location)
+        for table, columns, titles, location in YEARLY_CATEGORIES_TABLES
+    ]
+
     for year in years:
         logging.info(f'Updating {year} - Categories')
         title = f'{year} - Categories'
 
-        worksheet = create_worksheet(sh, title, 34, 16, batcher)
-
-        df_needs = get_df_from_table(
-            'dashboards.yearly_needs', f'budget_year = {year}'
-        )[['subcategory_group', 'category_name', 'spend']]
-        df_needs.columns = ['Subcategory Group', 'Needs', 'Spend']
-        queue_df_to_sheet(batcher, df_needs, worksheet, 'E2')
-
-        df_wants = get_df_from_table(
-            'dashboards.yearly_wants', f'budget_year = {year}'
-        )[['subcategory_group', 'category_name', 'spend']]
-        df_wants.columns = ['Subcategory Group', 'Wants', 'Spend']
-        queue_df_to_sheet(batcher, df_wants, worksheet, 'I2')
-
-        df_savings = get_df_from_table(
-            'dashboards.yearly_other', f'budget_year = {year}'
-        )[['category_name', 'assigned', 'spend']]
-        df_savings.columns = ['Other', 'Assigned', 'Spend']
-        queue_df_to_sheet(batcher, df_savings, worksheet, 'M2')
-
-        df_other = get_df_from_table(
-            'dashboards.yearly_category_group', f'budget_year = {year}'
-        )[['category_group_name_mapping', 'assigned', 'spend']]
-        df_other.columns = ['Category Group', 'Assigned', 'Spend']
-        queue_df_to_sheet(batcher, df_other, worksheet, 'M12')
-
-        df_subcategory = get_df_from_table(
-            'dashboards.yearly_subcategory_group', f'budget_year = {year}'
-        )[['subcategory_group', 'assigned', 'spend']]
-        df_subcategory.columns = ['Subcategory Group', 'Assigned', 'Spend']
-        queue_df_to_sheet(batcher, df_subcategory, worksheet, 'M20')
-
-        df_paycheck = get_df_from_table(
-            'dashboards.yearly_paychecks', f'budget_year = {year}'
-        )[['paycheck_column', 'paycheck_value']]
-        df_paycheck.columns = ['Paycheck Value', 'Amount']
-        queue_df_to_sheet(batcher, df_paycheck, worksheet, 'B2')
+        worksheet = create_worksheet(batcher, title, 34, 16)
+
+        for dfs_by_year, columns, titles, location in tables_by_year:
+            df = dfs_by_year.get(int(year), DataFrame(columns=columns))
+            df.columns = titles
+            queue_df_to_sheet(batcher, df, worksheet, location)
 
         queue_format_dict(batcher, worksheet, YEARLY_CATEGORIES_FORMAT)
         queue_column_widths(batcher, worksheet, YEARLY_CATEGORIES_COLUMN_WIDTH_MAPPING)
@@ -288,30 +296,67 @@ def refresh_yearly_categories_dashboards(
         logging.info(f'{year} - Categories queued for update')
 
 
-def refresh_sheets() -> None:
-    """Main function to refresh all Google Sheets dashboards."""
-    credentials_dict = json.loads(os.getenv('GSPREAD_CREDENTIALS').replace('\n', '\\n'))
-    gc = service_account_from_dict(credentials_dict)
-    sh = gc.open('Spending Dashboard')
+def refresh_sheets(
+    incremental: bool = True,
+    force: bool = False,
+    spreadsheet: Optional[Spreadsheet] = None,
+) -> None:
+    """Main function to refresh all Google Sheets dashboards.
+
+    With `incremental`, worksheets are kept and only changed cells are written.
+    Sheets unchanged since the last refresh are skipped unless `force` is set.
+    The dashboard spreadsheet is opened with GSPREAD_CREDENTIALS unless
+    `spreadsheet` is passed.
+    """
+    if spreadsheet is None:
+        credentials_dict = json.loads(
+            os.getenv('GSPREAD_CREDENTIALS').replace('\n', '\\n')
+        )
+        gc = service_account_from_dict(credentials_dict)
+        spreadsheet = gc.open('Spending Dashboard')
 
     logging.info('Starting sheet refresh with batch operations')
 
-    with SheetBatcher(sh) as batcher:
+    fingerprints = {} if force else load_fingerprints()
+
+    # The refresh edits the spreadsheet that Category Orders is cached from.
+    # Checked right before the writes, so an edit made while the dashboards are
+    # queued still counts as unseen.
+    category_orders_current = False
+
+    def check_category_orders() -> None:
+        nonlocal category_orders_current
+        category_orders_current = is_cache_current(spreadsheet)
+
+    # Every dashboard query in the refresh reuses one warehouse connection
+    with (
+        shared_connection(),
+        SheetBatcher(
+            spreadsheet,
+            incremental=incremental,
+            fingerprints=fingerprints,
+            before_write=check_category_orders,
+        ) as batcher,
+    ):
         logging.info('Refreshing overview dashboards')
         try:
-            refresh_overview_dashboard(sh, batcher, 'yearly')
+            refresh_overview_dashboard(batcher, 'yearly')
         except Exception as e:
             logging.error(f'Failed to queue yearly overview dashboard: {e}')
 
         try:
-            refresh_overview_dashboard(sh, batcher, 'monthly')
+            refresh_overview_dashboard(batcher, 'monthly')
         except Exception as e:
             logging.error(f'Failed to queue monthly overview dashboard: {e}')
 
         logging.info('Refreshing yearly categories dashboards')
         try:
-            refresh_yearly_categories_dashboards(sh, batcher)
+            refresh_yearly_categories_dashboards(batcher)
         except Exception as e:
             logging.error(f'Failed to queue yearly categories dashboards: {e}')
 
+    save_fingerprints(batcher.fingerprints)
+    if category_orders_current:
+        mark_own_edits_seen(spreadsheet)
+
     logging.info('Sheet refresh complete')
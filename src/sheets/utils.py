@@ -1,19 +1,47 @@
-import emoji
-from pandas import DataFrame
+from typing import Any, Dict, List, Optional
 
-from src.utils.db_connection import DuckDBConnection
-from src.utils.logging_config import setup_logging
+import emoji
+import numpy as np
+from pandas import DataFrame, Series
+from pandas.api.types import (
+    is_bool_dtype,
+    is_datetime64_any_dtype,
+    is_float_dtype,
+    is_integer_dtype,
+)
 
-setup_logging()
+from src.utils.db_connection import shared_connection
+from src.utils.metrics import span
 
 
-def get_df_from_table(table: str, where_clause: str = '') -> DataFrame:
+def get_df_from_table(
+    table: str,
+    where_clause: str = '',
+    columns: Optional[List[str]] = None,
+    order_by: str = '',
+) -> DataFrame:
     if where_clause:
         where_clause = f'where {where_clause}'
-    duckdb_con = DuckDBConnection()
-    df = duckdb_con.df(f'select * from {table} {where_clause}')
-    duckdb_con.close()
-    return df.replace([float('inf'), float('-inf'), float('nan')], None)
+    if order_by:
+        order_by = f'order by {order_by}'
+    select_list = ', '.join(columns) if columns else '*'
+    with shared_connection() as duckdb_con, span('sheets.query', table=table) as counts:
+        df = duckdb_con.df(
+            f'select {select_list} from {table} {where_clause} {order_by}'
+        )
+        counts['rows'] = len(df)
+    return df
+
+
+def get_dfs_by_year(
+    table: str, columns: List[str], year_column: str = 'budget_year'
+) -> Dict[int, DataFrame]:
+    """Read `columns` of `table` in one query and split the rows by year."""
+    df = get_df_from_table(table, columns=[year_column] + columns)
+    return {
+        int(year): group[columns].reset_index(drop=True)
+        for year, group in df.groupby(year_column, sort=False)
+    }
 
 
 def clean_category_names(df: DataFrame) -> DataFrame:
@@ -21,3 +49,43 @@ def clean_category_names(df: DataFrame) -> DataFrame:
         lambda x: emoji.replace_emoji(x, replace='').strip() if x else x
     )
     return df
+
+
+def _column_to_sheet_values(
+    column: Series, decimals: int, date_format: str
+) -> List[Any]:
+    """Convert one column to JSON-ready cell values, with missing values as None."""
+    if is_float_dtype(column):
+        array = column.to_numpy(dtype=np.float64)
+        values = np.round(array, decimals).tolist()
+        for i in np.flatnonzero(~np.isfinite(array)):
+            values[i] = None
+        return values
+
+    missing = column.isna().to_numpy()
+    if (is_integer_dtype(column) or is_bool_dtype(column)) and not missing.any():
+        return column.tolist()
+
+    if is_datetime64_any_dtype(column):
+        values = column.dt.strftime(date_format).tolist()
+    else:
+        values = column.astype(object).tolist()
+    for i in np.flatnonzero(missing):
+        values[i] = None
+    return values
+
+
+def df_to_sheet_values(
+    df: DataFrame, decimals: int = 2, date_format: str = '%Y-%m-%d'
+) -> List[List[Any]]:
+    """Serialize a DataFrame into a header row plus rows of cell values.
+
+    Columns are converted whole by dtype: floats are rounded to `decimals`
+    with NaN and inf left empty, and dates are written with `date_format`.
+    """
+    columns = [
+        _column_to_sheet_values(df.iloc[:, i], decimals, date_format)
+        for i in range(df.shape[1])
+    ]
+    rows = [list(row) for row in zip(*columns)] if columns else []
+    return [df.columns.tolist()] + rows
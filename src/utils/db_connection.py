@@ -1,51 +1,137 @@
 import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
 
 import duckdb
-from dotenv import load_dotenv
 
 from src import project_root
 
-load_dotenv()
+DATABASE_PATH = Path(os.getenv('DATABASE_PATH', project_root / 'ynab_report.duckdb'))
+# The warehouse is built here, then moved over DATABASE_PATH. It keeps the file
+# name, since SQLMesh's views refer to tables by the file's catalog name
+BUILD_DATABASE_PATH = DATABASE_PATH.parent / '.warehouse-build' / DATABASE_PATH.name
+
+# For connections that only read and write S3, so they don't lock the warehouse
+IN_MEMORY = ':memory:'
+
+# The Modal image installs httpfs here, so containers never download it
+EXTENSION_DIRECTORY = os.getenv('DUCKDB_EXTENSION_DIRECTORY')
+
+
+def s3_secret_sql(access_type: str) -> str:
+    """The statement creating the S3 secret, with the credentials set right now."""
+    s3_access_key_id_var_name = f'{access_type}_ACCESS_KEY_ID'
+    s3_secret_access_key_id_var_name = f'{access_type}_SECRET_ACCESS_KEY_ID'
+
+    return f"""
+        CREATE OR REPLACE TEMPORARY SECRET {access_type}_SECRET (
+            TYPE S3,
+            KEY_ID '{os.getenv(s3_access_key_id_var_name)}',
+            SECRET '{os.getenv(s3_secret_access_key_id_var_name)}',
+            REGION 'nyc3',
+            ENDPOINT 'nyc3.digitaloceanspaces.com'
+        );
+        """
 
 
 class DuckDBConnection:
-    def __init__(self, need_write_access=False):
+    def __init__(
+        self,
+        need_write_access=False,
+        lazy_s3=False,
+        read_only=False,
+        database: Optional[Union[str, Path]] = None,
+    ):
+        """Open the published warehouse unless another `database` is given.
+
+        Read-only connections can be open in several processes at once, while
+        the next warehouse is built in a separate file.
+        """
         self.connection = duckdb.connect(
-            database=project_root / 'ynab_report.duckdb', read_only=False
+            database=database or DATABASE_PATH, read_only=read_only
         )
         self.need_write_access = need_write_access
-        self._configure_connection()
+        self._s3_configured = False
+        self._s3_lock = threading.Lock()
+        if not lazy_s3:
+            self.configure_s3()
 
     def _configure_connection(self):
         access_type = 'WRITE' if self.need_write_access else 'READ'
-        s3_access_key_id_var_name = f'{access_type}_ACCESS_KEY_ID'
-        s3_secret_access_key_id_var_name = f'{access_type}_SECRET_ACCESS_KEY_ID'
-
-        self.connection.execute(
-            f"""
-            install httpfs;
-            load httpfs;
-            CREATE OR REPLACE TEMPORARY SECRET {access_type}_SECRET (
-                TYPE S3,
-                KEY_ID '{os.getenv(s3_access_key_id_var_name)}',
-                SECRET '{os.getenv(s3_secret_access_key_id_var_name)}',
-                REGION 'nyc3',
-                ENDPOINT 'nyc3.digitaloceanspaces.com'
-            );
-            """
-        )
+        if EXTENSION_DIRECTORY:
+            self.connection.execute(
+                f"set extension_directory = '{EXTENSION_DIRECTORY}'"
+            )
+        # Creating the secret autoloads httpfs, installing it only if it's missing
+        self.connection.execute(s3_secret_sql(access_type))
+
+    def configure_s3(self):
+        # Datasets under S3_LOCAL_ROOT are plain files, so there's nothing to set up
+        if os.getenv('S3_LOCAL_ROOT'):
+            return
+        with self._s3_lock:
+            if not self._s3_configured:
+                self._configure_connection()
+                self._s3_configured = True
+
+    def _prepare(self, query):
+        # Only pay for httpfs and the secret once a query actually reads S3
+        if 's3://' in query:
+            self.configure_s3()
 
     def get_connection(self):
         return self.connection
 
+    def cursor(self):
+        return self.connection.cursor()
+
     def query(self, query):
+        self._prepare(query)
         return self.connection.query(query)
 
     def execute(self, query, *args, **kwargs):
+        self._prepare(query)
         self.connection.execute(query, *args, **kwargs)
 
     def close(self):
         self.connection.close()
 
     def df(self, query):
-        return self.connection.query(query).df()
+        self._prepare(query)
+        # A cursor per read, so readers on other threads can share the connection
+        with self.cursor() as cursor:
+            return cursor.query(query).df()
+
+
+_shared_connection: Optional[DuckDBConnection] = None
+_shared_users = 0
+_shared_lock = threading.Lock()
+
+
+@contextmanager
+def shared_connection() -> Iterator[DuckDBConnection]:
+    """Use the process-wide connection, opening it on first use.
+
+    The connection stays open until the outermost `shared_connection` block
+    exits, so a stage wrapped in one block runs all its queries on one warm
+    connection. S3 access is only configured if a query touches an S3 path.
+    The warehouse is opened read-only, so this can run while it's being rebuilt.
+    """
+    global _shared_connection, _shared_users
+
+    with _shared_lock:
+        if _shared_connection is None:
+            _shared_connection = DuckDBConnection(lazy_s3=True, read_only=True)
+        _shared_users += 1
+        duckdb_con = _shared_connection
+
+    try:
+        yield duckdb_con
+    finally:
+        with _shared_lock:
+            _shared_users -= 1
+            if _shared_users == 0:
+                _shared_connection.close()
+                _shared_connection = None
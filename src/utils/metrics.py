@@ -0,0 +1,145 @@
+"""Lightweight spans for timing the pipeline's stages.
+
+A span records how long a block took, whether it failed, and any counts added
+to it while it was open, such as rows, bytes, API calls and retries. Each
+finished span is logged as one JSON line on the `metrics` logger and kept for
+the run, so `save_run_metrics` can save the whole run to S3. The warehouse
+build loads every saved run into meta.run_metrics.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from pandas import DataFrame
+
+RUN_METRICS_KEY = 'run-metrics'
+
+metrics_logger = logging.getLogger('metrics')
+
+_run_id = uuid.uuid4().hex
+_spans: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+
+
+def start_run() -> str:
+    """Start collecting spans for a new run, returning its id."""
+    global _run_id
+    with _lock:
+        _run_id = uuid.uuid4().hex
+        _spans.clear()
+    return _run_id
+
+
+def record_span(
+    name: str,
+    started_at: datetime,
+    duration_seconds: float,
+    status: str = 'ok',
+    **counts: Any,
+) -> None:
+    """Record a span that was timed elsewhere, e.g. by SQLMesh."""
+    record = {
+        'run_id': _run_id,
+        'name': name,
+        'started_at': started_at.isoformat(),
+        'duration_seconds': round(duration_seconds, 4),
+        'status': status,
+        # Unset counts are left out rather than saved as nulls
+        'counts': {key: value for key, value in counts.items() if value is not None},
+    }
+    metrics_logger.info(json.dumps(record))
+    with _lock:
+        _spans.append(record)
+
+
+@contextmanager
+def span(name: str, **counts: Any) -> Iterator[Dict[str, Any]]:
+    """Time the block as `name`. Counts can be set on the yielded dict."""
+    started_at = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    status = 'ok'
+    try:
+        yield counts
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        record_span(name, started_at, time.perf_counter() - start, status, **counts)
+
+
+def traced(name: str, label_arg: Optional[str] = None) -> Callable:
+    """Record every call of the decorated function as a span.
+
+    The value of the `label_arg` argument is saved with the span, and an int
+    returned by the function is saved as its row count.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            counts = {}
+            if label_arg is not None:
+                arguments = signature.bind(*args, **kwargs).arguments
+                counts[label_arg] = arguments.get(label_arg)
+            with span(name, **counts) as counts:
+                result = fn(*args, **kwargs)
+                if isinstance(result, int):
+                    counts['rows'] = result
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def run_spans() -> List[Dict[str, Any]]:
+    with _lock:
+        return list(_spans)
+
+
+def run_metrics_df(spans: Optional[List[Dict[str, Any]]] = None) -> DataFrame:
+    """One row per span, in the layout of meta.run_metrics."""
+    spans = run_spans() if spans is None else spans
+    return DataFrame(
+        {
+            'run_id': [record['run_id'] for record in spans],
+            'span_id': list(range(len(spans))),
+            'name': [record['name'] for record in spans],
+            'started_at': [record['started_at'] for record in spans],
+            'duration_seconds': [record['duration_seconds'] for record in spans],
+            'status': [record['status'] for record in spans],
+            'counts': [json.dumps(record['counts']) for record in spans],
+        }
+    )
+
+
+def save_run_metrics() -> None:
+    """Save this run's spans to S3, one file per run."""
+    # Imported here since s3_utils records spans with this module
+    from src.utils.db_connection import IN_MEMORY, DuckDBConnection
+    from src.utils.s3_utils import load_df_to_s3_table
+
+    df = run_metrics_df()
+    duckdb_con = DuckDBConnection(need_write_access=True, database=IN_MEMORY)
+    try:
+        load_df_to_s3_table(
+            duckdb_con=duckdb_con.get_connection(),
+            df=df,
+            s3_key=f'{RUN_METRICS_KEY}/{_run_id}',
+            bucket_name=os.getenv('BUCKET_NAME'),
+        )
+    finally:
+        duckdb_con.close()
+
+    logging.info(f'Saved {len(df)} metrics for run {_run_id}')
@@ -1,30 +1,360 @@
 import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Sequence, Set, Tuple, Union
 
 import duckdb
+import pyarrow as pa
+import pyarrow.dataset as ds
 from pandas import DataFrame
 
-from src.utils.logging_config import setup_logging
+from src.utils.metrics import traced
 
-setup_logging()
+PARTITION_COLUMNS = ('year', 'month')
+PARTITION_PATH_PATTERN = re.compile(r'/year=(\d+)/month=(\d+)/')
+PARTITION_FILE_NAME = 'data_0.parquet'
 
+# Rows YNAB hasn't flagged as deleted. Full extracts and deltas both store only
+# these, so either one leaves the same rows behind
+LIVE_ROWS_QUERY = 'select * from {source} where not coalesce(deleted, false)'
 
+Partition = Tuple[int, int]
+# DuckDB scans these in place, so none are copied before the COPY to S3
+Frame = Union[DataFrame, pa.Table, ds.Dataset]
+
+
+def s3_uri(bucket_name: str, s3_key: str) -> str:
+    """Location of `s3_key` in the bucket.
+
+    With S3_LOCAL_ROOT set, buckets are directories under that path instead,
+    so the pipeline can run against the local filesystem, e.g. for benchmarks.
+    """
+    local_root = os.getenv('S3_LOCAL_ROOT')
+    if local_root:
+        return f'{local_root}/{bucket_name}/{s3_key}'
+    return f's3://{bucket_name}/{s3_key}'
+
+
+def make_local_dir(path: str) -> None:
+    # S3 has no directories, so the local stand-in creates them as needed
+    if not path.startswith('s3://'):
+        Path(path).mkdir(parents=True, exist_ok=True)
+
+
+def count_rows(df: Frame) -> int:
+    return df.count_rows() if isinstance(df, ds.Dataset) else len(df)
+
+
+@traced('s3.load_table', label_arg='s3_key')
 def load_df_to_s3_table(
     duckdb_con: duckdb.DuckDBPyConnection,
-    df: DataFrame,
+    df: Frame,
     s3_key: str,
     bucket_name: str,
+    drop_deleted: bool = False,
 ) -> int:
+    """Write `df` over the S3 table, returning the number of rows written.
+
+    With `drop_deleted`, rows flagged as deleted by YNAB aren't written, as in
+    `merge_df_to_s3_table`.
+    """
     logging.info(f'Loading {s3_key} to {bucket_name}')
 
-    s3_file = f's3://{bucket_name}/{s3_key}.parquet'
+    s3_file = f'{s3_uri(bucket_name, s3_key)}.parquet'
+    make_local_dir(s3_file.rsplit('/', 1)[0])
 
+    # Stream straight from the registered DataFrame; COPY returns the row count
     duckdb_con.register('df', df)
-    duckdb_con.execute('create or replace table all_data as select * from df')
-    duckdb_con.execute(f'copy (select * from all_data) to "{s3_file}";')
-
-    row_count_query = f'select count(*) from "{s3_file}";'
-    rows_loaded = duckdb_con.sql(row_count_query).fetchnumpy()['count_star()'][0]
+    source = f'({LIVE_ROWS_QUERY.format(source="df")})' if drop_deleted else 'df'
+    (rows_loaded,) = duckdb_con.execute(f"copy {source} to '{s3_file}';").fetchone()
+    duckdb_con.unregister('df')
 
     logging.info(f'Updated {s3_file} with {rows_loaded} rows.')
 
     return rows_loaded
+
+
+@traced('s3.merge_table', label_arg='s3_key')
+def merge_df_to_s3_table(
+    duckdb_con: duckdb.DuckDBPyConnection,
+    df: Frame,
+    s3_key: str,
+    bucket_name: str,
+    key_columns: Sequence[str] = ('id',),
+) -> int:
+    """Upsert changed rows into an existing S3 table.
+
+    Rows in `df` replace rows in the existing file with the same key. Rows
+    flagged as deleted by YNAB are dropped, as full extracts drop them with
+    `load_df_to_s3_table(drop_deleted=True)`, so both store the same rows.
+    """
+    changed_rows = count_rows(df)
+    if changed_rows == 0:
+        logging.info(f'No changes for {s3_key}, skipping merge')
+        return 0
+
+    logging.info(f'Merging {changed_rows} changed rows into {s3_key} in {bucket_name}')
+
+    s3_file = f'{s3_uri(bucket_name, s3_key)}.parquet'
+    key_match = ' and '.join(f'changes.{col} = existing.{col}' for col in key_columns)
+
+    duckdb_con.register('changes', df)
+    # Materialize first, so a failed read can't leave the file half rewritten
+    duckdb_con.execute(
+        f"""
+        create or replace temp table merged_rows as
+        {LIVE_ROWS_QUERY.format(source='changes')}
+        union all by name
+        select * from read_parquet('{s3_file}') as existing
+        where not exists (select 1 from changes where {key_match})
+        """
+    )
+    duckdb_con.execute(f"copy merged_rows to '{s3_file}';")
+    duckdb_con.execute('drop table merged_rows')
+    duckdb_con.unregister('changes')
+
+    logging.info(f'Merged {changed_rows} changed rows into {s3_file}.')
+
+    return changed_rows
+
+
+def list_s3_partitions(
+    duckdb_con: duckdb.DuckDBPyConnection,
+    s3_dir: str,
+) -> Set[Partition]:
+    """List the (year, month) partitions that currently exist under `s3_dir`."""
+    files = duckdb_con.execute(f"select file from glob('{s3_dir}/*/*/*.parquet')")
+    return {
+        (int(match.group(1)), int(match.group(2)))
+        for (file,) in files.fetchall()
+        if (match := PARTITION_PATH_PATTERN.search(file))
+    }
+
+
+def partition_path(s3_dir: str, partition: Partition) -> str:
+    year, month = partition
+    return f'{s3_dir}/year={year}/month={month}'
+
+
+def partition_index_file(s3_dir: str) -> str:
+    # Next to the dataset rather than in it, so readers of the partitions skip it
+    return f'{s3_dir}-partition-index.parquet'
+
+
+def _indexed_rows(duckdb_con: duckdb.DuckDBPyConnection, s3_dir: str) -> str:
+    """A relation with the key and partition of every row stored under `s3_dir`.
+
+    That's the partition index, or the partitions themselves for datasets
+    written before the index existed.
+    """
+    index_file = partition_index_file(s3_dir)
+    try:
+        duckdb_con.execute(f"select 1 from read_parquet('{index_file}') limit 0")
+    except duckdb.IOException:
+        logging.info(f'No partition index for {s3_dir}, scanning its partitions')
+        return f"read_parquet('{s3_dir}/*/*/*.parquet', hive_partitioning = true)"
+    return f"read_parquet('{index_file}')"
+
+
+def _previous_partitions(
+    duckdb_con: duckdb.DuckDBPyConnection,
+    s3_dir: str,
+    key_columns: Sequence[str],
+) -> Set[Partition]:
+    """The partitions the keys in `changes` are currently stored in."""
+    key_list = ', '.join(key_columns)
+    partition_list = ', '.join(PARTITION_COLUMNS)
+    return set(
+        duckdb_con.execute(
+            f"""
+            select distinct {partition_list}
+            from {_indexed_rows(duckdb_con, s3_dir)}
+            where ({key_list}) in (select ({key_list}) from changes)
+            """
+        ).fetchall()
+    )
+
+
+def _write_partition_index(
+    duckdb_con: duckdb.DuckDBPyConnection,
+    s3_dir: str,
+    key_columns: Sequence[str],
+    is_delta: bool,
+) -> None:
+    """Save the key and partition of every stored row after a load of `changes`.
+
+    A delta keeps the indexed keys it didn't change and adds the rows it wrote.
+    """
+    index_columns = ', '.join([*key_columns, *PARTITION_COLUMNS])
+    index_query = (
+        f'select {index_columns} from changes where not coalesce(deleted, false)'
+    )
+    if is_delta:
+        key_list = ', '.join(key_columns)
+        index_query += f"""
+            union all
+            select {index_columns} from {_indexed_rows(duckdb_con, s3_dir)}
+            where ({key_list}) not in (select ({key_list}) from changes)
+            """
+
+    # Materialize first, since the index is read and rewritten
+    duckdb_con.execute(f'create or replace temp table partition_index as {index_query}')
+    duckdb_con.execute(f"copy partition_index to '{partition_index_file(s3_dir)}';")
+    duckdb_con.execute('drop table partition_index')
+
+
+@traced('s3.load_partitions', label_arg='s3_key')
+def load_df_to_s3_partitions(
+    duckdb_con: duckdb.DuckDBPyConnection,
+    df: Frame,
+    s3_key: str,
+    bucket_name: str,
+    is_delta: bool = False,
+    key_columns: Sequence[str] = ('id',),
+) -> int:
+    """Write a dataset as Hive-partitioned parquet, partitioned by year and month.
+
+    Rows flagged as deleted by YNAB are never written, in full loads or deltas.
+    A full load replaces every partition. A delta load only rewrites the
+    partitions that contain changed rows, merging the changes into the rows
+    already stored there. Partitions left without rows are overwritten with an
+    empty file so stale rows don't linger. Returns the number of rows in `df`,
+    like `merge_df_to_s3_table`, rather than the number rewritten.
+
+    Each row's key and partition are also saved to a partition index next to
+    the dataset. A delta looks up where the changed keys were stored in the
+    index, so rows whose month changed are removed from their old partition.
+    That lookup reads the whole index, a few small columns for every row, but
+    none of the partitions that aren't rewritten.
+    """
+    changed_rows = count_rows(df)
+    if changed_rows == 0:
+        logging.info(f'No rows for {s3_key}, skipping load')
+        return 0
+
+    logging.info(f'Loading {s3_key} partitions to {bucket_name}')
+
+    s3_dir = s3_uri(bucket_name, s3_key)
+    partition_list = ', '.join(PARTITION_COLUMNS)
+    existing_partitions = list_s3_partitions(duckdb_con, s3_dir)
+
+    duckdb_con.register('changes', df)
+
+    changed_partitions = set(
+        duckdb_con.execute(f'select distinct {partition_list} from changes').fetchall()
+    )
+
+    if not is_delta:
+        affected_partitions = changed_partitions | existing_partitions
+        source = f"({LIVE_ROWS_QUERY.format(source='changes')})"
+    else:
+        affected_partitions = set(changed_partitions)
+        key_match = ' and '.join(
+            f'changes.{col} = existing.{col}' for col in key_columns
+        )
+
+        if existing_partitions and not set(PARTITION_COLUMNS) <= set(key_columns):
+            # Rows move partitions when their date is edited, so also rewrite the
+            # partitions the changed keys currently live in
+            affected_partitions |= _previous_partitions(duckdb_con, s3_dir, key_columns)
+
+        select_query = LIVE_ROWS_QUERY.format(source='changes')
+
+        existing_files = [
+            f"'{partition_path(s3_dir, partition)}/*.parquet'"
+            for partition in sorted(affected_partitions & existing_partitions)
+        ]
+        if existing_files:
+            select_query += f"""
+            union all by name
+            select * from read_parquet(
+                [{', '.join(existing_files)}],
+                hive_partitioning = true,
+                union_by_name = true
+            ) as existing
+            where not exists (select 1 from changes where {key_match})
+            """
+
+        # Materialize first, since the merge reads the files being rewritten
+        duckdb_con.execute(
+            f'create or replace temp table partition_rows as {select_query}'
+        )
+        source = 'partition_rows'
+
+    make_local_dir(s3_dir)
+    rows_loaded, written_files = duckdb_con.execute(
+        f"""
+        copy {source} to '{s3_dir}' (
+            format parquet,
+            partition_by ({partition_list}),
+            overwrite_or_ignore,
+            filename_pattern 'data_{{i}}',
+            return_files
+        );
+        """
+    ).fetchone()
+
+    written_partitions = {
+        (int(match.group(1)), int(match.group(2)))
+        for file in written_files
+        if (match := PARTITION_PATH_PATTERN.search(file))
+    }
+    for partition in sorted(affected_partitions - written_partitions):
+        logging.info(f'Clearing empty partition {partition_path(s3_dir, partition)}')
+        make_local_dir(partition_path(s3_dir, partition))
+        duckdb_con.execute(
+            f"""
+            copy (select * exclude ({partition_list}) from changes limit 0)
+            to '{partition_path(s3_dir, partition)}/{PARTITION_FILE_NAME}'
+            (format parquet);
+            """
+        )
+
+    if not set(PARTITION_COLUMNS) <= set(key_columns):
+        _write_partition_index(duckdb_con, s3_dir, key_columns, is_delta)
+
+    duckdb_con.execute('drop table if exists partition_rows')
+    duckdb_con.unregister('changes')
+
+    logging.info(
+        f'Rewrote {len(affected_partitions)} partitions of {s3_dir} with '
+        f'{rows_loaded} rows for {changed_rows} changed rows.'
+    )
+
+    return changed_rows
+
+
+def read_s3_state(
+    duckdb_con: duckdb.DuckDBPyConnection,
+    s3_key: str,
+    bucket_name: str,
+) -> Dict[str, str]:
+    """Read a small key/value state file, returning {} if it doesn't exist yet."""
+    s3_file = f'{s3_uri(bucket_name, s3_key)}.parquet'
+
+    try:
+        rows = duckdb_con.execute(
+            f"select key, value from read_parquet('{s3_file}')"
+        ).fetchall()
+    except duckdb.IOException:
+        logging.info(f'No state found at {s3_file}')
+        return {}
+
+    return dict(rows)
+
+
+def write_s3_state(
+    duckdb_con: duckdb.DuckDBPyConnection,
+    state: Dict[str, str],
+    s3_key: str,
+    bucket_name: str,
+) -> None:
+    """Persist a small key/value state file next to the datasets."""
+    df = DataFrame(
+        {
+            'key': list(state.keys()),
+            'value': [str(value) for value in state.values()],
+        }
+    )
+    load_df_to_s3_table(duckdb_con, df, s3_key, bucket_name)
@@ -0,0 +1,145 @@
+"""Bounded thread pool for running independent I/O-bound steps concurrently."""
+
+import logging
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    CancelledError,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Any, Callable, Dict, List, Optional
+from weakref import WeakKeyDictionary
+
+import duckdb
+
+_worker_state = threading.local()
+
+
+def _thread_cursors() -> WeakKeyDictionary:
+    cursors = getattr(_worker_state, 'cursors', None)
+    if cursors is None:
+        cursors = _worker_state.cursors = WeakKeyDictionary()
+    return cursors
+
+
+def worker_cursor(duckdb_con: duckdb.DuckDBPyConnection) -> duckdb.DuckDBPyConnection:
+    """Return this thread's cursor on `duckdb_con`, creating it on first use.
+
+    DuckDB connections aren't safe to share between threads, but cursors on the
+    same connection are, and they share its loaded extensions and secrets.
+    Cursors are keyed on the connection itself, so a new connection never gets
+    one left over from a closed connection. A TaskPool closes its workers'
+    cursors when it shuts down.
+    """
+    cursors = _thread_cursors()
+    cursor = cursors.get(duckdb_con)
+    if cursor is None:
+        cursor = cursors[duckdb_con] = duckdb_con.cursor()
+
+    return cursor
+
+
+class TaskPool:
+    """Run named tasks on a bounded thread pool, timing each one.
+
+    Tasks can be submitted while others are running, so a task can be queued as
+    soon as the result it needs is ready. The first task to fail cancels every
+    task still queued and its exception is re-raised from `result` or `wait`.
+    """
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='task-pool',
+            initializer=self._track_worker_cursors,
+        )
+        self._worker_cursors: List[WeakKeyDictionary] = []
+        self._cursors_lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+        self._failed = threading.Event()
+        self.timings: Dict[str, float] = {}
+
+    def __enter__(self) -> 'TaskPool':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=exc_type is not None)
+        self._close_worker_cursors()
+
+    def _track_worker_cursors(self) -> None:
+        with self._cursors_lock:
+            self._worker_cursors.append(_thread_cursors())
+
+    def _close_worker_cursors(self) -> None:
+        # The workers have exited, so nothing else is using their cursors
+        for cursors in self._worker_cursors:
+            for cursor in list(cursors.values()):
+                cursor.close()
+            cursors.clear()
+
+    def submit(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        if name in self._futures:
+            raise ValueError(f'Task {name} was already submitted')
+
+        def timed() -> Any:
+            # A worker can pick up a queued task before the failure is noticed
+            if self._failed.is_set():
+                raise CancelledError(f'{name} skipped after an earlier task failed')
+
+            logging.info(f'Starting {name}')
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                self._failed.set()
+                raise
+            finally:
+                self.timings[name] = time.perf_counter() - start
+                logging.info(f'Finished {name} in {self.timings[name]:.2f}s')
+
+        future = self._executor.submit(timed)
+        self._futures[name] = future
+        return future
+
+    def result(self, name: str) -> Any:
+        """Wait for one task, failing fast if any task fails first."""
+        future = self._futures[name]
+        self._wait_for([future])
+        return future.result()
+
+    def wait(self) -> Dict[str, float]:
+        """Wait for every submitted task and return how long each took."""
+        self._wait_for(self._futures.values())
+        return dict(self.timings)
+
+    def _wait_for(self, futures) -> None:
+        pending = set(futures)
+        while True:
+            failure = self._first_failure()
+            if failure is not None:
+                self._cancel_queued()
+                raise failure
+
+            pending = {future for future in pending if not future.done()}
+            if not pending:
+                return
+
+            # Also watch the other running tasks so a failure anywhere stops the wait
+            running = {f for f in self._futures.values() if not f.done()}
+            wait(running | pending, return_when=FIRST_COMPLETED)
+
+    def _first_failure(self) -> Optional[BaseException]:
+        for name, future in self._futures.items():
+            if future.done() and not future.cancelled() and future.exception():
+                if isinstance(future.exception(), CancelledError):
+                    continue
+                logging.error(f'Task {name} failed, cancelling queued tasks')
+                return future.exception()
+        return None
+
+    def _cancel_queued(self) -> None:
+        for future in self._futures.values():
+            future.cancel()
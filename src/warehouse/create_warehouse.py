@@ -1,35 +1,286 @@
+import hashlib
 import logging
+import os
+import re
 import shutil
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict
 
+import duckdb
+import sqlmesh
+from sqlmesh.core import constants
+from sqlmesh.core.console import NoopConsole, get_console, set_console
 from sqlmesh.core.context import Context
 
 from src import project_root
-from src.utils.logging_config import setup_logging
+from src.utils import db_connection
+from src.utils.db_connection import DuckDBConnection
+from src.utils.metrics import RUN_METRICS_KEY, record_span, span
+from src.utils.s3_utils import s3_uri
+from src.warehouse.dashboards_snapshot import export_dashboards_snapshot
 
-setup_logging()
+SQLMESH_PROJECT_PATH = project_root / 'src' / 'warehouse' / 'sqlmesh_project'
 
+# Restating these restates every incremental model built from them
+INCREMENTAL_SOURCE_MODELS = ('raw.transactions',)
 
-def copy_duckdb_file() -> None:
-    """Need to do this so evidence can read the file"""
-    source_path = project_root / 'ynab_report.duckdb'
-    dashboard_path = (
-        project_root / 'dashboards' / 'sources' / 'ynab_report' / 'ynab_report.duckdb'
+PROJECT_HASH_KEY = 'sqlmesh_project_hash'
+BUILT_ON_KEY = 'built_on'
+SOURCES_KEY = 'sources_fingerprint'
+
+# The datasets models read, as @get_s3_parquet_path('key') or ('key', true)
+S3_SOURCE_PATTERN = re.compile(r"@get_s3_parquet_path\('([^']+)'(, true)?\)")
+
+# The config.py gateway that writes to the build copy of the warehouse
+BUILD_GATEWAY = 'build'
+
+
+class MetricsConsole(NoopConsole):
+    """Records a span for every batch of a model that SQLMesh evaluates."""
+
+    def update_snapshot_evaluation_progress(
+        self,
+        snapshot,
+        interval,
+        batch_idx,
+        duration_ms,
+        num_audits_passed,
+        num_audits_failed,
+        audit_only=False,
+        execution_stats=None,
+        **kwargs,
+    ) -> None:
+        duration_seconds = (duration_ms or 0) / 1000
+        record_span(
+            'warehouse.model',
+            datetime.now(timezone.utc) - timedelta(seconds=duration_seconds),
+            duration_seconds,
+            status='error' if num_audits_failed else 'ok',
+            model=snapshot.name,
+            batch=batch_idx,
+            rows=execution_stats.total_rows_processed if execution_stats else None,
+        )
+
+
+def hash_sqlmesh_project(project_path: Path) -> str:
+    """Hash everything a plan depends on: the project files, the SQLMesh
+    version and the bucket location the S3 macro renders into the raw models."""
+    digest = hashlib.sha256()
+    digest.update(sqlmesh.__version__.encode())
+    digest.update(os.getenv('BUCKET_NAME', '').encode())
+    digest.update(os.getenv('S3_LOCAL_ROOT', '').encode())
+
+    for path in sorted(project_path.rglob('*')):
+        relative_path = path.relative_to(project_path)
+        if path.is_dir() or {'__pycache__', constants.CACHE} & set(relative_path.parts):
+            continue
+        digest.update(str(relative_path).encode())
+        digest.update(path.read_bytes())
+
+    return digest.hexdigest()
+
+
+def _ensure_state_table(duckdb_con: DuckDBConnection) -> None:
+    duckdb_con.execute(
+        """
+        create schema if not exists meta;
+        create table if not exists meta.warehouse_state (
+            key varchar primary key,
+            value varchar
+        );
+        """
     )
 
+
+def read_warehouse_state() -> Dict[str, str]:
+    """The state saved with the published warehouse, empty if there's none.
+
+    It's stored in the warehouse itself, so a new or deleted database file is
+    always planned and built from scratch.
+    """
+    if not db_connection.DATABASE_PATH.exists():
+        return {}
+
+    duckdb_con = DuckDBConnection(
+        lazy_s3=True, read_only=True, database=db_connection.DATABASE_PATH
+    )
+    try:
+        rows = (
+            duckdb_con.get_connection()
+            .execute('select key, value from meta.warehouse_state')
+            .fetchall()
+        )
+    except duckdb.CatalogException:
+        rows = []
+    finally:
+        duckdb_con.close()
+
+    return dict(rows)
+
+
+def save_warehouse_state(state: Dict[str, str]) -> None:
+    duckdb_con = DuckDBConnection(
+        lazy_s3=True, database=db_connection.BUILD_DATABASE_PATH
+    )
+    try:
+        _ensure_state_table(duckdb_con)
+        duckdb_con.get_connection().executemany(
+            'insert or replace into meta.warehouse_state values (?, ?)',
+            list(state.items()),
+        )
+    finally:
+        duckdb_con.close()
+
+
+def fingerprint_sources(project_path: Path) -> str:
+    """Hash the name, size and modification time of every S3 file the project's
+    models read, so any sync that rewrites one changes it without reading data."""
+    bucket_name = os.getenv('BUCKET_NAME')
+    files = set()
+    for path in (project_path / 'models').rglob('*.sql'):
+        for s3_key, partitioned in S3_SOURCE_PATTERN.findall(path.read_text()):
+            uri = s3_uri(bucket_name, s3_key)
+            files.add(f'{uri}/*/*/*.parquet' if partitioned else f'{uri}.parquet')
+
+    digest = hashlib.sha256()
+    if files:
+        duckdb_con = DuckDBConnection(lazy_s3=True, database=':memory:')
+        try:
+            # Without the content column read_blob only lists the files
+            rows = duckdb_con.query(
+                f"""
+                select filename, size, last_modified
+                from read_blob({sorted(files)})
+                order by filename
+                """
+            ).fetchall()
+        finally:
+            duckdb_con.close()
+        for row in rows:
+            digest.update(repr(row).encode())
+
+    return digest.hexdigest()
+
+
+def load_run_metrics() -> None:
+    """Copy the metrics of every saved run into meta.run_metrics in the build."""
+    metrics_files = f"{s3_uri(os.getenv('BUCKET_NAME'), RUN_METRICS_KEY)}/*.parquet"
+    duckdb_con = DuckDBConnection(
+        lazy_s3=True, database=db_connection.BUILD_DATABASE_PATH
+    )
     try:
-        shutil.copy(source_path, dashboard_path)
-        logging.info(f'Successfully copied {source_path} to {dashboard_path}')
-    except Exception as e:
-        logging.error(f'Failed to copy {source_path} to {dashboard_path}: {e}')
+        duckdb_con.execute(
+            f"""
+            create schema if not exists meta;
+            create or replace table meta.run_metrics as
+            select
+                run_id
+                , span_id
+                , name
+                , started_at::timestamptz as started_at
+                , duration_seconds
+                , status
+                , counts::json as counts
+            from read_parquet('{metrics_files}')
+            """
+        )
+    except duckdb.IOException:
+        logging.info('No run metrics saved yet')
+    finally:
+        duckdb_con.close()
+
+
+def prepare_build() -> None:
+    """Start the build from a copy of the published warehouse, so SQLMesh's
+    state and the incremental models carry over."""
+    build_path = db_connection.BUILD_DATABASE_PATH
+    build_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Left behind by a failed build
+    build_path.unlink(missing_ok=True)
+    build_path.with_name(f'{build_path.name}.wal').unlink(missing_ok=True)
+
+    if db_connection.DATABASE_PATH.exists():
+        shutil.copyfile(db_connection.DATABASE_PATH, build_path)
+
 
+def publish_build() -> None:
+    # A rename, so readers see either the old warehouse or the new one
+    os.replace(db_connection.BUILD_DATABASE_PATH, db_connection.DATABASE_PATH)
+    logging.info(f'Published the warehouse build to {db_connection.DATABASE_PATH}')
 
-def create_data_warehouse(is_local_run: bool = True) -> None:
-    sqlmesh_context = Context(
-        paths=project_root / 'src' / 'warehouse' / 'sqlmesh_project'
+
+def create_data_warehouse(
+    is_local_run: bool = True, full_refresh: bool = False
+) -> None:
+    """Apply model changes, then build the intervals missing since the last run.
+
+    Incremental models reprocess their lookback window on every run so late edits
+    in YNAB are picked up. A full refresh restates them from the project start,
+    e.g. after a category rename that should reach months outside the window.
+
+    Both the plan and the run ignore the models' daily cron, so the current
+    partial day is built and today's transactions don't wait for the day to end.
+
+    Planning is skipped when the project hasn't changed since the last plan
+    applied to this warehouse, since it would find nothing to apply. The whole
+    build is skipped when, in addition, the published warehouse was already
+    built today from the same S3 files: the models' daily intervals aren't due
+    until tomorrow and nothing they read has been rewritten since. A sync
+    reloads paystubs and the other full extracts every time, so this spares
+    runs that skip the sync and retries after a later stage failed.
+
+    The build writes to a copy of the warehouse that replaces the published
+    file once it succeeds, so readers are never blocked by it and never see a
+    partly built warehouse. A failed build leaves the published file as it was.
+    """
+    built_state = read_warehouse_state()
+    state = {
+        PROJECT_HASH_KEY: hash_sqlmesh_project(SQLMESH_PROJECT_PATH),
+        BUILT_ON_KEY: datetime.now(timezone.utc).date().isoformat(),
+        SOURCES_KEY: fingerprint_sources(SQLMESH_PROJECT_PATH),
+    }
+    if not full_refresh and state.items() <= built_state.items():
+        logging.info('Warehouse already built today from the same data, skipping')
+        return
+
+    prepare_build()
+    needs_plan = full_refresh or (
+        built_state.get(PROJECT_HASH_KEY) != state[PROJECT_HASH_KEY]
     )
-    plan = sqlmesh_context.plan()
-    sqlmesh_context.apply(plan)
-    _ = sqlmesh_context.run()
+
+    previous_console = get_console()
+    set_console(MetricsConsole())
+    sqlmesh_context = Context(paths=SQLMESH_PROJECT_PATH, gateway=BUILD_GATEWAY)
+    try:
+        if needs_plan:
+            with span('warehouse.plan', full_refresh=full_refresh):
+                plan = sqlmesh_context.plan(
+                    restate_models=INCREMENTAL_SOURCE_MODELS if full_refresh else None,
+                    ignore_cron=True,
+                    no_prompts=True,
+                )
+                if full_refresh:
+                    logging.info('Restating incremental models from the project start')
+                sqlmesh_context.apply(plan)
+        else:
+            logging.info('SQLMesh project unchanged, skipping plan')
+
+        with span('warehouse.run'):
+            _ = sqlmesh_context.run(ignore_cron=True)
+    finally:
+        # Releases the warehouse file so the state can be saved to it
+        sqlmesh_context.close()
+        set_console(previous_console)
+
+    save_warehouse_state(state)
+
+    load_run_metrics()
+    publish_build()
 
     if is_local_run:
-        copy_duckdb_file()
+        try:
+            export_dashboards_snapshot()
+        except Exception as e:
+            logging.error(f'Failed to export the dashboards snapshot for Evidence: {e}')
@@ -0,0 +1,127 @@
+"""Slim copy of the dashboard tables for the Evidence project.
+
+The warehouse file also holds every raw, cleaned and combined table and the
+SQLMesh state, none of which Evidence reads. The snapshot only has the tables
+Evidence's sources query, materialized under the same schema and table names,
+so the sources read it exactly as they would the warehouse.
+
+The snapshot is written next to the published one and renamed over it, so
+Evidence never sees a half-written file. A fingerprint of its contents is
+stored in the snapshot, and the export is skipped when it hasn't changed.
+"""
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import duckdb
+
+from src import project_root
+from src.utils.db_connection import DuckDBConnection
+
+SNAPSHOT_PATH = (
+    project_root / 'dashboards' / 'sources' / 'ynab_report' / 'ynab_report.duckdb'
+)
+
+SNAPSHOT_SCHEMAS = ('dashboards',)
+# Read by Evidence sources outside the dashboards schema
+SNAPSHOT_EXTRA_TABLES = ('combined.monthly_category_facts',)
+
+FINGERPRINT_KEY = 'fingerprint'
+
+
+def list_snapshot_tables(duckdb_con: DuckDBConnection) -> List[str]:
+    schema_list = ', '.join(f"'{schema}'" for schema in SNAPSHOT_SCHEMAS)
+    rows = duckdb_con.get_connection().execute(
+        f"""
+        select table_schema || '.' || table_name
+        from information_schema.tables
+        where table_catalog = current_database()
+            and table_schema in ({schema_list})
+        order by 1
+        """
+    )
+    return [table for (table,) in rows.fetchall()] + list(SNAPSHOT_EXTRA_TABLES)
+
+
+def fingerprint_tables(duckdb_con: DuckDBConnection, tables: List[str]) -> str:
+    """Hash each table's columns and rows, regardless of row order."""
+    digest = hashlib.sha256()
+    connection = duckdb_con.get_connection()
+    for table in tables:
+        columns = connection.execute(f'describe {table}').fetchall()
+        row_count, row_hash = connection.execute(
+            f'select count(*), sum(hash(t)::hugeint) from {table} as t'
+        ).fetchone()
+        digest.update(f'{table}|{columns}|{row_count}|{row_hash}'.encode())
+
+    return digest.hexdigest()
+
+
+def read_snapshot_fingerprint(
+    duckdb_con: DuckDBConnection, snapshot_path: Path
+) -> Optional[str]:
+    if not snapshot_path.exists():
+        return None
+
+    connection = duckdb_con.get_connection()
+    try:
+        connection.execute(f"attach '{snapshot_path}' as published (read_only)")
+    except duckdb.Error as e:
+        logging.warning(f'Could not read the dashboards snapshot, rewriting it: {e}')
+        return None
+
+    try:
+        row = connection.execute(
+            'select value from published.meta.snapshot_state where key = ?',
+            [FINGERPRINT_KEY],
+        ).fetchone()
+    except duckdb.CatalogException:
+        row = None
+    finally:
+        connection.execute('detach published')
+
+    return row[0] if row else None
+
+
+def export_dashboards_snapshot(snapshot_path: Path = SNAPSHOT_PATH) -> bool:
+    """Write the Evidence tables to `snapshot_path`, returning whether it changed."""
+    duckdb_con = DuckDBConnection(lazy_s3=True, read_only=True)
+    connection = duckdb_con.get_connection()
+    staging_path = snapshot_path.with_name(f'{snapshot_path.name}.tmp')
+
+    try:
+        tables = list_snapshot_tables(duckdb_con)
+        fingerprint = fingerprint_tables(duckdb_con, tables)
+        if fingerprint == read_snapshot_fingerprint(duckdb_con, snapshot_path):
+            logging.info('Dashboard tables unchanged, keeping the Evidence snapshot')
+            return False
+
+        staging_path.unlink(missing_ok=True)
+        connection.execute(f"attach '{staging_path}' as snapshot (read_only false)")
+        try:
+            for schema in sorted({table.split('.')[0] for table in tables} | {'meta'}):
+                connection.execute(f'create schema snapshot.{schema}')
+            for table in tables:
+                connection.execute(
+                    f'create table snapshot.{table} as select * from {table}'
+                )
+            connection.execute(
+                'create table snapshot.meta.snapshot_state (key varchar, value varchar)'
+            )
+            connection.execute(
+                'insert into snapshot.meta.snapshot_state values (?, ?)',
+                [FINGERPRINT_KEY, fingerprint],
+            )
+            # Leave nothing in a WAL file that the rename wouldn't carry along
+            connection.execute('checkpoint snapshot')
+        finally:
+            connection.execute('detach snapshot')
+    finally:
+        duckdb_con.close()
+
+    os.replace(staging_path, snapshot_path)
+    logging.info(f'Exported {len(tables)} dashboard tables to {snapshot_path}')
+    return True
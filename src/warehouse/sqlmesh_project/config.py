@@ -7,30 +7,52 @@ from sqlmesh.core.config import (
     ModelDefaultsConfig,
 )
 
-from src import project_root
+from src.utils.db_connection import (
+    BUILD_DATABASE_PATH,
+    DATABASE_PATH,
+    EXTENSION_DIRECTORY,
+)
+
+# A local stand-in for the bucket needs neither httpfs nor S3 credentials
+s3_settings = (
+    {}
+    if os.getenv('S3_LOCAL_ROOT')
+    else {
+        # Not listed under extensions, which SQLMesh installs before applying
+        # connector_config. Creating the secret autoloads httpfs instead, from
+        # the directory the Modal image installed it into
+        'connector_config': (
+            {'extension_directory': EXTENSION_DIRECTORY} if EXTENSION_DIRECTORY else {}
+        ),
+        'secrets': [
+            {
+                'type': 'S3',
+                'region': 'nyc3',
+                'endpoint': 'nyc3.digitaloceanspaces.com',
+                'key_id': os.getenv('READ_ACCESS_KEY_ID'),
+                'secret': os.getenv('READ_SECRET_ACCESS_KEY_ID'),
+            }
+        ],
+    }
+)
 
 config = Config(
-    model_defaults=ModelDefaultsConfig(dialect='duckdb'),
+    # Point at persistent storage to reuse parsed models across fresh containers
+    cache_dir=os.getenv('SQLMESH_CACHE_DIR'),
+    # Incremental models backfill from here on their first plan
+    model_defaults=ModelDefaultsConfig(dialect='duckdb', start='2015-01-01'),
     gateways={
+        # The published warehouse, for ad hoc use of the sqlmesh CLI
         'duckdb': GatewayConfig(
             connection=DuckDBConnectionConfig(
-                database=str(project_root / 'ynab_report.duckdb'),
-                extensions=[
-                    {'name': 'httpfs'},
-                ],
-                secrets=[
-                    {
-                        'type': 'S3',
-                        'region': 'nyc3',
-                        'endpoint': 'nyc3.digitaloceanspaces.com',
-                        'key_id': os.getenv('READ_ACCESS_KEY_ID'),
-                        'secret': os.getenv('READ_SECRET_ACCESS_KEY_ID'),
-                    }
-                ],
+                database=str(DATABASE_PATH), **s3_settings
             )
-        )
-    },
-    variables={
-        'sheet_name': 'Spending Dashboard',
+        ),
+        # The copy create_data_warehouse builds before publishing it
+        'build': GatewayConfig(
+            connection=DuckDBConnectionConfig(
+                database=str(BUILD_DATABASE_PATH), **s3_settings
+            )
+        ),
     },
 )
@@ -5,12 +5,24 @@ from sqlmesh import macro
 
 
 @macro()
-def get_s3_parquet_path(evaluator, file_name: str):
+def get_s3_parquet_path(evaluator, file_name: str, partitioned: bool = False):
     bucket_name = os.getenv('BUCKET_NAME')
+    # Matches s3_uri, so a local stand-in for the bucket is read from disk
+    local_root = os.getenv('S3_LOCAL_ROOT')
+    bucket_path = f'{local_root}/{bucket_name}' if local_root else f's3://{bucket_name}'
 
-    expr = exp.to_table(
-        f'read_parquet("s3://{bucket_name}/{file_name}.parquet")',
-        dialect=evaluator.dialect,
-    )
+    if partitioned:
+        # Hive-partitioned by year and month, so filters on those columns only
+        # read the matching partitions
+        expr = exp.to_table(
+            f"read_parquet('{bucket_path}/{file_name}/*/*/*.parquet', "
+            'hive_partitioning = true, union_by_name = true)',
+            dialect=evaluator.dialect,
+        )
+    else:
+        expr = exp.to_table(
+            f'read_parquet("{bucket_path}/{file_name}.parquet")',
+            dialect=evaluator.dialect,
+        )
 
     return expr
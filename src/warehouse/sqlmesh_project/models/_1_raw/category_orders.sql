@@ -0,0 +1,18 @@
+MODEL (
+  name raw.category_orders,
+  kind FULL,
+  grain id,
+  column_descriptions (
+    id = 'Row Id',
+    category_group = 'Category Group',
+    subcategory_group = 'Subcategory Group',
+    category_name = 'Category Name'
+  )
+);
+
+select
+    id::int as id
+    , category_group
+    , subcategory_group
+    , category_name
+from @get_s3_parquet_path('category-orders')
@@ -1,7 +1,8 @@
 MODEL (
   name raw.monthly_categories,
   kind FULL,
-  grain id
+  allow_partials true,
+  grain (id, year, month)
 );
 
 select
@@ -30,4 +31,4 @@ select
     , deleted
     , month
     , year
-from @get_s3_parquet_path('monthly-categories')
+from @get_s3_parquet_path('monthly-categories', true)
@@ -1,6 +1,10 @@
 MODEL (
   name raw.transactions,
-  kind FULL,
+  kind INCREMENTAL_BY_TIME_RANGE (
+    time_column (date, '%Y-%m-%d'),
+    lookback 62
+  ),
+  allow_partials true,
   grain id
 );
 
@@ -23,4 +27,7 @@ select
     , import_payee_name_original
     , debt_transaction_type
     , deleted
-from @get_s3_parquet_path('transactions')
+from @get_s3_parquet_path('transactions', true)
+where
+    make_date(year, month, 1) between date_trunc('month', @start_date) and @end_date
+    and date between @start_ds and @end_ds
@@ -1,7 +1,8 @@
 MODEL (
   name cleaned.monthly_categories,
   kind FULL,
-  grain id
+  allow_partials true,
+  grain (id, budget_month)
 );
 
 select
@@ -1,6 +1,10 @@
 MODEL (
   name cleaned.transactions,
-  kind FULL,
+  kind INCREMENTAL_BY_TIME_RANGE (
+    time_column transaction_date,
+    lookback 62
+  ),
+  allow_partials true,
   grain id
 );
 
@@ -14,7 +18,6 @@ select
     , import_payee_name as payee_name
     , flag_color
 from raw.transactions
-where category_id is not null
-order by
-    transaction_date desc
-    , amount desc
+where
+    category_id is not null
+    and date between @start_ds and @end_ds
@@ -1,6 +1,7 @@
 MODEL (
   name combined.budgeted,
   kind FULL,
+  allow_partials true,
   grain (budget_month, category_id)
 );
 
@@ -25,6 +26,3 @@ select
 from cleaned.monthly_categories as monthly_categories
 left join cleaned.category_groups as category_groups
     on monthly_categories.category_group_id = category_groups.id
-order by
-  budget_month desc
-  , category_id desc
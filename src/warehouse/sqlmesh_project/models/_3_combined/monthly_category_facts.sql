@@ -0,0 +1,75 @@
+MODEL (
+  name combined.monthly_category_facts,
+  kind FULL,
+  allow_partials true,
+  grain (budget_month, category_id)
+);
+
+with monthly_transactions as (
+    select
+        date_trunc('month', transaction_date)::date as transaction_month
+        , category_id
+        , count(*) as transaction_count
+        , sum(if(category_group_name_mapping = 'Income', amount, 0)) as income
+        , sum(if(category_name like '%HSA%', -1 * amount, 0)) as emergency_fund_in_hsa
+        , sum(if(category_group_name_mapping = 'Needs', amount, 0)) as needs_spend
+        , sum(if(category_group_name_mapping = 'Wants', amount, 0)) as wants_spend
+        , sum(if(category_group_name_mapping = 'Savings', amount, 0)) as savings_spend
+        , sum(if(category_group_name_mapping = 'Emergency Fund', amount, 0)) as emergency_fund_spend
+    from combined.transactions
+    group by
+        1
+        , 2
+)
+
+, monthly_budgeted as (
+    select
+        budget_month
+        , category_id
+        , category_group_id
+        , category_name
+        , category_group_name
+        , subcategory_group_name
+        , category_group_name_mapping
+        , budgeted
+        , activity
+        , balance
+        , emergency_fund_assigned
+        , savings_assigned
+        , investments_assigned
+        , emergency_fund_balance
+        , savings_balance
+        , investments_balance
+        , net_zero_balance
+    from combined.budgeted
+)
+
+select
+    coalesce(monthly_transactions.transaction_month, monthly_budgeted.budget_month) as budget_month
+    , coalesce(monthly_transactions.category_id, monthly_budgeted.category_id) as category_id
+    , monthly_budgeted.category_group_id
+    , monthly_budgeted.category_name
+    , monthly_budgeted.category_group_name
+    , monthly_budgeted.subcategory_group_name
+    , monthly_budgeted.category_group_name_mapping
+    , coalesce(monthly_transactions.transaction_count, 0) as transaction_count
+    , monthly_transactions.income
+    , monthly_transactions.needs_spend
+    , monthly_transactions.wants_spend
+    , monthly_transactions.savings_spend
+    , monthly_transactions.emergency_fund_spend
+    , monthly_transactions.emergency_fund_in_hsa
+    , monthly_budgeted.budgeted
+    , monthly_budgeted.activity
+    , monthly_budgeted.balance
+    , monthly_budgeted.emergency_fund_assigned
+    , monthly_budgeted.savings_assigned
+    , monthly_budgeted.investments_assigned
+    , monthly_budgeted.emergency_fund_balance
+    , monthly_budgeted.savings_balance
+    , monthly_budgeted.investments_balance
+    , monthly_budgeted.net_zero_balance
+from monthly_transactions
+full outer join monthly_budgeted
+    on monthly_transactions.transaction_month = monthly_budgeted.budget_month
+    and monthly_transactions.category_id = monthly_budgeted.category_id
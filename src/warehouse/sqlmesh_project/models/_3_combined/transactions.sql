@@ -1,6 +1,10 @@
 MODEL (
   name combined.transactions,
-  kind FULL,
+  kind INCREMENTAL_BY_TIME_RANGE (
+    time_column transaction_date,
+    lookback 62
+  ),
+  allow_partials true,
   grain id
 );
 
@@ -19,6 +23,7 @@ with all_transactions as (
     from cleaned.transactions as transactions
     left outer join cleaned.sub_transactions as subtransactions
         on transactions.id = subtransactions.transaction_id
+    where transactions.transaction_date between @start_ts and @end_ts
 )
 
 , transactions_int as (
@@ -51,4 +56,3 @@ left join cleaned.category_groups as category_groups
     on categories.category_group_id = category_groups.id
 left join cleaned.accounts as accounts
     on transactions_int.account_id = accounts.id
-order by transactions_int.transaction_date desc
@@ -21,7 +21,7 @@ with order_spine as (
         , category_name
         , sum(activity) as spend
         , sum(budgeted) as assigned
-    from combined.budgeted
+    from combined.monthly_category_facts
     where budget_year <= (select max(budget_year) from dashboards.yearly_level)
     and category_group_name_mapping not in ('Credit Card Payments', 'Income')
     group by
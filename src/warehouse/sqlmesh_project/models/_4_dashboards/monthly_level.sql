@@ -1,45 +1,16 @@
 MODEL (
   name dashboards.monthly_level,
-  kind FULL,
+  kind INCREMENTAL_BY_TIME_RANGE (
+    time_column budget_month,
+    lookback 3
+  ),
+  cron '@monthly',
+  description 'Income, spend and savings per month. Each run rebuilds the current month and the three before it, which covers the 62-day lookback of the transaction models even when the window starts just before a month boundary. Edits to older months, such as a paystub or budget change, stay stale until a full refresh.',
+  allow_partials true,
   grain budget_month
 );
 
-with monthly_transactions as (
-    select
-        date_trunc('month', transaction_date) as transaction_month
-        , category_id
-        , sum(if(category_group_name_mapping = 'Income', amount, 0)) as income
-        , sum(if(category_name like '%HSA%', -1 * amount, 0)) as emergency_fund_in_hsa
-        , sum(if(category_group_name_mapping = 'Needs', amount, 0)) as needs_spend
-        , sum(if(category_group_name_mapping = 'Wants', amount, 0)) as wants_spend
-        , sum(if(category_group_name_mapping = 'Savings', amount, 0)) as savings_spend
-        , sum(if(category_group_name_mapping = 'Emergency Fund', amount, 0)) as emergency_fund_spend
-    from combined.transactions
-    group by
-        1
-        , 2
-)
-
-, monthly_budgeted as (
-    select
-        budget_month
-        , category_id
-        , sum(budgeted) as budgeted
-        , sum(activity) as activity
-        , sum(emergency_fund_assigned) as emergency_fund_assigned
-        , sum(savings_assigned) as savings_assigned
-        , sum(investments_assigned) as investments_assigned
-        , sum(emergency_fund_balance) as emergency_fund_balance
-        , sum(savings_balance) as savings_balance
-        , sum(investments_balance) as investments_balance
-        , sum(net_zero_balance) as net_zero_balance
-    from combined.budgeted
-    group by
-        1
-        , 2
-)
-
-, monthly_paystubs as (
+with monthly_paystubs as (
     select
         date_trunc('month', pay_date) as pay_month
         , sum(earnings_actual) as earnings_actual
@@ -59,35 +30,36 @@ with monthly_transactions as (
 
 , monthly_transactions_and_budgeted as (
     select
-        category_monthly_spine.budget_month
-        , sum(monthly_transactions.income) as income
-        , sum(monthly_transactions.needs_spend) as needs_spend
-        , sum(monthly_transactions.wants_spend) as wants_spend
-        , sum(monthly_transactions.savings_spend) as savings_spend
-        , sum(monthly_transactions.emergency_fund_spend) as emergency_fund_spend
-        , sum(monthly_budgeted.savings_assigned) as savings_assigned
-        , sum(monthly_budgeted.emergency_fund_assigned) as emergency_fund_assigned
-        , sum(monthly_budgeted.investments_assigned) as investments_assigned
-        , sum(monthly_transactions.emergency_fund_in_hsa) as emergency_fund_in_hsa
-        , sum(monthly_transactions.needs_spend + monthly_transactions.wants_spend + monthly_transactions.savings_spend + monthly_transactions.emergency_fund_spend) as spent
-    from combined.record_spine as category_monthly_spine
-    left join monthly_transactions
-        on category_monthly_spine.category_id = monthly_transactions.category_id
-        and category_monthly_spine.budget_month = monthly_transactions.transaction_month
-    left join monthly_budgeted
-        on category_monthly_spine.budget_month = monthly_budgeted.budget_month
-        and category_monthly_spine.category_id = monthly_budgeted.category_id
+        budget_month
+        , sum(income) as income
+        , sum(needs_spend) as needs_spend
+        , sum(wants_spend) as wants_spend
+        , sum(savings_spend) as savings_spend
+        , sum(emergency_fund_spend) as emergency_fund_spend
+        , sum(savings_assigned) as savings_assigned
+        , sum(emergency_fund_assigned) as emergency_fund_assigned
+        , sum(investments_assigned) as investments_assigned
+        , sum(emergency_fund_in_hsa) as emergency_fund_in_hsa
+        , sum(needs_spend + wants_spend + savings_spend + emergency_fund_spend) as spent
+    from combined.monthly_category_facts
+    -- Known categories from the first transaction's month to the current one
+    where
+        category_id in (select id from cleaned.categories)
+        and budget_month between
+            (select min(budget_month) from combined.monthly_category_facts where transaction_count > 0)
+            and date_trunc('month', current_date)
+        and budget_month between @start_date and @end_date
     group by 1
 )
+
 , date_range as (
     select
         least(
-            (select min(transaction_month) from monthly_transactions),
-            (select min(budget_month) from monthly_budgeted),
+            (select min(budget_month) from combined.monthly_category_facts),
             (select min(pay_month) from monthly_paystubs)
         ) as min_date,
         greatest(
-            (select max(transaction_month) from monthly_transactions),
+            (select max(budget_month) from combined.monthly_category_facts where transaction_count > 0),
             (select max(pay_month) from monthly_paystubs)
         ) as max_date
 )
@@ -101,6 +73,7 @@ with monthly_transactions as (
             (select max_date from date_range)::date,
             interval '1 month'
         ) as months
+    where generate_series between @start_date and @end_date
 )
 
 select
@@ -133,4 +106,3 @@ left join monthly_transactions_and_budgeted as monthly_transactions
     on monthly_date_spine.budget_month = monthly_transactions.budget_month
 left join monthly_paystubs
     on monthly_date_spine.budget_month = monthly_paystubs.pay_month
-order by monthly_date_spine.budget_month desc
@@ -0,0 +1,177 @@
+"""Local stand-ins for external services used in tests."""
+
+import copy
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from unittest.mock import MagicMock
+
+from gspread import Worksheet
+from gspread.exceptions import APIError, WorksheetNotFound
+from gspread.http_client import HTTPClient
+from gspread.utils import a1_to_rowcol
+from requests.structures import CaseInsensitiveDict
+
+Cell = Tuple[int, int]
+
+
+def api_error(status_code: int, retry_after: Optional[str] = None) -> APIError:
+    response = MagicMock()
+    response.status_code = status_code
+    # Case-insensitive like the headers of a real requests response
+    response.headers = CaseInsensitiveDict(
+        {'Retry-After': retry_after} if retry_after else {}
+    )
+    return APIError(response)
+
+
+def _split_range(range_name: str) -> Tuple[str, str]:
+    title, _, cells = range_name.rpartition('!')
+    return title.strip("'"), cells
+
+
+class FakeSpreadsheet:
+    """In-memory spreadsheet implementing the gspread calls the refresh makes.
+
+    Values, sheets and developer metadata are kept so repeated refreshes see
+    the result of earlier ones. Every API call is recorded in `calls`, and
+    `errors` can be filled with exceptions to raise from the next calls.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.id = 'fake-spreadsheet'
+        self.client = MagicMock(spec=HTTPClient)
+        self.latency = latency
+        self.sheets: Dict[int, Dict[str, Any]] = {}
+        self.values: Dict[str, Dict[Cell, Any]] = {}
+        self.calls: List[Tuple[str, Any]] = []
+        self.errors: List[Exception] = []
+        self.max_active = 0
+        self._active = 0
+        self._next_sheet_id = 1
+        self._revision = 0
+        self._lock = threading.Lock()
+
+    def _call(self, name: str, payload: Any) -> None:
+        with self._lock:
+            self.calls.append((name, payload))
+            self._active += 1
+            self.max_active = max(self.max_active, self._active)
+            error = self.errors.pop(0) if self.errors else None
+        try:
+            time.sleep(self.latency)
+            if error is not None:
+                raise error
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def call_names(self) -> List[str]:
+        return [name for name, _ in self.calls]
+
+    def get_lastUpdateTime(self) -> str:
+        """A stand-in for Drive's modifiedTime that changes with every write."""
+        self._call('get_lastUpdateTime', None)
+        return f'revision-{self._revision}'
+
+    def _worksheet(self, sheet_id: int) -> Worksheet:
+        properties = self.sheets[sheet_id]['properties']
+        return Worksheet(self, copy.deepcopy(properties), self.id, self.client)
+
+    def _add_sheet(self, properties: Dict[str, Any]) -> int:
+        sheet_id = properties.get('sheetId')
+        if sheet_id is None:
+            sheet_id = self._next_sheet_id
+        self._next_sheet_id = max(self._next_sheet_id, sheet_id + 1)
+        grid = properties.get('gridProperties', {})
+        self.sheets[sheet_id] = {
+            'properties': {
+                'sheetId': sheet_id,
+                'title': properties['title'],
+                'index': properties.get('index', len(self.sheets)),
+                'gridProperties': {
+                    'rowCount': grid.get('rowCount', 1000),
+                    'columnCount': grid.get('columnCount', 26),
+                },
+            },
+            'developerMetadata': [],
+        }
+        self.values[properties['title']] = {}
+        return sheet_id
+
+    def _delete_sheet(self, sheet_id: int) -> None:
+        sheet = self.sheets.pop(sheet_id)
+        self.values.pop(sheet['properties']['title'], None)
+
+    def add_worksheet(self, title: str, rows: int, cols: int) -> Worksheet:
+        self._call('add_worksheet', title)
+        sheet_id = self._add_sheet(
+            {'title': title, 'gridProperties': {'rowCount': rows, 'columnCount': cols}}
+        )
+        return self._worksheet(sheet_id)
+
+    def worksheet(self, title: str) -> Worksheet:
+        self._call('worksheet', title)
+        for sheet_id, sheet in self.sheets.items():
+            if sheet['properties']['title'] == title:
+                return self._worksheet(sheet_id)
+        raise WorksheetNotFound(title)
+
+    def worksheets(self) -> List[Worksheet]:
+        self._call('worksheets', None)
+        return [self._worksheet(sheet_id) for sheet_id in self.sheets]
+
+    def del_worksheet(self, worksheet: Worksheet) -> None:
+        self._call('del_worksheet', worksheet.title)
+        self._delete_sheet(worksheet.id)
+
+    def fetch_sheet_metadata(self, params: Optional[Dict] = None) -> Dict[str, Any]:
+        self._call('fetch_sheet_metadata', params)
+        return {'sheets': copy.deepcopy(list(self.sheets.values()))}
+
+    def values_batch_get(
+        self, ranges: List[str], params: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        self._call('values_batch_get', ranges)
+        value_ranges = []
+        for range_name in ranges:
+            grid = self.values.get(range_name.strip("'"), {})
+            rows = [[] for _ in range(max((row for row, _ in grid), default=0))]
+            for (row, col), value in sorted(grid.items()):
+                cells = rows[row - 1]
+                cells.extend([''] * (col - 1 - len(cells)))
+                cells.append(value)
+            value_ranges.append({'range': range_name, 'values': rows})
+        return {'valueRanges': value_ranges}
+
+    def values_batch_update(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        self._call('values_batch_update', body)
+        with self._lock:
+            self._revision += 1
+            for update in body['data']:
+                title, cells = _split_range(update['range'])
+                start_row, start_col = a1_to_rowcol(cells.split(':')[0])
+                grid = self.values.setdefault(title, {})
+                for row_offset, row in enumerate(update['values']):
+                    for col_offset, value in enumerate(row):
+                        cell = (start_row + row_offset, start_col + col_offset)
+                        if value in ('', None):
+                            grid.pop(cell, None)
+                        else:
+                            grid[cell] = value
+        return {'responses': []}
+
+    def batch_update(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        self._call('batch_update', body)
+        with self._lock:
+            self._revision += 1
+            for request in body['requests']:
+                if 'deleteSheet' in request:
+                    self._delete_sheet(request['deleteSheet']['sheetId'])
+                elif 'addSheet' in request:
+                    self._add_sheet(request['addSheet']['properties'])
+                elif 'createDeveloperMetadata' in request:
+                    metadata = request['createDeveloperMetadata']['developerMetadata']
+                    sheet = self.sheets[metadata['location']['sheetId']]
+                    sheet['developerMetadata'].append(copy.deepcopy(metadata))
+        return {'replies': []}
@@ -1,10 +1,20 @@
 """Tests for the SheetBatcher module."""
 
+from datetime import date
 from unittest.mock import MagicMock
 
 import pytest
+from gspread.exceptions import APIError
+from gspread.http_client import HTTPClient
 
-from src.sheets.batcher import SheetBatcher
+from src.sheets.batcher import (
+    FORMAT_HASH_METADATA_KEY,
+    SheetBatcher,
+    _cells_equal,
+    compact_requests,
+)
+from src.sheets.refresh_sheets import MONTH_LABEL_FORMAT, queue_overview_borders
+from tests.fakes import FakeSpreadsheet, api_error
 
 
 @pytest.fixture
@@ -219,14 +229,9 @@ class TestFlush:
 
 class TestRetryLogic:
     def test_retry_on_503(self, mock_spreadsheet):
-        from gspread.exceptions import APIError
-
-        mock_response = MagicMock()
-        mock_response.status_code = 503
-
         mock_spreadsheet.values_batch_update.side_effect = [
-            APIError(mock_response),
-            APIError(mock_response),
+            api_error(503),
+            api_error(503),
             {'responses': []},
         ]
 
@@ -237,13 +242,8 @@ class TestRetryLogic:
         assert mock_spreadsheet.values_batch_update.call_count == 3
 
     def test_retry_on_429(self, mock_spreadsheet):
-        from gspread.exceptions import APIError
-
-        mock_response = MagicMock()
-        mock_response.status_code = 429
-
         mock_spreadsheet.values_batch_update.side_effect = [
-            APIError(mock_response),
+            api_error(429),
             {'responses': []},
         ]
 
@@ -254,12 +254,7 @@ class TestRetryLogic:
         assert mock_spreadsheet.values_batch_update.call_count == 2
 
     def test_no_retry_on_400(self, mock_spreadsheet):
-        from gspread.exceptions import APIError
-
-        mock_response = MagicMock()
-        mock_response.status_code = 400
-
-        mock_spreadsheet.values_batch_update.side_effect = APIError(mock_response)
+        mock_spreadsheet.values_batch_update.side_effect = api_error(400)
 
         batcher = SheetBatcher(mock_spreadsheet, base_delay=0.01)
         batcher.queue_values('Sheet1!A1', [['test']])
@@ -270,12 +265,7 @@ class TestRetryLogic:
         assert mock_spreadsheet.values_batch_update.call_count == 1
 
     def test_max_retries_exceeded(self, mock_spreadsheet):
-        from gspread.exceptions import APIError
-
-        mock_response = MagicMock()
-        mock_response.status_code = 503
-
-        mock_spreadsheet.values_batch_update.side_effect = APIError(mock_response)
+        mock_spreadsheet.values_batch_update.side_effect = api_error(503)
 
         batcher = SheetBatcher(mock_spreadsheet, max_retries=3, base_delay=0.01)
         batcher.queue_values('Sheet1!A1', [['test']])
@@ -331,5 +321,536 @@ class TestApiCallReduction:
         values_call = mock_spreadsheet.values_batch_update.call_args[0][0]
         assert len(values_call['data']) == 10
 
+        # The 20 adjoining formats and 10 notes are each compacted into one
         batch_call = mock_spreadsheet.batch_update.call_args[0][0]
-        assert len(batch_call['requests']) == 35  # 20 formats + 5 widths + 10 notes
+        assert len(batch_call['requests']) == 7  # 1 format + 5 widths + 1 notes
+
+
+def _sheet_metadata(sheet_id, title, rows, cols, format_hash=None):
+    sheet = {
+        'properties': {
+            'sheetId': sheet_id,
+            'title': title,
+            'index': 0,
+            'gridProperties': {'rowCount': rows, 'columnCount': cols},
+        }
+    }
+    if format_hash is not None:
+        sheet['developerMetadata'] = [
+            {'metadataKey': FORMAT_HASH_METADATA_KEY, 'metadataValue': format_hash}
+        ]
+    return sheet
+
+
+def _queue_dashboard(batcher, worksheet, values):
+    batcher.queue_values(f'{worksheet.title}!B2', values)
+    batcher.queue_format('B2:C2', {'bold': True}, worksheet)
+    batcher.queue_columns_auto_resize(2, 4, worksheet)
+
+
+class TestIncrementalRefresh:
+    def _format_hash(self, values):
+        """Hash that a full refresh of the dashboard saves on the sheet."""
+        batcher = SheetBatcher(self._spreadsheet(None, []), incremental=True)
+        worksheet = batcher.reuse_worksheet('Dash', 5, 4)
+        _queue_dashboard(batcher, worksheet, values)
+        return batcher._format_hash(7, 5, 4)
+
+    def _spreadsheet(self, format_hash, current_values):
+        spreadsheet = MagicMock()
+        spreadsheet.client = MagicMock(spec=HTTPClient)
+        spreadsheet.fetch_sheet_metadata.return_value = {
+            'sheets': [_sheet_metadata(7, 'Dash', 5, 4, format_hash)]
+        }
+        spreadsheet.values_batch_get.return_value = {
+            'valueRanges': [{'values': current_values}]
+        }
+        return spreadsheet
+
+    def test_reuse_disabled_outside_incremental_mode(self, mock_spreadsheet):
+        batcher = SheetBatcher(mock_spreadsheet)
+
+        assert batcher.reuse_worksheet('Dash', 5, 4) is None
+        mock_spreadsheet.fetch_sheet_metadata.assert_not_called()
+
+    def test_unknown_sheet_not_reused(self):
+        spreadsheet = self._spreadsheet(None, [])
+        batcher = SheetBatcher(spreadsheet, incremental=True)
+
+        assert batcher.reuse_worksheet('Other', 5, 4) is None
+
+    def test_unchanged_sheet_makes_no_writes(self):
+        values = [['Name', 'Spend'], ['Rent', 1200]]
+        spreadsheet = self._spreadsheet(
+            self._format_hash(values), [[], ['', 'Name', 'Spend'], ['', 'Rent', 1200]]
+        )
+
+        with SheetBatcher(spreadsheet, incremental=True) as batcher:
+            worksheet = batcher.reuse_worksheet('Dash', 5, 4)
+            _queue_dashboard(batcher, worksheet, values)
+
+        spreadsheet.fetch_sheet_metadata.assert_called_once()
+        spreadsheet.values_batch_get.assert_called_once()
+        spreadsheet.values_batch_update.assert_not_called()
+        spreadsheet.batch_update.assert_not_called()
+
+    def test_dates_and_number_text_match_stored_values(self):
+        values = [['Month', 'Spend'], ['2025-01-05', '1200.50']]
+        # Read back unformatted, as Sheets stores what USER_ENTERED parsed
+        stored_date = (date(2025, 1, 5) - date(1899, 12, 30)).days
+        spreadsheet = self._spreadsheet(
+            self._format_hash(values),
+            [[], ['', 'Month', 'Spend'], ['', stored_date, 1200.5]],
+        )
+
+        with SheetBatcher(spreadsheet, incremental=True) as batcher:
+            worksheet = batcher.reuse_worksheet('Dash', 5, 4)
+            _queue_dashboard(batcher, worksheet, values)
+
+        params = spreadsheet.values_batch_get.call_args.kwargs['params']
+        assert params['dateTimeRenderOption'] == 'SERIAL_NUMBER'
+        spreadsheet.values_batch_update.assert_not_called()
+
+    def test_overview_month_label_matches_stored_date(self):
+        label = date(2024, 1, 1).strftime(MONTH_LABEL_FORMAT)
+
+        # What Sheets stores for the label in the overview's date column
+        assert _cells_equal(label, 45292)
+        assert not _cells_equal(label, 45323)
+
+    def test_only_changed_cells_written(self):
+        values = [['Name', 'Spend'], ['Rent', 1300], ['Food', 400]]
+        spreadsheet = self._spreadsheet(
+            self._format_hash(values),
+            [[], ['', 'Name', 'Spend'], ['', 'Rent', 1200], ['', 'Food', 400]],
+        )
+
+        with SheetBatcher(spreadsheet, incremental=True) as batcher:
+            worksheet = batcher.reuse_worksheet('Dash', 5, 4)
+            _queue_dashboard(batcher, worksheet, values)
+
+        data = spreadsheet.values_batch_update.call_args[0][0]['data']
+        assert data == [{'range': "'Dash'!C3:C3", 'values': [[1300]]}]
+
+        # Formats are already on the sheet, but the column widths may change
+        requests = spreadsheet.batch_update.call_args[0][0]['requests']
+        assert [next(iter(request)) for request in requests] == ['autoResizeDimensions']
+
+    def test_stale_cells_cleared(self):
+        values = [['Name', 'Spend']]
+        spreadsheet = self._spreadsheet(
+            self._format_hash(values),
+            [[], ['', 'Name', 'Spend'], ['', 'Rent', 1200]],
+        )
+
+        with SheetBatcher(spreadsheet, incremental=True) as batcher:
+            worksheet = batcher.reuse_worksheet('Dash', 5, 4)
+            _queue_dashboard(batcher, worksheet, values)
+
+        data = spreadsheet.values_batch_update.call_args[0][0]['data']
+        assert data == [{'range': "'Dash'!B3:C3", 'values': [['', '']]}]
+
+    def test_changed_layout_recreates_sheet(self):
+        values = [['Name', 'Spend']]
+        spreadsheet = self._spreadsheet('old-hash', [[], ['', 'Name', 'Spend']])
+
+        with SheetBatcher(spreadsheet, incremental=True) as batcher:
+            worksheet = batcher.reuse_worksheet('Dash', 5, 4)
+            _queue_dashboard(batcher, worksheet, values)
+
+        spreadsheet.values_batch_get.assert_not_called()
+        recreate, formats = [
+            call[0][0]['requests'] for call in spreadsheet.batch_update.call_args_list
+        ]
+        assert [next(iter(request)) for request in recreate] == [
+            'deleteSheet',
+            'addSheet',
+            'createDeveloperMetadata',
+        ]
+        assert recreate[1]['addSheet']['properties']['sheetId'] == 7
+        assert recreate[2]['createDeveloperMetadata']['developerMetadata'][
+            'metadataValue'
+        ] == self._format_hash(values)
+        assert len(formats) == 2
+        spreadsheet.values_batch_update.assert_called_once()
+
+    def test_new_sheet_saves_format_hash(self, mock_spreadsheet, mock_worksheet):
+        values = [['Name', 'Spend']]
+
+        with SheetBatcher(mock_spreadsheet) as batcher:
+            batcher.register_worksheet(mock_worksheet, 5, 4)
+            _queue_dashboard(batcher, mock_worksheet, values)
+
+        requests = mock_spreadsheet.batch_update.call_args[0][0]['requests']
+        assert 'createDeveloperMetadata' in requests[-1]
+
+
+class TestFingerprints:
+    def _spreadsheet(self):
+        spreadsheet = MagicMock()
+        spreadsheet.client = MagicMock(spec=HTTPClient)
+        spreadsheet.fetch_sheet_metadata.return_value = {
+            'sheets': [_sheet_metadata(7, 'Dash', 5, 4)]
+        }
+        return spreadsheet
+
+    def _refresh(self, spreadsheet, values, fingerprints=None):
+        with SheetBatcher(
+            spreadsheet, incremental=True, fingerprints=fingerprints
+        ) as batcher:
+            worksheet = batcher.reuse_worksheet('Dash', 5, 4)
+            _queue_dashboard(batcher, worksheet, values)
+            batcher.queue_values('Dash!B1', [['Last Updated: now']], volatile=True)
+        return batcher.fingerprints
+
+    def test_unchanged_sheet_skipped(self):
+        values = [['Name', 'Spend'], ['Rent', 1200]]
+        fingerprints = self._refresh(self._spreadsheet(), values)
+
+        spreadsheet = self._spreadsheet()
+        assert self._refresh(spreadsheet, values, fingerprints) == fingerprints
+
+        spreadsheet.values_batch_get.assert_not_called()
+        spreadsheet.values_batch_update.assert_not_called()
+        spreadsheet.batch_update.assert_not_called()
+
+    def test_changed_sheet_written(self):
+        fingerprints = self._refresh(self._spreadsheet(), [['Rent', 1200]])
+
+        spreadsheet = self._spreadsheet()
+        new_fingerprints = self._refresh(spreadsheet, [['Rent', 1300]], fingerprints)
+
+        assert new_fingerprints['Dash'] != fingerprints['Dash']
+        spreadsheet.batch_update.assert_called()
+
+    def test_before_write_only_called_with_writes(self):
+        values = [['Name', 'Spend'], ['Rent', 1200]]
+        calls = []
+        fingerprints = self._refresh(self._spreadsheet(), values)
+
+        with SheetBatcher(
+            self._spreadsheet(),
+            incremental=True,
+            fingerprints=fingerprints,
+            before_write=lambda: calls.append('unchanged'),
+        ) as batcher:
+            _queue_dashboard(batcher, batcher.reuse_worksheet('Dash', 5, 4), values)
+        with SheetBatcher(
+            self._spreadsheet(),
+            incremental=True,
+            fingerprints=fingerprints,
+            before_write=lambda: calls.append('changed'),
+        ) as batcher:
+            _queue_dashboard(
+                batcher, batcher.reuse_worksheet('Dash', 5, 4), [['Rent', 1300]]
+            )
+
+        assert calls == ['changed']
+
+    def test_new_sheet_not_skipped(self, mock_spreadsheet, mock_worksheet):
+        fingerprints = {'Sheet1': 'anything'}
+
+        with SheetBatcher(mock_spreadsheet, fingerprints=fingerprints) as batcher:
+            batcher.queue_values('Sheet1!A1', [['test']])
+
+        mock_spreadsheet.values_batch_update.assert_called_once()
+        assert set(batcher.fingerprints) == {'Sheet1'}
+
+
+class RecordingLimiter:
+    """Rate limiter that never blocks and records pauses."""
+
+    def __init__(self):
+        self.acquired = 0
+        self.pauses = []
+
+    def acquire(self):
+        self.acquired += 1
+
+    def pause(self, seconds):
+        self.pauses.append(seconds)
+
+
+class TestConcurrentFlush:
+    def _queue_sheets(self, batcher, spreadsheet, sheet_count):
+        for i in range(sheet_count):
+            worksheet = spreadsheet.add_worksheet(f'Sheet {i}', 50, 5)
+            batcher.register_worksheet(worksheet)
+            for row in range(1, 41):
+                batcher.queue_values(f'Sheet {i}!A{row}', [[row, i]])
+            batcher.queue_format('A1:B1', {'bold': True}, worksheet)
+            batcher.queue_columns_auto_resize(1, 3, worksheet)
+
+    def test_chunks_sent_in_parallel(self):
+        spreadsheet = FakeSpreadsheet(latency=0.05)
+        batcher = SheetBatcher(spreadsheet, rate_limiter=RecordingLimiter())
+        self._queue_sheets(batcher, spreadsheet, 5)
+
+        batcher.flush()
+
+        assert spreadsheet.max_active > 1
+        assert spreadsheet.call_names().count('values_batch_update') == 2
+        assert spreadsheet.values['Sheet 4'][(40, 2)] == 4
+
+    def test_auto_resize_after_values(self):
+        spreadsheet = FakeSpreadsheet(latency=0.01)
+        batcher = SheetBatcher(spreadsheet, rate_limiter=RecordingLimiter())
+        self._queue_sheets(batcher, spreadsheet, 5)
+
+        batcher.flush()
+
+        names = spreadsheet.call_names()
+        resize_calls = [
+            i
+            for i, (name, body) in enumerate(spreadsheet.calls)
+            if name == 'batch_update'
+            and any('autoResizeDimensions' in r for r in body['requests'])
+        ]
+        last_values_call = max(
+            i for i, name in enumerate(names) if name == 'values_batch_update'
+        )
+        assert resize_calls
+        assert min(resize_calls) > last_values_call
+
+    def test_requests_for_a_sheet_stay_in_order(self):
+        spreadsheet = FakeSpreadsheet()
+        batcher = SheetBatcher(spreadsheet, rate_limiter=RecordingLimiter())
+        worksheet = spreadsheet.add_worksheet('Big', 300, 5)
+        batcher.register_worksheet(worksheet)
+        # Alternating formats can't be merged
+        for row in range(1, 251):
+            batcher.queue_format(f'A{row}', {'bold': row % 2 == 0}, worksheet)
+
+        batcher.flush()
+
+        rows = [
+            request['repeatCell']['range']['startRowIndex']
+            for name, body in spreadsheet.calls
+            if name == 'batch_update'
+            for request in body['requests']
+        ]
+        assert rows == list(range(250))
+
+    def test_429_pauses_limiter_for_retry_after(self):
+        spreadsheet = FakeSpreadsheet()
+        spreadsheet.errors = [api_error(429, retry_after='7')]
+        limiter = RecordingLimiter()
+
+        with SheetBatcher(spreadsheet, rate_limiter=limiter) as batcher:
+            batcher.queue_values('Sheet!A1', [['test']])
+
+        assert limiter.pauses == [7.0]
+        assert spreadsheet.call_names() == ['values_batch_update'] * 2
+        assert limiter.acquired == 2
+
+    def test_failure_propagates(self):
+        spreadsheet = FakeSpreadsheet()
+        spreadsheet.errors = [api_error(400)]
+
+        batcher = SheetBatcher(spreadsheet, rate_limiter=RecordingLimiter())
+        batcher.queue_values('Sheet!A1', [['test']])
+
+        with pytest.raises(APIError):
+            batcher.flush()
+
+
+def _border_edges(requests):
+    """Apply updateBorders requests to a model of the grid's cell edges."""
+    edges = {}
+    for request in requests:
+        body = request['updateBorders']
+        grid_range = body['range']
+        rows = range(grid_range['startRowIndex'], grid_range['endRowIndex'])
+        cols = range(grid_range['startColumnIndex'], grid_range['endColumnIndex'])
+        for side in ('top', 'bottom', 'left', 'right'):
+            if side not in body:
+                continue
+            if side == 'top':
+                keys = [('h', rows.start, col) for col in cols]
+            elif side == 'bottom':
+                keys = [('h', rows.stop, col) for col in cols]
+            elif side == 'left':
+                keys = [('v', row, cols.start) for row in rows]
+            else:
+                keys = [('v', row, cols.stop) for row in rows]
+            for key in keys:
+                edges[key] = body[side]['style']
+    return edges
+
+
+class TestCompactRequests:
+    def test_overview_borders_fold_without_changing_result(self, mock_spreadsheet):
+        batcher = SheetBatcher(mock_spreadsheet)
+        queue_overview_borders(batcher, 0, 20)
+        requests = batcher._batch_requests
+
+        compacted = compact_requests(requests)
+
+        assert len(compacted) < len(requests) / 2
+        assert _border_edges(compacted) == _border_edges(requests)
+
+    def test_borders_not_moved_past_overlapping_request(self, mock_spreadsheet):
+        batcher = SheetBatcher(mock_spreadsheet)
+        batcher.queue_border('A1', {'left': {'style': 'SOLID'}}, 0)
+        batcher.queue_border('A1', {'left': {'style': 'DOTTED'}}, 0)
+        batcher.queue_border('A1', {'top': {'style': 'SOLID'}}, 0)
+
+        compacted = compact_requests(batcher._batch_requests)
+
+        assert len(compacted) == 1
+        assert compacted[0]['updateBorders']['left']['style'] == 'DOTTED'
+        assert compacted[0]['updateBorders']['top']['style'] == 'SOLID'
+
+    def test_adjoining_formats_merged(self, mock_spreadsheet):
+        batcher = SheetBatcher(mock_spreadsheet)
+        batcher.queue_format('B3:C10', {'bold': True}, 0)
+        batcher.queue_format('D3:D10', {'bold': True}, 0)
+        batcher.queue_format('B11:D', {'bold': True}, 0)
+        batcher.queue_format('B2:D2', {'italic': True}, 0)
+
+        compacted = compact_requests(batcher._batch_requests)
+
+        assert len(compacted) == 2
+        assert compacted[0]['repeatCell']['range'] == {
+            'startRowIndex': 2,
+            'startColumnIndex': 1,
+            'endColumnIndex': 4,
+            'sheetId': 0,
+        }
+
+    def test_format_not_merged_past_overlapping_request(self, mock_spreadsheet):
+        batcher = SheetBatcher(mock_spreadsheet)
+        batcher.queue_format('A1:A5', {'bold': True}, 0)
+        batcher.queue_format('A6', {'bold': False}, 0)
+        batcher.queue_format('A6:A10', {'bold': True}, 0)
+
+        compacted = compact_requests(batcher._batch_requests)
+
+        assert len(compacted) == 3
+
+    def test_adjoining_notes_written_with_one_update(self, mock_spreadsheet):
+        batcher = SheetBatcher(mock_spreadsheet)
+        batcher.queue_notes({'B2': 'first', 'C2': 'second', 'B3': 'third'}, 0)
+        batcher.queue_notes({'C3': 'fourth'}, 0)
+        batcher.queue_notes({'A1': 'other sheet'}, 1)
+
+        compacted = compact_requests(batcher._batch_requests)
+
+        assert len(compacted) == 2
+        update = compacted[0]['updateCells']
+        assert update['fields'] == 'note'
+        assert update['range'] == {
+            'startRowIndex': 1,
+            'endRowIndex': 3,
+            'startColumnIndex': 1,
+            'endColumnIndex': 3,
+            'sheetId': 0,
+        }
+        assert update['rows'] == [
+            {'values': [{'note': 'first'}, {'note': 'second'}]},
+            {'values': [{'note': 'third'}, {'note': 'fourth'}]},
+        ]
+
+    def test_notes_with_gap_never_cover_other_cells(self, mock_spreadsheet):
+        batcher = SheetBatcher(mock_spreadsheet)
+        batcher.queue_notes({'B2': 'first', 'D2': 'second', 'D3': 'third'}, 0)
+
+        compacted = compact_requests(batcher._batch_requests)
+
+        # C2 and B3 may hold notes of their own, which fields='note' would clear
+        ranges = [request['updateCells']['range'] for request in compacted]
+        assert ranges == [
+            {
+                'startRowIndex': 1,
+                'endRowIndex': 2,
+                'startColumnIndex': 1,
+                'endColumnIndex': 2,
+                'sheetId': 0,
+            },
+            {
+                'startRowIndex': 1,
+                'endRowIndex': 3,
+                'startColumnIndex': 3,
+                'endColumnIndex': 4,
+                'sheetId': 0,
+            },
+        ]
+        assert all(
+            'note' in value
+            for request in compacted
+            for row in request['updateCells']['rows']
+            for value in row['values']
+        )
+
+
+class TestQueuedWorksheets:
+    def test_sheets_created_in_one_call(self):
+        spreadsheet = FakeSpreadsheet()
+        spreadsheet.add_worksheet('Old', 10, 5)
+        spreadsheet.values['Old'][(1, 1)] = 'stale'
+        spreadsheet.calls.clear()
+
+        with SheetBatcher(spreadsheet, rate_limiter=RecordingLimiter()) as batcher:
+            old = batcher.queue_worksheet('Old', 20, 4)
+            new = batcher.queue_worksheet('New', 30, 6)
+            for worksheet in (old, new):
+                batcher.queue_values(f'{worksheet.title}!A1', [['value']])
+                batcher.queue_format('A1', {'bold': True}, worksheet)
+
+        assert spreadsheet.call_names() == [
+            'fetch_sheet_metadata',
+            'batch_update',
+            'values_batch_update',
+            'batch_update',
+        ]
+        structural = spreadsheet.calls[1][1]['requests']
+        assert [next(iter(request)) for request in structural] == [
+            'deleteSheet',
+            'addSheet',
+            'addSheet',
+        ]
+
+        # The replaced sheet keeps its id, the new one gets an unused id
+        assert old.id == 1
+        assert new.id == 2
+        assert spreadsheet.sheets[1]['properties']['gridProperties'] == {
+            'rowCount': 20,
+            'columnCount': 4,
+        }
+        assert spreadsheet.values['Old'] == {(1, 1): 'value'}
+        assert spreadsheet.values['New'] == {(1, 1): 'value'}
+
+    def test_title_lookup_uses_metadata(self):
+        spreadsheet = FakeSpreadsheet()
+        spreadsheet.add_worksheet('Existing', 10, 5)
+        spreadsheet.calls.clear()
+
+        batcher = SheetBatcher(spreadsheet, rate_limiter=RecordingLimiter())
+        batcher.queue_format('A1', {'bold': True}, 'Existing')
+        batcher.queue_format('A2', {'italic': True}, 'Existing')
+
+        assert spreadsheet.call_names() == ['fetch_sheet_metadata']
+
+    def test_incremental_refresh_round_trip(self):
+        spreadsheet = FakeSpreadsheet()
+
+        def refresh(values):
+            with SheetBatcher(
+                spreadsheet, incremental=True, rate_limiter=RecordingLimiter()
+            ) as batcher:
+                worksheet = batcher.queue_worksheet('Dash', 5, 4)
+                _queue_dashboard(batcher, worksheet, values)
+
+        refresh([['Name', 'Spend'], ['Rent', 1200]])
+        spreadsheet.calls.clear()
+        refresh([['Name', 'Spend'], ['Rent', 1300]])
+
+        assert spreadsheet.call_names() == [
+            'fetch_sheet_metadata',
+            'values_batch_get',
+            'values_batch_update',
+            'batch_update',
+        ]
+        assert spreadsheet.calls[2][1]['data'] == [
+            {'range': "'Dash'!C3:C3", 'values': [[1300]]}
+        ]
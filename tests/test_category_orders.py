@@ -0,0 +1,81 @@
+"""Tests for the cached Category Orders pull."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.etl import category_orders
+
+
+@pytest.fixture
+def state(monkeypatch):
+    """Keep the cache state and uploads in memory instead of S3."""
+    stored = {'state': {}, 'uploads': []}
+
+    monkeypatch.setattr(
+        category_orders,
+        'read_s3_state',
+        lambda duckdb_con, s3_key, bucket_name: dict(stored['state']),
+    )
+
+    def write_s3_state(duckdb_con, new_state, s3_key, bucket_name):
+        stored['state'] = dict(new_state)
+
+    def load_df_to_s3_table(duckdb_con, df, s3_key, bucket_name):
+        stored['uploads'].append(df)
+        return len(df)
+
+    monkeypatch.setattr(category_orders, 'write_s3_state', write_s3_state)
+    monkeypatch.setattr(category_orders, 'load_df_to_s3_table', load_df_to_s3_table)
+    return stored
+
+
+def _spreadsheet(modified_time):
+    spreadsheet = MagicMock()
+    spreadsheet.get_lastUpdateTime.return_value = modified_time
+    spreadsheet.worksheet.return_value.get_all_values.return_value = [
+        ['category_group', 'subcategory_group', 'category_name'],
+        ['Needs', 'Home', 'Rent'],
+        ['Wants', 'Fun', 'Concerts'],
+    ]
+    return spreadsheet
+
+
+class TestCacheCategoryOrders:
+    def test_first_run_downloads_and_saves_modified_time(self, state):
+        spreadsheet = _spreadsheet('2025-01-01T00:00:00Z')
+
+        assert category_orders.cache_category_orders(MagicMock(), spreadsheet)
+
+        spreadsheet.worksheet.assert_called_once_with('Category Orders')
+        (df,) = state['uploads']
+        assert df['id'].tolist() == [1, 2]
+        assert df['category_name'].tolist() == ['Rent', 'Concerts']
+        assert state['state'] == {'modified_time': '2025-01-01T00:00:00Z'}
+
+    def test_unchanged_spreadsheet_uses_cache(self, state):
+        state['state'] = {'modified_time': '2025-01-01T00:00:00Z'}
+        spreadsheet = _spreadsheet('2025-01-01T00:00:00Z')
+
+        assert not category_orders.cache_category_orders(MagicMock(), spreadsheet)
+
+        spreadsheet.worksheet.assert_not_called()
+        assert state['uploads'] == []
+
+    def test_changed_spreadsheet_is_downloaded_again(self, state):
+        state['state'] = {'modified_time': '2025-01-01T00:00:00Z'}
+        spreadsheet = _spreadsheet('2025-02-01T00:00:00Z')
+
+        assert category_orders.cache_category_orders(MagicMock(), spreadsheet)
+
+        assert len(state['uploads']) == 1
+        assert state['state'] == {'modified_time': '2025-02-01T00:00:00Z'}
+
+    def test_force_downloads_unchanged_spreadsheet(self, state):
+        state['state'] = {'modified_time': '2025-01-01T00:00:00Z'}
+        spreadsheet = _spreadsheet('2025-01-01T00:00:00Z')
+
+        assert category_orders.cache_category_orders(
+            MagicMock(), spreadsheet, force=True
+        )
+        assert len(state['uploads']) == 1
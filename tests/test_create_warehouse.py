@@ -0,0 +1,361 @@
+"""Tests for building the warehouse and skipping unneeded SQLMesh plans."""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict
+from unittest.mock import MagicMock
+
+import duckdb
+import pytest
+
+from benchmarks.synthetic_budget import INCOME_TRANSACTION_EVERY, SyntheticBudget
+from src.etl.category_orders import CATEGORY_ORDERS_KEY
+from src.etl.etl import etl_functions
+from src.etl.streaming import stream_budget_to_parquet
+from src.utils import db_connection, metrics
+from src.utils.s3_utils import load_df_to_s3_partitions, load_df_to_s3_table, s3_uri
+from src.warehouse import create_warehouse
+
+
+@pytest.fixture
+def project(tmp_path):
+    project_path = tmp_path / 'sqlmesh_project'
+    (project_path / 'models').mkdir(parents=True)
+    (project_path / 'models' / 'model.sql').write_text(
+        "select * from @get_s3_parquet_path('accounts')"
+    )
+    (project_path / 'config.py').write_text('config = None')
+    return project_path
+
+
+@pytest.fixture
+def warehouse(tmp_path, monkeypatch, project):
+    """A temporary warehouse file and a mocked SQLMesh context."""
+    monkeypatch.setattr(db_connection, 'DATABASE_PATH', tmp_path / 'test.duckdb')
+    monkeypatch.setattr(
+        db_connection, 'BUILD_DATABASE_PATH', tmp_path / 'build' / 'test.duckdb'
+    )
+    monkeypatch.setattr(create_warehouse, 'SQLMESH_PROJECT_PATH', project)
+    # Sources and run metrics are read from a local bucket rather than S3
+    monkeypatch.setenv('S3_LOCAL_ROOT', str(tmp_path / 's3'))
+    monkeypatch.setenv('BUCKET_NAME', 'bucket')
+    (tmp_path / 's3' / 'bucket').mkdir(parents=True)
+
+    context = MagicMock()
+    monkeypatch.setattr(create_warehouse, 'Context', lambda paths, gateway: context)
+    return context
+
+
+def _sync_accounts(tmp_path, content: bytes) -> None:
+    """Rewrite the model's source file, as a sync would."""
+    (tmp_path / 's3' / 'bucket' / 'accounts.parquet').write_bytes(content)
+
+
+class TestHashSqlmeshProject:
+    def test_changes_with_model_files(self, project):
+        before = create_warehouse.hash_sqlmesh_project(project)
+
+        (project / 'models' / 'model.sql').write_text('select 2')
+
+        assert create_warehouse.hash_sqlmesh_project(project) != before
+
+    def test_ignores_caches(self, project):
+        before = create_warehouse.hash_sqlmesh_project(project)
+
+        (project / '__pycache__').mkdir()
+        (project / '__pycache__' / 'config.cpython-312.pyc').write_bytes(b'\x00')
+        (project / '.cache').mkdir()
+        (project / '.cache' / 'model').write_text('parsed')
+
+        assert create_warehouse.hash_sqlmesh_project(project) == before
+
+    def test_changes_with_bucket(self, project, monkeypatch):
+        monkeypatch.setenv('BUCKET_NAME', 'one')
+        before = create_warehouse.hash_sqlmesh_project(project)
+
+        monkeypatch.setenv('BUCKET_NAME', 'two')
+
+        assert create_warehouse.hash_sqlmesh_project(project) != before
+
+
+class TestCreateDataWarehouse:
+    def test_plans_first_run_then_skips_unchanged_project(self, warehouse, tmp_path):
+        create_warehouse.create_data_warehouse(is_local_run=False)
+        assert warehouse.plan.call_count == 1
+
+        _sync_accounts(tmp_path, b'synced')
+        create_warehouse.create_data_warehouse(is_local_run=False)
+
+        assert warehouse.plan.call_count == 1
+        assert warehouse.run.call_count == 2
+
+    def test_skips_build_when_nothing_changed(self, warehouse, tmp_path):
+        _sync_accounts(tmp_path, b'synced')
+        create_warehouse.create_data_warehouse(is_local_run=False)
+        published = tmp_path / 'test.duckdb'
+        published_mtime = published.stat().st_mtime_ns
+
+        create_warehouse.create_data_warehouse(is_local_run=False)
+
+        assert warehouse.run.call_count == 1
+        assert not (tmp_path / 'build' / 'test.duckdb').exists()
+        assert published.stat().st_mtime_ns == published_mtime
+
+    def test_builds_again_the_next_day(self, warehouse, tmp_path):
+        create_warehouse.create_data_warehouse(is_local_run=False)
+        yesterday = datetime.now(timezone.utc).date() - timedelta(days=1)
+        with duckdb.connect(str(tmp_path / 'test.duckdb')) as con:
+            con.execute(
+                'update meta.warehouse_state set value = ? where key = ?',
+                [yesterday.isoformat(), create_warehouse.BUILT_ON_KEY],
+            )
+
+        create_warehouse.create_data_warehouse(is_local_run=False)
+
+        assert warehouse.plan.call_count == 1
+        assert warehouse.run.call_count == 2
+
+    def test_plans_again_after_model_change(self, warehouse, project):
+        create_warehouse.create_data_warehouse(is_local_run=False)
+        (project / 'models' / 'model.sql').write_text('select 2')
+
+        create_warehouse.create_data_warehouse(is_local_run=False)
+
+        assert warehouse.plan.call_count == 2
+
+    def test_full_refresh_always_plans(self, warehouse):
+        create_warehouse.create_data_warehouse(is_local_run=False)
+
+        create_warehouse.create_data_warehouse(is_local_run=False, full_refresh=True)
+
+        assert warehouse.plan.call_count == 2
+        assert warehouse.plan.call_args.kwargs['restate_models'] == (
+            create_warehouse.INCREMENTAL_SOURCE_MODELS
+        )
+
+    def test_failed_plan_is_retried_next_run(self, warehouse):
+        warehouse.apply.side_effect = RuntimeError('apply failed')
+        with pytest.raises(RuntimeError):
+            create_warehouse.create_data_warehouse(is_local_run=False)
+
+        warehouse.apply.side_effect = None
+        create_warehouse.create_data_warehouse(is_local_run=False)
+
+        assert warehouse.plan.call_count == 2
+
+    def test_publishes_build_only_when_it_succeeds(self, warehouse, tmp_path):
+        create_warehouse.create_data_warehouse(is_local_run=False)
+        assert not (tmp_path / 'build' / 'test.duckdb').exists()
+        published = (tmp_path / 'test.duckdb').read_bytes()
+
+        warehouse.run.side_effect = RuntimeError('run failed')
+        with pytest.raises(RuntimeError):
+            create_warehouse.create_data_warehouse(
+                is_local_run=False, full_refresh=True
+            )
+
+        assert (tmp_path / 'test.duckdb').read_bytes() == published
+
+    def test_loads_saved_run_metrics(self, warehouse, tmp_path, monkeypatch):
+        monkeypatch.setenv('BUCKET_NAME', 'bucket')
+        run_id = metrics.start_run()
+        with metrics.span('stage.sync_s3'):
+            pass
+        metrics.save_run_metrics()
+
+        create_warehouse.create_data_warehouse(is_local_run=False)
+
+        with duckdb.connect(str(tmp_path / 'test.duckdb'), read_only=True) as con:
+            assert con.execute(
+                'select run_id, name from meta.run_metrics'
+            ).fetchall() == [(run_id, 'stage.sync_s3')]
+
+
+class DatedBudget(SyntheticBudget):
+    """A synthetic budget with some transactions moved to the given dates."""
+
+    def __init__(self, dates: Dict[int, date], **kwargs):
+        super().__init__(**kwargs)
+        self.dates = dates
+
+    def transactions_list(self):
+        for index, item in enumerate(super().transactions_list()):
+            if index in self.dates:
+                item = {**item, 'date': self.dates[index].isoformat()}
+            yield item
+
+
+@pytest.fixture
+def budget_bucket(tmp_path, monkeypatch):
+    """A local bucket loaded with a small budget, for a real SQLMesh build."""
+    monkeypatch.setenv('S3_LOCAL_ROOT', str(tmp_path / 's3'))
+    monkeypatch.setenv('BUCKET_NAME', 'bucket')
+    monkeypatch.setenv('SQLMESH_CACHE_DIR', str(tmp_path / 'sqlmesh-cache'))
+    monkeypatch.setattr(db_connection, 'DATABASE_PATH', tmp_path / 'test.duckdb')
+    monkeypatch.setattr(
+        db_connection, 'BUILD_DATABASE_PATH', tmp_path / 'build' / 'test.duckdb'
+    )
+
+    today = datetime.now(timezone.utc).date()
+    # The first transaction is dated today, and the income transaction after it
+    # inside the lookback window but usually in a month starting before it
+    budget = DatedBudget(
+        {0: today, INCOME_TRANSACTION_EVERY: today - timedelta(days=60)},
+        years=1,
+        categories=10,
+        transactions=200,
+        end=today,
+    )
+    budget_path = tmp_path / 'budget.json'
+    with open(budget_path, 'w') as stream:
+        budget.write_response(stream)
+    (tmp_path / 'budget').mkdir()
+    with open(budget_path, 'rb') as stream:
+        budget_tables, _ = stream_budget_to_parquet(stream, tmp_path / 'budget')
+
+    with duckdb.connect() as duckdb_con:
+        load_df_to_s3_table(duckdb_con, budget.paystubs(), 'raw-paystubs', 'bucket')
+        load_df_to_s3_table(
+            duckdb_con, budget.category_orders(), CATEGORY_ORDERS_KEY, 'bucket'
+        )
+        for function in etl_functions.values():
+            function(budget_tables, duckdb_con)
+    return budget
+
+
+class TestBuildWarehouse:
+    def test_transactions_dated_today_reach_dashboards(self, budget_bucket):
+        create_warehouse.create_data_warehouse(is_local_run=False)
+
+        today = budget_bucket.end
+        this_month = today.replace(day=1)
+        with duckdb.connect(str(db_connection.DATABASE_PATH), read_only=True) as con:
+            raw_date = con.execute(
+                "select date from raw.transactions where id = 'transaction-0'"
+            ).fetchone()
+            combined_date = con.execute(
+                """
+                select transaction_date::date
+                from combined.transactions
+                where id = 'transaction-0'
+                """
+            ).fetchone()
+            (income,) = con.execute(
+                """
+                select sum(amount)
+                from combined.transactions
+                where
+                    category_group_name_mapping = 'Income'
+                    and date_trunc('month', transaction_date) = ?
+                """,
+                [this_month],
+            ).fetchone()
+            dashboard_income = con.execute(
+                """
+                select total_income
+                from dashboards.monthly_level
+                where budget_month = ?
+                """,
+                [this_month],
+            ).fetchone()
+
+        assert raw_date == (today.isoformat(),)
+        assert combined_date == (today,)
+        # This month's income on the dashboard includes today's transaction
+        assert dashboard_income == (income,)
+
+    def test_late_edit_reaches_its_dashboard_month(self, budget_bucket):
+        create_warehouse.create_data_warehouse(is_local_run=False)
+        edited_id = f'transaction-{INCOME_TRANSACTION_EVERY}'
+        transactions = f"{s3_uri('bucket', 'transactions')}/*/*/*.parquet"
+        with duckdb.connect() as duckdb_con:
+            edited = duckdb_con.execute(
+                f"""
+                select * replace (amount * 2 as amount)
+                from read_parquet('{transactions}')
+                where id = '{edited_id}'
+                """
+            ).df()
+            load_df_to_s3_partitions(
+                duckdb_con, edited, 'transactions', 'bucket', is_delta=True
+            )
+
+        create_warehouse.create_data_warehouse(is_local_run=False)
+
+        with duckdb.connect(str(db_connection.DATABASE_PATH), read_only=True) as con:
+            mismatched_months = con.execute(
+                """
+                with income as (
+                    select
+                        date_trunc('month', transaction_date)::date as budget_month
+                        , sum(amount) as income
+                    from combined.transactions
+                    where category_group_name_mapping = 'Income'
+                    group by 1
+                )
+
+                select income.budget_month
+                from income
+                inner join dashboards.monthly_level as monthly_level
+                    on income.budget_month = monthly_level.budget_month
+                where income.income != monthly_level.total_income
+                """
+            ).fetchall()
+
+        assert mismatched_months == []
+
+    def test_deleted_category_month_leaves_budget_models(self, budget_bucket):
+        create_warehouse.create_data_warehouse(is_local_run=False)
+        this_month = budget_bucket.end.replace(day=1)
+        months = f"{s3_uri('bucket', 'monthly-categories')}/*/*/*.parquet"
+        with duckdb.connect() as duckdb_con:
+            deleted = duckdb_con.execute(
+                f"""
+                select * replace (true as deleted)
+                from read_parquet('{months}', hive_partitioning = true)
+                where
+                    id = 'category-0'
+                    and year = {this_month.year}
+                    and month = {this_month.month}
+                """
+            ).df()
+            load_df_to_s3_partitions(
+                duckdb_con,
+                deleted,
+                'monthly-categories',
+                'bucket',
+                is_delta=True,
+                key_columns=('id', 'year', 'month'),
+            )
+
+        create_warehouse.create_data_warehouse(is_local_run=False)
+
+        with duckdb.connect(str(db_connection.DATABASE_PATH), read_only=True) as con:
+            budgeted = con.execute(
+                """
+                select budget_month
+                from combined.monthly_category_facts
+                where category_id = 'category-0' and budgeted is not null
+                """
+            ).fetchall()
+
+        assert budgeted
+        assert (this_month,) not in budgeted
+
+    def test_category_orders_columns_are_described(self, budget_bucket):
+        create_warehouse.create_data_warehouse(is_local_run=False)
+
+        with duckdb.connect(str(db_connection.DATABASE_PATH), read_only=True) as con:
+            comments = con.execute(
+                """
+                select column_name, comment
+                from duckdb_columns()
+                where schema_name = 'raw' and table_name = 'category_orders'
+                """
+            ).fetchall()
+
+        assert comments == [
+            ('id', 'Row Id'),
+            ('category_group', 'Category Group'),
+            ('subcategory_group', 'Subcategory Group'),
+            ('category_name', 'Category Name'),
+        ]
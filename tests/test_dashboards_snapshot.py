@@ -0,0 +1,87 @@
+"""Tests for the Evidence snapshot of the dashboard tables."""
+
+import duckdb
+import pytest
+
+from src.utils import db_connection
+from src.warehouse.dashboards_snapshot import export_dashboards_snapshot
+
+
+@pytest.fixture
+def warehouse(tmp_path, monkeypatch):
+    """A warehouse laid out like SQLMesh's, with views over physical tables."""
+    database_path = tmp_path / 'warehouse.duckdb'
+    monkeypatch.setattr(db_connection, 'DATABASE_PATH', database_path)
+
+    with duckdb.connect(str(database_path)) as duckdb_con:
+        duckdb_con.execute(
+            """
+            create schema sqlmesh__dashboards;
+            create schema dashboards;
+            create schema combined;
+            create schema raw;
+
+            create table sqlmesh__dashboards.monthly_level__1 as
+            select range as budget_month, range * 2 as spent from range(12);
+            create view dashboards.monthly_level as
+            select * from sqlmesh__dashboards.monthly_level__1;
+
+            create table combined.monthly_category_facts as
+            select range as budget_month, 'category' as category_id from range(3);
+            create table raw.transactions as select range as id from range(100);
+            """
+        )
+    return database_path
+
+
+def _tables(snapshot_path):
+    with duckdb.connect(str(snapshot_path), read_only=True) as duckdb_con:
+        return duckdb_con.execute(
+            """
+            select table_schema || '.' || table_name
+            from information_schema.tables
+            where table_schema != 'meta'
+            order by 1
+            """
+        ).fetchall()
+
+
+class TestExportDashboardsSnapshot:
+    def test_exports_only_evidence_tables(self, warehouse, tmp_path):
+        snapshot_path = tmp_path / 'snapshot.duckdb'
+
+        assert export_dashboards_snapshot(snapshot_path)
+
+        assert _tables(snapshot_path) == [
+            ('combined.monthly_category_facts',),
+            ('dashboards.monthly_level',),
+        ]
+        with duckdb.connect(str(snapshot_path), read_only=True) as duckdb_con:
+            assert duckdb_con.execute(
+                'select sum(spent) from dashboards.monthly_level'
+            ).fetchone() == (132,)
+        assert not (tmp_path / 'snapshot.duckdb.tmp').exists()
+
+    def test_skips_unchanged_tables(self, warehouse, tmp_path):
+        snapshot_path = tmp_path / 'snapshot.duckdb'
+        export_dashboards_snapshot(snapshot_path)
+        inode = snapshot_path.stat().st_ino
+
+        assert not export_dashboards_snapshot(snapshot_path)
+        assert snapshot_path.stat().st_ino == inode
+
+    def test_replaces_snapshot_when_rows_change(self, warehouse, tmp_path):
+        snapshot_path = tmp_path / 'snapshot.duckdb'
+        export_dashboards_snapshot(snapshot_path)
+
+        with duckdb.connect(str(warehouse)) as duckdb_con:
+            duckdb_con.execute(
+                'update sqlmesh__dashboards.monthly_level__1 set spent = 0 '
+                'where budget_month = 11'
+            )
+
+        assert export_dashboards_snapshot(snapshot_path)
+        with duckdb.connect(str(snapshot_path), read_only=True) as duckdb_con:
+            assert duckdb_con.execute(
+                'select sum(spent) from dashboards.monthly_level'
+            ).fetchone() == (110,)
@@ -0,0 +1,88 @@
+"""Tests for the DuckDB connection helpers."""
+
+import duckdb
+import pytest
+
+from src.utils import db_connection
+from src.utils.db_connection import DuckDBConnection, shared_connection
+
+
+@pytest.fixture
+def s3_configurations(tmp_path, monkeypatch):
+    """Point connections at a temporary database and count S3 setups."""
+    database = tmp_path / 'test.duckdb'
+    duckdb.connect(str(database)).close()
+    monkeypatch.setattr(db_connection, 'DATABASE_PATH', database)
+
+    calls = []
+    monkeypatch.setattr(
+        DuckDBConnection, '_configure_connection', lambda self: calls.append(self)
+    )
+    return calls
+
+
+class TestDuckDBConnection:
+    def test_configures_s3_eagerly_by_default(self, s3_configurations):
+        DuckDBConnection().close()
+
+        assert len(s3_configurations) == 1
+
+    def test_lazy_s3_only_for_s3_queries(self, s3_configurations):
+        duckdb_con = DuckDBConnection(lazy_s3=True)
+
+        assert duckdb_con.df('select 1 as x')['x'].tolist() == [1]
+        assert s3_configurations == []
+
+        duckdb_con._prepare("select * from read_parquet('s3://bucket/file.parquet')")
+        duckdb_con._prepare("select * from read_parquet('s3://bucket/other.parquet')")
+        assert len(s3_configurations) == 1
+
+        duckdb_con.close()
+
+    def test_loads_extensions_from_image_directory(self, tmp_path, monkeypatch):
+        monkeypatch.delenv('S3_LOCAL_ROOT', raising=False)
+        extension_directory = str(tmp_path / 'extensions')
+        monkeypatch.setattr(db_connection, 'EXTENSION_DIRECTORY', extension_directory)
+        # Creating a real S3 secret would need httpfs
+        monkeypatch.setattr(db_connection, 's3_secret_sql', lambda access_type: '')
+
+        duckdb_con = DuckDBConnection(database=db_connection.IN_MEMORY)
+
+        assert duckdb_con.query(
+            "select current_setting('extension_directory')"
+        ).fetchone() == (extension_directory,)
+        duckdb_con.close()
+
+
+class TestS3SecretSql:
+    def test_reads_credentials_each_time(self, monkeypatch):
+        monkeypatch.setenv('READ_ACCESS_KEY_ID', 'first-key')
+        assert "KEY_ID 'first-key'" in db_connection.s3_secret_sql('READ')
+
+        monkeypatch.setenv('READ_ACCESS_KEY_ID', 'second-key')
+        assert "KEY_ID 'second-key'" in db_connection.s3_secret_sql('READ')
+
+
+class TestSharedConnection:
+    def test_nested_blocks_share_one_connection(self, s3_configurations):
+        with shared_connection() as outer:
+            with shared_connection() as inner:
+                assert inner is outer
+            assert outer.df('select 1 as x')['x'].tolist() == [1]
+
+        with shared_connection() as reopened:
+            assert reopened is not outer
+
+        assert s3_configurations == []
+
+    def test_closes_after_outermost_block(self, s3_configurations):
+        with shared_connection() as duckdb_con:
+            pass
+
+        with pytest.raises(duckdb.ConnectionException):
+            duckdb_con.df('select 1')
+
+    def test_opens_warehouse_read_only(self, s3_configurations):
+        with shared_connection() as duckdb_con:
+            with pytest.raises(duckdb.Error, match='read-only'):
+                duckdb_con.execute('create table written as select 1')
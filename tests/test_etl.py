@@ -0,0 +1,244 @@
+"""Tests for the YNAB budget to Arrow conversion in the ETL module."""
+
+import io
+import json
+
+import duckdb
+import pytest
+
+from src.etl import etl
+from src.etl.schemas import MONTHLY_CATEGORY_SCHEMA, TRANSACTION_SCHEMA
+from src.etl.streaming import stream_budget_to_parquet
+from src.etl.tables import (
+    build_budget_tables,
+    build_monthly_categories_table,
+    build_transactions_table,
+)
+from src.utils.s3_utils import read_s3_state, s3_uri
+
+
+class TestBuildMonthlyCategoriesTable:
+    def test_adds_year_and_month_per_category(self):
+        months = [
+            {'month': '2024-12-01', 'categories': [{'id': 'a'}, {'id': 'b'}]},
+            {'month': '2025-01-01', 'categories': [{'id': 'a'}]},
+        ]
+
+        table = build_monthly_categories_table(months)
+
+        assert table.select(['id', 'year', 'month']).to_pylist() == [
+            {'id': 'a', 'year': 2024, 'month': 12},
+            {'id': 'b', 'year': 2024, 'month': 12},
+            {'id': 'a', 'year': 2025, 'month': 1},
+        ]
+
+    def test_skips_months_without_categories(self):
+        months = [
+            {'month': '2024-12-01', 'categories': []},
+            {'month': '2025-01-01', 'categories': [{'id': 'a'}]},
+        ]
+
+        table = build_monthly_categories_table(months)
+
+        assert table.num_rows == 1
+        assert table['month'].to_pylist() == [1]
+
+    def test_uses_explicit_schema(self):
+        months = [
+            {
+                'month': '2025-01-01',
+                'categories': [{'id': 'a', 'budgeted': 1000, 'new_ynab_field': 'x'}],
+            }
+        ]
+
+        table = build_monthly_categories_table(months)
+
+        assert table.schema.names == MONTHLY_CATEGORY_SCHEMA.names + ['year', 'month']
+        assert table['goal_target'].to_pylist() == [None]
+
+    def test_empty(self):
+        table = build_monthly_categories_table([])
+
+        assert table.num_rows == 0
+        assert 'year' in table.schema.names
+
+
+class TestBuildTransactionsTable:
+    def test_partition_columns_from_date(self):
+        table = build_transactions_table(
+            [{'id': 'x', 'date': '2023-12-31', 'amount': -5000}]
+        )
+
+        assert table.schema.names == TRANSACTION_SCHEMA.names + ['year', 'month']
+        assert table.select(['year', 'month']).to_pylist() == [
+            {'year': 2023, 'month': 12}
+        ]
+
+
+class TestStreamBudgetToParquet:
+    def test_matches_in_memory_tables(self, tmp_path):
+        budget = {
+            'category_groups': [{'id': 'g', 'name': 'Bills'}],
+            'months': [
+                {'month': '2024-12-01', 'categories': [{'id': 'a'}, {'id': 'b'}]},
+                {'month': '2025-01-01', 'categories': [{'id': 'a'}]},
+            ],
+            'transactions': [
+                {'id': 'x', 'date': '2024-12-31', 'amount': -5000},
+                {'id': 'y', 'date': '2025-01-02', 'amount': 1200, 'memo': None},
+                {'id': 'z', 'date': '2025-01-03', 'amount': 10},
+            ],
+            'subtransactions': [],
+            'accounts': [{'id': 'acct', 'balance': 100, 'on_budget': True}],
+        }
+        body = json.dumps({'data': {'budget': budget, 'server_knowledge': 42}})
+
+        datasets, server_knowledge = stream_budget_to_parquet(
+            io.BytesIO(body.encode()), tmp_path, batch_size=2
+        )
+
+        assert server_knowledge == 42
+        for key, table in build_budget_tables(budget).items():
+            assert datasets[key].to_table().equals(table)
+
+
+def _budget(transactions=(), accounts=()):
+    return {
+        'category_groups': [],
+        'months': [],
+        'transactions': list(transactions),
+        'subtransactions': [],
+        'accounts': list(accounts),
+    }
+
+
+@pytest.fixture
+def ynab(tmp_path, monkeypatch):
+    """A local bucket and a stand-in for the YNAB API.
+
+    Append (budget, server_knowledge) to `responses` for each run. Every
+    request's last_knowledge_of_server is recorded in `requests`.
+    """
+    monkeypatch.setenv('S3_LOCAL_ROOT', str(tmp_path / 's3'))
+    monkeypatch.setenv('BUCKET_NAME', 'bucket')
+    monkeypatch.setattr(etl, 'load_paystubs_from_sheets', lambda duckdb_con: None)
+    monkeypatch.setattr(
+        etl, 'load_category_orders_from_sheets', lambda duckdb_con, force: None
+    )
+
+    class FakeYnab:
+        responses = []
+        requests = []
+
+    def extract_budget_data(last_knowledge_of_server=None):
+        FakeYnab.requests.append(last_knowledge_of_server)
+        budget, server_knowledge = FakeYnab.responses.pop(0)
+        return build_budget_tables(budget), server_knowledge
+
+    monkeypatch.setattr(etl, 'extract_budget_data', extract_budget_data)
+    return FakeYnab
+
+
+def _read(s3_key, columns='id, amount'):
+    path = s3_uri('bucket', s3_key)
+    path += '/*/*/*.parquet' if s3_key == 'transactions' else '.parquet'
+    return duckdb.execute(
+        f"select {columns} from read_parquet('{path}') order by id"
+    ).fetchall()
+
+
+def _server_knowledge():
+    with duckdb.connect() as duckdb_con:
+        state = read_s3_state(duckdb_con, etl.SYNC_STATE_KEY, 'bucket')
+    return state['server_knowledge']
+
+
+class TestEtlYnabData:
+    transactions = [
+        {'id': 'a', 'date': '2025-01-05', 'amount': -100},
+        {'id': 'b', 'date': '2025-02-06', 'amount': -200},
+    ]
+    accounts = [{'id': 'checking', 'balance': 100}, {'id': 'savings', 'balance': 5}]
+
+    def test_first_run_extracts_everything(self, ynab):
+        ynab.responses.append((_budget(self.transactions, self.accounts), 10))
+
+        etl.etl_ynab_data()
+
+        assert ynab.requests == [None]
+        assert _read('transactions') == [('a', -100), ('b', -200)]
+        assert _read('accounts', 'id, balance') == [('checking', 100), ('savings', 5)]
+        assert _server_knowledge() == '10'
+
+    def test_delta_merges_updated_and_deleted_rows(self, ynab):
+        ynab.responses.append((_budget(self.transactions, self.accounts), 10))
+        etl.etl_ynab_data()
+
+        ynab.responses.append(
+            (
+                _budget(
+                    [
+                        {'id': 'a', 'date': '2025-01-05', 'amount': -150},
+                        {'id': 'b', 'date': '2025-02-06', 'deleted': True},
+                        {'id': 'c', 'date': '2025-02-07', 'amount': -300},
+                    ],
+                    [
+                        {'id': 'savings', 'balance': 7},
+                        {'id': 'checking', 'deleted': True},
+                    ],
+                ),
+                20,
+            )
+        )
+        etl.etl_ynab_data()
+
+        assert ynab.requests == [None, 10]
+        assert _read('transactions') == [('a', -150), ('c', -300)]
+        assert _read('accounts', 'id, balance') == [('savings', 7)]
+        assert _server_knowledge() == '20'
+
+    def test_delta_and_full_store_same_rows_for_deleted_rows(self, ynab):
+        payload = _budget(
+            [
+                {'id': 'a', 'date': '2025-01-05', 'amount': -100},
+                {'id': 'b', 'date': '2025-02-06', 'amount': -200, 'deleted': True},
+            ],
+            [{'id': 'checking', 'balance': 100}, {'id': 'savings', 'deleted': True}],
+        )
+        ynab.responses.append((_budget(self.transactions, self.accounts), 10))
+        etl.etl_ynab_data()
+        ynab.responses.append((payload, 20))
+        etl.etl_ynab_data()
+        delta = (_read('transactions'), _read('accounts', 'id, balance'))
+
+        ynab.responses.append((payload, 30))
+        etl.etl_ynab_data(full_refresh=True)
+
+        assert delta == ([('a', -100)], [('checking', 100)])
+        assert (_read('transactions'), _read('accounts', 'id, balance')) == delta
+
+    def test_full_refresh_ignores_saved_knowledge(self, ynab):
+        ynab.responses.append((_budget(self.transactions, self.accounts), 10))
+        etl.etl_ynab_data()
+
+        ynab.responses.append((_budget(self.transactions[:1], self.accounts), 30))
+        etl.etl_ynab_data(full_refresh=True)
+
+        assert ynab.requests == [None, None]
+        assert _read('transactions') == [('a', -100)]
+        assert _server_knowledge() == '30'
+
+    def test_saves_knowledge_only_after_every_table(self, ynab, monkeypatch):
+        ynab.responses.append((_budget(self.transactions, self.accounts), 10))
+        etl.etl_ynab_data()
+
+        def fail(budget_tables, duckdb_con, is_delta):
+            raise RuntimeError('upload failed')
+
+        monkeypatch.setitem(etl.etl_functions, 'accounts', fail)
+        ynab.responses.append((_budget(self.transactions, self.accounts), 20))
+        with pytest.raises(RuntimeError):
+            etl.etl_ynab_data()
+
+        # The next run asks for the same changes again
+        assert _server_knowledge() == '10'
@@ -0,0 +1,47 @@
+"""Tests for the import time report."""
+
+from benchmarks.import_times import (
+    measure_import_time,
+    parse_importtime,
+    startup_modules,
+    summarize_imports,
+)
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:      1000 |       1000 | _io
+import time:    300000 |     300000 |     pandas.core
+import time:    200000 |     500000 |   pandas.io
+import time:    400000 |     900000 | pandas
+import time:     50000 |      50000 | src
+import time:     20000 |      20000 | src.etl
+"""
+
+
+class TestImportTimes:
+    def test_parses_depth_and_times(self):
+        imports = parse_importtime(IMPORTTIME_OUTPUT)
+
+        assert imports[0] == ('_io', 0, 1000, 1000)
+        assert imports[1] == ('pandas.core', 2, 300000, 300000)
+        assert imports[3] == ('pandas', 0, 400000, 900000)
+
+    def test_sums_top_level_imports_by_package(self):
+        summary = summarize_imports(parse_importtime(IMPORTTIME_OUTPUT), {'_io'})
+
+        assert summary['seconds'] == 0.97
+        assert summary['modules'] == 5
+        assert summary['packages'] == {'pandas': 0.9, 'src': 0.07}
+
+    def test_measures_in_a_fresh_interpreter(self):
+        result = measure_import_time('src.utils.logging_config', startup_modules())
+
+        assert result['module'] == 'src.utils.logging_config'
+        assert 'error' not in result
+        assert result['seconds'] > 0
+        assert result['packages']
+
+    def test_reports_failed_imports(self):
+        result = measure_import_time('not_a_module', set())
+
+        assert result['error'].startswith('ModuleNotFoundError')
@@ -0,0 +1,80 @@
+"""Tests for the pipeline's metrics spans."""
+
+import json
+import logging
+
+import duckdb
+import pytest
+
+from src.utils import metrics
+from src.utils.metrics import run_metrics_df, run_spans, span, start_run, traced
+
+
+@pytest.fixture(autouse=True)
+def fresh_run():
+    run_id = start_run()
+    yield run_id
+    start_run()
+
+
+class TestSpan:
+    def test_records_duration_and_counts(self, fresh_run):
+        with span('etl.fetch_budget', endpoint='budget') as counts:
+            counts['bytes'] = 2048
+
+        (record,) = run_spans()
+        assert record['run_id'] == fresh_run
+        assert record['name'] == 'etl.fetch_budget'
+        assert record['status'] == 'ok'
+        assert record['duration_seconds'] >= 0
+        assert record['counts'] == {'endpoint': 'budget', 'bytes': 2048}
+
+    def test_records_failed_spans(self):
+        with pytest.raises(ValueError):
+            with span('warehouse.run'):
+                raise ValueError('boom')
+
+        (record,) = run_spans()
+        assert record['status'] == 'error'
+
+    def test_logs_one_json_line(self, caplog):
+        with caplog.at_level(logging.INFO, logger='metrics'):
+            with span('sheets.api', request='Update Sheet', retries=None):
+                pass
+
+        (message,) = [r.getMessage() for r in caplog.records if r.name == 'metrics']
+        record = json.loads(message)
+        assert record['name'] == 'sheets.api'
+        # Unset counts are dropped
+        assert record['counts'] == {'request': 'Update Sheet'}
+
+
+class TestTraced:
+    def test_records_label_and_returned_rows(self):
+        @traced('s3.load_table', label_arg='s3_key')
+        def load(duckdb_con, df, s3_key):
+            return 42
+
+        assert load(None, None, s3_key='transactions') == 42
+
+        (record,) = run_spans()
+        assert record['name'] == 's3.load_table'
+        assert record['counts'] == {'s3_key': 'transactions', 'rows': 42}
+
+
+class TestSaveRunMetrics:
+    def test_saves_one_file_per_run(self, tmp_path, monkeypatch, fresh_run):
+        monkeypatch.setenv('S3_LOCAL_ROOT', str(tmp_path))
+        monkeypatch.setenv('BUCKET_NAME', 'bucket')
+        with span('stage.sheets', force=False):
+            pass
+
+        metrics.save_run_metrics()
+
+        path = tmp_path / 'bucket' / metrics.RUN_METRICS_KEY / f'{fresh_run}.parquet'
+        rows = duckdb.execute(
+            f"select name, counts from read_parquet('{path}')"
+        ).fetchall()
+        assert rows[0] == ('stage.sheets', '{"force": false}')
+        # The save itself is recorded after the frame is built
+        assert len(rows) == len(run_metrics_df()) - 1
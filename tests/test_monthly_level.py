@@ -0,0 +1,133 @@
+"""Regression test for the sparse monthly rollup in dashboards.monthly_level."""
+
+from datetime import date, timedelta
+from pathlib import Path
+
+import duckdb
+import pytest
+from sqlmesh.core.dialect import parse
+from sqlmesh.core.model import load_sql_based_model
+
+from src import project_root
+
+MODELS_PATH = project_root / 'src' / 'warehouse' / 'sqlmesh_project' / 'models'
+FACTS_MODEL_PATH = MODELS_PATH / '_3_combined' / 'monthly_category_facts.sql'
+SPARSE_MODEL_PATH = MODELS_PATH / '_4_dashboards' / 'monthly_level.sql'
+DENSE_MODEL_PATH = Path(__file__).parent / 'sql' / 'monthly_level_record_spine.sql'
+
+CATEGORY_COUNT = 200
+TRANSACTION_COUNT = 100_000
+
+
+def _render(model_path: Path, start: date, end: date) -> str:
+    model = load_sql_based_model(
+        parse(model_path.read_text(), default_dialect='duckdb'), dialect='duckdb'
+    )
+    return model.render_query(start=start, end=end).sql(dialect='duckdb')
+
+
+@pytest.fixture(scope='module')
+def warehouse():
+    """Ten years of a budget with many categories, built in memory.
+
+    Amounts are multiples of 0.25 so sums are exact whatever order they're
+    added in. Some rows fall outside the old spine: categories that no longer
+    exist, future-dated transactions and budgets for months ahead.
+    """
+    duckdb_con = duckdb.connect()
+    duckdb_con.execute(
+        f"""
+        create schema cleaned;
+        create schema combined;
+
+        create table cleaned.categories as
+        select
+            'category-' || i as id
+            , 'group-' || (i % 7) as category_group_id
+            , 'Category ' || i as category_name
+            , false as is_hidden
+        from range({CATEGORY_COUNT}) as categories(i);
+
+        create table combined.transactions as
+        select
+            'transaction-' || i as id
+            , (current_date - interval 10 year + interval ((hash(i) % 3700)::int) day)::timestamp
+                as transaction_date
+            -- A few categories past the last one were deleted
+            , 'category-' || (hash(i, 'category') % ({CATEGORY_COUNT} + 5))::int as category_id
+            , [
+                'Income', 'Needs', 'Wants', 'Savings', 'Emergency Fund'
+            ][1 + (hash(i, 'group') % 5)::int] as category_group_name_mapping
+            , if(i % 97 = 0, 'HSA Fund', 'Category') as category_name
+            , ((hash(i, 'amount') % 80000)::int - 60000) * 0.25 as amount
+        from range({TRANSACTION_COUNT}) as transactions(i);
+
+        create table cleaned.transactions as
+        select id, transaction_date from combined.transactions;
+
+        create table combined.budgeted as
+        select
+            months.budget_month::date as budget_month
+            , categories.id as category_id
+            , categories.category_group_id
+            , categories.category_name
+            , 'Group' as category_group_name
+            , 'Subgroup' as subcategory_group_name
+            , 'Needs' as category_group_name_mapping
+            , (hash(months.budget_month, categories.id) % 4000)::int * 0.25 as budgeted
+            , 0.0 as activity
+            , 0.0 as balance
+            , if(categories.category_group_id = 'group-1', budgeted, 0) as emergency_fund_assigned
+            , if(categories.category_group_id = 'group-2', budgeted, 0) as savings_assigned
+            , if(categories.category_group_id = 'group-3', budgeted, 0) as investments_assigned
+            , 0.0 as emergency_fund_balance
+            , 0.0 as savings_balance
+            , 0.0 as investments_balance
+            , 0.0 as net_zero_balance
+        from generate_series(
+            date_trunc('month', current_date - interval 11 year)
+            , date_trunc('month', current_date + interval 3 month)
+            , interval 1 month
+        ) as months(budget_month)
+        cross join cleaned.categories as categories;
+
+        create table combined.paystubs as
+        select
+            (current_date - interval 9 year + interval (i * 14) day)::timestamp as pay_date
+            , 4000.0 as earnings_actual
+            , 4000.0 as salary
+            , 0.0 as bonus
+            , -200.0 as pre_tax_deductions
+            , -300.0 as retirement_fund
+            , -100.0 as hsa
+            , -900.0 as taxes
+            , -50.0 as post_tax_deductions
+            , -1550.0 as deductions
+            , 2450.0 as net_pay
+            , 0.0 as income_for_reimbursements
+        from range(230) as paystubs(i);
+        """
+    )
+    facts_query = _render(FACTS_MODEL_PATH, date(2000, 1, 1), date.today())
+    duckdb_con.execute(f'create table combined.monthly_category_facts as {facts_query}')
+    yield duckdb_con
+    duckdb_con.close()
+
+
+class TestMonthlyLevel:
+    @pytest.mark.parametrize('lookback_days', [None, 62])
+    def test_matches_record_spine_rollup(self, warehouse, lookback_days):
+        end = date.today()
+        start = (
+            end - timedelta(days=lookback_days) if lookback_days else date(2000, 1, 1)
+        )
+
+        sparse = warehouse.execute(
+            f'{_render(SPARSE_MODEL_PATH, start, end)} order by budget_month'
+        ).fetchall()
+        dense = warehouse.execute(
+            f'{_render(DENSE_MODEL_PATH, start, end)} order by budget_month'
+        ).fetchall()
+
+        assert len(sparse) > 0
+        assert sparse == dense
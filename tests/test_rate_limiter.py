@@ -0,0 +1,65 @@
+"""Tests for the Sheets API rate limiter."""
+
+from src.sheets.rate_limiter import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket:
+    def test_burst_up_to_capacity(self):
+        clock = FakeClock()
+        bucket = TokenBucket(
+            rate_per_minute=60, capacity=3, clock=clock, sleep=clock.sleep
+        )
+
+        for _ in range(3):
+            bucket.acquire()
+
+        assert clock.sleeps == []
+
+    def test_waits_for_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(
+            rate_per_minute=60, capacity=1, clock=clock, sleep=clock.sleep
+        )
+
+        bucket.acquire()
+        bucket.acquire()
+
+        assert clock.now == 1.0
+
+    def test_rate_stays_under_quota(self):
+        clock = FakeClock()
+        bucket = TokenBucket(clock=clock, sleep=clock.sleep)
+
+        # Count the calls let through in the first minute
+        calls = 0
+        while True:
+            bucket.acquire()
+            if clock.now >= 60:
+                break
+            calls += 1
+
+        assert 50 < calls <= 60
+
+    def test_pause_holds_callers(self):
+        clock = FakeClock()
+        bucket = TokenBucket(
+            rate_per_minute=60, capacity=5, clock=clock, sleep=clock.sleep
+        )
+
+        bucket.pause(10)
+        bucket.acquire()
+
+        assert clock.now == 10
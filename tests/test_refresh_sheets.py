@@ -0,0 +1,81 @@
+"""Tests for the dashboard refresh, against a fake spreadsheet and local bucket."""
+
+from contextlib import nullcontext
+
+import duckdb
+import pytest
+
+from src.etl.category_orders import read_cached_modified_time, save_cached_modified_time
+from src.sheets import refresh_sheets
+from tests.fakes import FakeSpreadsheet
+
+
+@pytest.fixture
+def bucket(tmp_path, monkeypatch):
+    monkeypatch.setenv('S3_LOCAL_ROOT', str(tmp_path / 's3'))
+    monkeypatch.setenv('BUCKET_NAME', 'bucket')
+    (tmp_path / 's3' / 'bucket').mkdir(parents=True)
+    with duckdb.connect() as duckdb_con:
+        yield duckdb_con
+
+
+@pytest.fixture
+def dashboards(monkeypatch):
+    """Queue one small dashboard instead of querying the warehouse.
+
+    Functions appended to the returned list run while the dashboard is queued.
+    """
+    during_queueing = []
+
+    def refresh_overview_dashboard(batcher, dashboard_type):
+        if dashboard_type != 'yearly':
+            return
+        refresh_sheets.create_worksheet(batcher, 'Dash', 5, 4)
+        batcher.queue_values('Dash!B2:C3', [['Name', 'Spend'], ['Rent', 1200]])
+        for callback in during_queueing:
+            callback()
+
+    monkeypatch.setattr(refresh_sheets, 'shared_connection', nullcontext)
+    monkeypatch.setattr(
+        refresh_sheets, 'refresh_overview_dashboard', refresh_overview_dashboard
+    )
+    monkeypatch.setattr(
+        refresh_sheets, 'refresh_yearly_categories_dashboards', lambda batcher: None
+    )
+    return during_queueing
+
+
+def _edit_category_orders(spreadsheet):
+    spreadsheet.values_batch_update(
+        {'data': [{'range': 'Category Orders!A2', 'values': [['Needs']]}]}
+    )
+
+
+class TestRefreshSheets:
+    def test_own_edits_marked_seen(self, bucket, dashboards):
+        spreadsheet = FakeSpreadsheet()
+        save_cached_modified_time(bucket, spreadsheet.get_lastUpdateTime())
+
+        refresh_sheets.refresh_sheets(spreadsheet=spreadsheet)
+
+        assert read_cached_modified_time(bucket) == spreadsheet.get_lastUpdateTime()
+
+    def test_edit_during_refresh_not_marked_seen(self, bucket, dashboards):
+        spreadsheet = FakeSpreadsheet()
+        cached_modified_time = spreadsheet.get_lastUpdateTime()
+        save_cached_modified_time(bucket, cached_modified_time)
+        dashboards.append(lambda: _edit_category_orders(spreadsheet))
+
+        refresh_sheets.refresh_sheets(spreadsheet=spreadsheet)
+
+        # The next Category Orders pull still sees the edit as new
+        assert read_cached_modified_time(bucket) == cached_modified_time
+
+    def test_unchanged_rerun_only_reads_sheet_metadata(self, bucket, dashboards):
+        spreadsheet = FakeSpreadsheet()
+        refresh_sheets.refresh_sheets(spreadsheet=spreadsheet)
+        spreadsheet.calls.clear()
+
+        refresh_sheets.refresh_sheets(spreadsheet=spreadsheet)
+
+        assert spreadsheet.call_names() == ['fetch_sheet_metadata']
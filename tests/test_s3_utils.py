@@ -0,0 +1,195 @@
+"""Tests for the S3 table and partition writers, against a local bucket."""
+
+from pathlib import Path
+
+import duckdb
+import pytest
+from pandas import DataFrame
+
+from src.utils.s3_utils import (
+    PARTITION_FILE_NAME,
+    list_s3_partitions,
+    load_df_to_s3_partitions,
+    load_df_to_s3_table,
+    partition_index_file,
+    partition_path,
+    s3_uri,
+)
+
+BUCKET_NAME = 'bucket'
+
+
+@pytest.fixture
+def duckdb_con(tmp_path, monkeypatch):
+    """A connection writing to a bucket directory that doesn't exist yet."""
+    monkeypatch.setenv('S3_LOCAL_ROOT', str(tmp_path / 's3'))
+    with duckdb.connect() as duckdb_con:
+        yield duckdb_con
+
+
+def _transactions(*rows) -> DataFrame:
+    return DataFrame(rows, columns=['id', 'amount', 'year', 'month', 'deleted']).astype(
+        {'amount': 'int64', 'year': 'int64', 'month': 'int64'}
+    )
+
+
+def _partitions(duckdb_con, skip=frozenset()):
+    """The ids stored in each partition, including partitions left empty."""
+    s3_dir = s3_uri(BUCKET_NAME, 'transactions')
+    return {
+        partition: [
+            row_id
+            for (row_id,) in duckdb_con.execute(
+                f"""
+                select id
+                from read_parquet('{partition_path(s3_dir, partition)}/*.parquet')
+                order by id
+                """
+            ).fetchall()
+        ]
+        for partition in list_s3_partitions(duckdb_con, s3_dir) - skip
+    }
+
+
+def _load(duckdb_con, df, is_delta=False):
+    return load_df_to_s3_partitions(
+        duckdb_con, df, 'transactions', BUCKET_NAME, is_delta=is_delta
+    )
+
+
+class TestLoadDfToS3Table:
+    def _stored(self, duckdb_con):
+        s3_file = f"{s3_uri(BUCKET_NAME, 'transactions')}.parquet"
+        return duckdb_con.execute(
+            f"select * from read_parquet('{s3_file}') order by id"
+        ).fetchall()
+
+    def test_writes_rows_and_returns_count(self, duckdb_con):
+        rows = load_df_to_s3_table(
+            duckdb_con,
+            _transactions(('a', 100, 2025, 1, False), ('b', 200, 2025, 2, False)),
+            'transactions',
+            BUCKET_NAME,
+        )
+
+        assert rows == 2
+        assert self._stored(duckdb_con) == [
+            ('a', 100, 2025, 1, False),
+            ('b', 200, 2025, 2, False),
+        ]
+
+    def test_replaces_existing_table(self, duckdb_con):
+        load_df_to_s3_table(
+            duckdb_con,
+            _transactions(('a', 100, 2025, 1, False), ('b', 200, 2025, 2, False)),
+            'transactions',
+            BUCKET_NAME,
+        )
+
+        rows = load_df_to_s3_table(
+            duckdb_con,
+            _transactions(('c', 300, 2025, 3, False)),
+            'transactions',
+            BUCKET_NAME,
+        )
+
+        assert rows == 1
+        assert self._stored(duckdb_con) == [('c', 300, 2025, 3, False)]
+
+    def test_drop_deleted_skips_and_does_not_count_deleted_rows(self, duckdb_con):
+        rows = load_df_to_s3_table(
+            duckdb_con,
+            _transactions(('a', 100, 2025, 1, False), ('b', 200, 2025, 2, True)),
+            'transactions',
+            BUCKET_NAME,
+            drop_deleted=True,
+        )
+
+        assert rows == 1
+        assert self._stored(duckdb_con) == [('a', 100, 2025, 1, False)]
+
+
+class TestLoadDfToS3Partitions:
+    initial = _transactions(
+        ('a', 100, 2025, 1, False),
+        ('b', 200, 2025, 1, False),
+        ('c', 300, 2025, 2, False),
+    )
+
+    def test_full_load_replaces_every_partition(self, duckdb_con):
+        _load(duckdb_con, self.initial)
+
+        rows = _load(duckdb_con, _transactions(('d', 400, 2025, 3, False)))
+
+        assert rows == 1
+        assert _partitions(duckdb_con) == {
+            (2025, 1): [],
+            (2025, 2): [],
+            (2025, 3): ['d'],
+        }
+
+    def test_delta_moves_row_to_its_new_month(self, duckdb_con):
+        _load(duckdb_con, self.initial)
+
+        rows = _load(
+            duckdb_con, _transactions(('a', 100, 2025, 2, False)), is_delta=True
+        )
+
+        # Only the changed row is counted, not every row rewritten
+        assert rows == 1
+        assert _partitions(duckdb_con) == {(2025, 1): ['b'], (2025, 2): ['a', 'c']}
+
+    def test_delta_deletes_row(self, duckdb_con):
+        _load(duckdb_con, self.initial)
+
+        _load(duckdb_con, _transactions(('b', 200, 2025, 1, True)), is_delta=True)
+
+        assert _partitions(duckdb_con) == {(2025, 1): ['a'], (2025, 2): ['c']}
+
+    def test_delta_emptying_partition_leaves_empty_file(self, duckdb_con):
+        _load(duckdb_con, self.initial)
+
+        _load(duckdb_con, _transactions(('c', 300, 2025, 2, True)), is_delta=True)
+
+        assert _partitions(duckdb_con) == {(2025, 1): ['a', 'b'], (2025, 2): []}
+
+    def test_delta_only_reads_rewritten_partitions(self, duckdb_con):
+        _load(duckdb_con, self.initial)
+        s3_dir = s3_uri(BUCKET_NAME, 'transactions')
+        # Any read of the untouched partition would fail
+        untouched = partition_path(s3_dir, (2025, 2))
+        Path(untouched, PARTITION_FILE_NAME).write_bytes(b'not parquet')
+
+        _load(duckdb_con, _transactions(('a', 100, 2025, 3, False)), is_delta=True)
+
+        assert _partitions(duckdb_con, {(2025, 2)}) == {
+            (2025, 1): ['b'],
+            (2025, 3): ['a'],
+        }
+
+    def test_delta_without_index_scans_partitions_and_indexes_them(self, duckdb_con):
+        _load(duckdb_con, self.initial)
+        index_file = Path(partition_index_file(s3_uri(BUCKET_NAME, 'transactions')))
+        index_file.unlink()
+
+        _load(duckdb_con, _transactions(('a', 100, 2025, 2, False)), is_delta=True)
+
+        assert _partitions(duckdb_con) == {(2025, 1): ['b'], (2025, 2): ['a', 'c']}
+        assert sorted(
+            duckdb_con.execute(
+                f"select id, year, month from read_parquet('{index_file}')"
+            ).fetchall()
+        ) == [('a', 2025, 2), ('b', 2025, 1), ('c', 2025, 2)]
+
+    def test_creates_local_bucket_directories(self, duckdb_con):
+        load_df_to_s3_partitions(
+            duckdb_con,
+            _transactions(('a', 100, 2025, 1, False)),
+            'transactions',
+            BUCKET_NAME,
+        )
+
+        s3_dir = s3_uri(BUCKET_NAME, 'transactions')
+        assert duckdb_con.execute(
+            f"select id from read_parquet('{s3_dir}/*/*/*.parquet')"
+        ).fetchall() == [('a',)]
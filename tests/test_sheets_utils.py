@@ -0,0 +1,89 @@
+"""Tests for the sheets query helpers."""
+
+import json
+import math
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.sheets.utils import df_to_sheet_values, get_dfs_by_year
+from src.utils import db_connection
+
+
+@pytest.fixture
+def warehouse(tmp_path, monkeypatch):
+    """Create a small dashboards table in a temporary database."""
+    database = tmp_path / 'test.duckdb'
+    monkeypatch.setattr(db_connection, 'DATABASE_PATH', database)
+
+    with duckdb.connect(database) as duckdb_con:
+        duckdb_con.execute(
+            """
+            create schema dashboards;
+            create table dashboards.yearly_needs as
+            select * from (values
+                (2024, 'Home', 'Rent', 1200.0, 'unused'),
+                (2025, 'Home', 'Rent', 1300.0, 'unused'),
+                (2024, 'Food', 'Groceries', 'nan'::double, 'unused')
+            ) as t(budget_year, subcategory_group, category_name, spend, extra);
+            """
+        )
+
+
+class TestGetDfsByYear:
+    def test_splits_rows_by_year(self, warehouse):
+        dfs = get_dfs_by_year(
+            'dashboards.yearly_needs', ['subcategory_group', 'category_name', 'spend']
+        )
+
+        assert sorted(dfs) == [2024, 2025]
+        assert dfs[2024].columns.tolist() == [
+            'subcategory_group',
+            'category_name',
+            'spend',
+        ]
+        assert dfs[2024]['category_name'].tolist() == ['Rent', 'Groceries']
+        assert dfs[2024]['spend'].tolist()[0] == 1200.0
+        assert math.isnan(dfs[2024]['spend'].tolist()[1])
+        assert dfs[2025]['spend'].tolist() == [1300.0]
+
+
+class TestDfToSheetValues:
+    def test_converts_columns_by_dtype(self):
+        df = pd.DataFrame(
+            {
+                'name': ['Rent', None],
+                'year': np.array([2024, 2025], dtype=np.int64),
+                'spend': [1200.456, np.nan],
+                'ratio': [np.inf, -0.004],
+                'month': pd.to_datetime(['2024-01-01', None]),
+                'flag': [True, False],
+            }
+        )
+
+        values = df_to_sheet_values(df)
+
+        assert values == [
+            ['name', 'year', 'spend', 'ratio', 'month', 'flag'],
+            ['Rent', 2024, 1200.46, None, '2024-01-01', True],
+            [None, 2025, None, -0.0, None, False],
+        ]
+        assert type(values[1][1]) is int
+        json.dumps(values)
+
+    def test_nullable_integers(self):
+        df = pd.DataFrame({'year': pd.array([2024, None], dtype='Int64')})
+
+        assert df_to_sheet_values(df) == [['year'], [2024], [None]]
+
+    def test_empty(self):
+        df = pd.DataFrame({'name': pd.Series([], dtype=object)})
+
+        assert df_to_sheet_values(df) == [['name']]
+
+    def test_date_format(self):
+        df = pd.DataFrame({'month': pd.to_datetime(['2024-03-01'])})
+
+        assert df_to_sheet_values(df, date_format='%-m/%Y') == [['month'], ['3/2024']]
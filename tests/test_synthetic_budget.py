@@ -0,0 +1,66 @@
+"""Tests for the synthetic budgets used by the benchmark."""
+
+import io
+import json
+from datetime import date
+
+from benchmarks.synthetic_budget import SyntheticBudget
+from src.etl.tables import build_budget_tables
+from src.utils.s3_utils import s3_uri
+
+
+def _budget_data(budget: SyntheticBudget) -> dict:
+    stream = io.StringIO()
+    counts = budget.write_response(stream)
+    data = json.loads(stream.getvalue())['data']
+    assert {key: len(items) for key, items in data['budget'].items()} == counts
+    return data
+
+
+class TestSyntheticBudget:
+    def test_builds_budget_tables(self):
+        budget = SyntheticBudget(
+            years=2, categories=30, transactions=500, end=date(2025, 6, 15)
+        )
+
+        tables = build_budget_tables(_budget_data(budget)['budget'])
+
+        assert tables['transactions'].num_rows == 500
+        # Two years back plus the current and two future months, each with
+        # every category and the income category
+        assert tables['months'].num_rows == 27 * 31
+        assert min(tables['transactions']['date'].to_pylist()) >= '2023-06-01'
+        assert max(tables['transactions']['date'].to_pylist()) <= '2025-06-15'
+
+    def test_subtransactions_add_up_to_split_transactions(self):
+        budget = SyntheticBudget(years=1, categories=10, transactions=1000)
+
+        data = _budget_data(budget)['budget']
+
+        amounts = {item['id']: item['amount'] for item in data['transactions']}
+        split_totals = {}
+        for item in data['subtransactions']:
+            transaction_id = item['transaction_id']
+            split_totals[transaction_id] = (
+                split_totals.get(transaction_id, 0) + item['amount']
+            )
+        assert split_totals
+        assert all(amounts[key] == total for key, total in split_totals.items())
+
+    def test_same_seed_same_budget(self):
+        first = SyntheticBudget(years=1, categories=5, transactions=100, seed=3)
+        second = SyntheticBudget(years=1, categories=5, transactions=100, seed=3)
+
+        assert _budget_data(first) == _budget_data(second)
+
+
+class TestS3Uri:
+    def test_local_root(self, monkeypatch):
+        monkeypatch.setenv('S3_LOCAL_ROOT', '/tmp/s3')
+
+        assert s3_uri('bucket', 'transactions') == '/tmp/s3/bucket/transactions'
+
+    def test_s3_by_default(self, monkeypatch):
+        monkeypatch.delenv('S3_LOCAL_ROOT', raising=False)
+
+        assert s3_uri('bucket', 'transactions') == 's3://bucket/transactions'
@@ -0,0 +1,107 @@
+"""Tests for the TaskPool module."""
+
+import threading
+import time
+
+import duckdb
+import pytest
+
+from src.utils.task_pool import TaskPool, worker_cursor
+
+
+class TestTaskPool:
+    def test_runs_tasks_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        with TaskPool(max_workers=3) as pool:
+            for name in ('a', 'b', 'c'):
+                pool.submit(name, barrier.wait)
+            timings = pool.wait()
+
+        assert set(timings) == {'a', 'b', 'c'}
+
+    def test_result_does_not_wait_for_other_tasks(self):
+        release = threading.Event()
+
+        with TaskPool(max_workers=2) as pool:
+            pool.submit('slow', release.wait, 5)
+            pool.submit('fast', lambda: 42)
+
+            assert pool.result('fast') == 42
+            assert 'slow' not in pool.timings
+            release.set()
+
+    def test_failure_cancels_queued_tasks(self):
+        ran = []
+
+        def fail():
+            time.sleep(0.05)
+            raise RuntimeError('boom')
+
+        with pytest.raises(RuntimeError, match='boom'):
+            with TaskPool(max_workers=1) as pool:
+                pool.submit('fail', fail)
+                pool.submit('queued', ran.append, 'queued')
+                pool.wait()
+
+        assert ran == []
+
+    def test_failure_raised_while_waiting_on_another_task(self):
+        release = threading.Event()
+
+        def fail():
+            raise RuntimeError('boom')
+
+        with pytest.raises(RuntimeError, match='boom'):
+            with TaskPool(max_workers=2) as pool:
+                pool.submit('slow', release.wait, 5)
+                pool.submit('fail', fail)
+                try:
+                    pool.result('slow')
+                finally:
+                    release.set()
+
+    def test_duplicate_name(self):
+        with TaskPool(max_workers=1) as pool:
+            pool.submit('a', lambda: None)
+            with pytest.raises(ValueError):
+                pool.submit('a', lambda: None)
+
+
+class TestWorkerCursor:
+    def test_one_cursor_per_thread(self):
+        duckdb_con = duckdb.connect()
+        cursors = []
+
+        def get_cursors():
+            cursors.append((worker_cursor(duckdb_con), worker_cursor(duckdb_con)))
+
+        threads = [threading.Thread(target=get_cursors) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        (first, first_again), (second, _) = cursors
+        assert first is first_again
+        assert first is not second
+        assert first is not duckdb_con
+
+    def test_new_connection_never_gets_stale_cursor(self):
+        for _ in range(20):
+            duckdb_con = duckdb.connect()
+            assert worker_cursor(duckdb_con).execute('select 1').fetchone() == (1,)
+            duckdb_con.close()
+            del duckdb_con
+
+    def test_pool_closes_worker_cursors(self):
+        duckdb_con = duckdb.connect()
+
+        with TaskPool(max_workers=2) as pool:
+            pool.submit('cursor', lambda: worker_cursor(duckdb_con))
+            cursor = pool.result('cursor')
+            assert cursor.execute('select 1').fetchone() == (1,)
+
+        with pytest.raises(duckdb.ConnectionException):
+            cursor.execute('select 1')
+        duckdb_con.execute('select 1')